@@ -11,14 +11,14 @@ export default function NotificationBell({ className = '' }) {
 
     const fetchNotifications = async () => {
         try {
-            const response = await axios.get('http://localhost:8000/notifications/notifications/', {
+            // Badge counts only; the full list is loaded on the notifications page
+            const response = await axios.get('http://localhost:8000/notifications/notifications/unread-count/', {
                 headers: {
                     'Authorization': `Bearer ${token}`,
                 },
             });
 
-            const unread = (response.data || []).filter(notif => !notif.read);
-            setCount(unread.length);
+            setCount(response.data?.notifications || 0);
 
         } catch (err) {
             console.error("Failed to fetch notifications", err);
@@ -1,4 +1,4 @@
-import React, { createContext, useEffect, useState, useContext } from 'react';
+import React, { createContext, useEffect, useRef, useState, useContext } from 'react';
 
 const NotificationContext = createContext();
 
@@ -7,7 +7,9 @@ export const useNotifications = () => useContext(NotificationContext);
 export const NotificationProvider = ({ userId, children }) => {
     const [notifications, setNotifications] = useState([]);
     const [notificationCount, setNotificationCount] = useState(0);
+    const [messageCount, setMessageCount] = useState(0);
     const [socket, setSocket] = useState(null);
+    const seenIds = useRef(new Set());
 
     useEffect(() => {
         if (!userId) return;
@@ -21,8 +23,16 @@ export const NotificationProvider = ({ userId, children }) => {
         ws.onmessage = (event) => {
             const data = JSON.parse(event.data);
             if (data.type === 'notification') {
-                setNotifications(prev => [data.notification, ...prev]);
-                setNotificationCount(prevCount => prevCount + 1);
+                // Coalesced notifications are pushed again under the same id: move them to the top.
+                const id = data.notification.id;
+                setNotifications(prev => [data.notification, ...prev.filter(n => n.id !== id)]);
+                if (!seenIds.current.has(id)) {
+                    seenIds.current.add(id);
+                    setNotificationCount(prevCount => prevCount + 1);
+                }
+            } else if (data.type === 'unread_count') {
+                setNotificationCount(data.notifications);
+                setMessageCount(data.messages);
             }
         };
 
@@ -53,7 +63,7 @@ export const NotificationProvider = ({ userId, children }) => {
     };
 
     return (
-        <NotificationContext.Provider value={{ notifications, notificationCount, markAllRead }}>
+        <NotificationContext.Provider value={{ notifications, notificationCount, messageCount, markAllRead }}>
             {children}
         </NotificationContext.Provider>
     );
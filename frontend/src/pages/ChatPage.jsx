@@ -13,7 +13,7 @@ export default function ChatPage() {
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
-    fetchDetailedFollows()
+    fetchDetailedFollows(['mutual_follows'])
       .then(res => {
         setMutuals(res?.data?.mutual_follows || []);
       })
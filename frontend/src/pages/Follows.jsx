@@ -1,6 +1,6 @@
 import React, { useEffect, useState } from 'react';
 import { Link } from 'react-router-dom';
-import { fetchFollows, acceptFollowRequest, sendFollowRequest } from '../services/follows';
+import { fetchFollows, acceptFollowRequest, acceptAllFollowRequests, sendFollowRequest } from '../services/follows';
 import toast from 'react-hot-toast';
 import { useFollowContext } from '../context/FollowContext';
 
@@ -20,7 +20,7 @@ export default function Follows() {
 
   const loadFollows = () => {
     setLoading(true);
-    fetchFollows()
+    fetchFollows(['mutual_follows', 'requests_received', 'requests_sent', 'following'])
       .then(res => {
         setMutuals(res?.data?.mutual_follows || []);
         setRequestsReceived(res?.data?.requests_received || []);
@@ -50,6 +50,18 @@ export default function Follows() {
     }
   };
 
+  const acceptAll = async () => {
+    try {
+      const res = await acceptAllFollowRequests();
+      toast.success(`Accepted ${res.data.accepted} follow requests!`);
+      loadFollows();
+      triggerRefresh();
+    } catch (err) {
+      console.error("Accept all error:", err);
+      toast.error("Something went wrong while accepting");
+    }
+  };
+
   const followBack = async user => {
     try {
       await sendFollowRequest(user.id);
@@ -157,7 +169,17 @@ export default function Follows() {
 
           {activeTab === 'requestsReceived' && (
             <>
-              <h2 className="text-3xl font-bold mb-4 border-b border-gray-700 pb-2">Follow Requests Received</h2>
+              <div className="flex justify-between items-center mb-4 border-b border-gray-700 pb-2">
+                <h2 className="text-3xl font-bold">Follow Requests Received</h2>
+                {requestsReceived.length > 1 && (
+                  <button
+                    onClick={acceptAll}
+                    className="bg-blue-600 hover:bg-blue-700 text-white px-4 py-2 rounded-xl font-semibold transition-colors duration-300"
+                  >
+                    Accept all
+                  </button>
+                )}
+              </div>
               {requestsReceived.length === 0 ? (
                 <p className="text-gray-400">No pending requests to accept.</p>
               ) : (
@@ -1,40 +1,60 @@
-import { useEffect, useState } from 'react';
+import { useCallback, useEffect, useState } from 'react';
 import axios from 'axios';
 
+const PAGE_SIZE = 20;
+
 export default function NotificationsPage() {
     const [notifications, setNotifications] = useState([]);
+    const [nextCursor, setNextCursor] = useState(null);
     const [loading, setLoading] = useState(true);
+    const [loadingMore, setLoadingMore] = useState(false);
     const [error, setError] = useState(null);
     const token = localStorage.getItem('access');
 
+    const fetchPage = useCallback(async (cursor) => {
+        const params = { page_size: PAGE_SIZE, compact: true };
+        if (cursor) params.cursor = cursor;
+        const response = await axios.get('http://localhost:8000/notifications/notifications/', {
+            params,
+            headers: {
+                'Authorization': `Bearer ${token}`,
+            },
+        });
+        if (!response.data || !Array.isArray(response.data.results)) {
+            throw new Error("Invalid response structure");
+        }
+        return response.data;
+    }, [token]);
+
     useEffect(() => {
         const fetchNotifications = async () => {
             try {
-                const response = await axios.get('http://localhost:8000/notifications/notifications/', {
-                    headers: {
-                        'Authorization': `Bearer ${token}`,
-                    },
-                });
-
-                if (response.data && Array.isArray(response.data)) {
-                    if (response.data.length === 0) {
-                        setError("No notifications found.");
-                    } else {
-                        setNotifications(response.data);
-                    }
-                } else {
-                    setError("Invalid response structure or no notifications found.");
-                }
-                setLoading(false);
+                const data = await fetchPage(null);
+                setNotifications(data.results);
+                setNextCursor(data.next);
             } catch (err) {
                 console.error("Error fetching notifications:", err);
                 setError("Failed to fetch notifications.");
+            } finally {
                 setLoading(false);
             }
         };
 
         fetchNotifications();
-    }, [token]);
+    }, [fetchPage]);
+
+    const loadMore = async () => {
+        setLoadingMore(true);
+        try {
+            const data = await fetchPage(nextCursor);
+            setNotifications((prev) => [...prev, ...data.results]);
+            setNextCursor(data.next);
+        } catch (err) {
+            console.error("Error fetching more notifications:", err);
+        } finally {
+            setLoadingMore(false);
+        }
+    };
 
     if (loading) return <p className="text-gray-300 text-center mt-4">Loading...</p>;
     if (error) return <p className="text-red-400 text-center mt-4">{error}</p>;
@@ -57,6 +77,16 @@ export default function NotificationsPage() {
                     ))}
                 </ul>
             )}
+
+            {nextCursor && (
+                <button
+                    onClick={loadMore}
+                    disabled={loadingMore}
+                    className="mt-6 w-full py-2 rounded-lg bg-gray-800 border border-gray-700 text-gray-300 hover:bg-gray-700 disabled:opacity-50"
+                >
+                    {loadingMore ? "Loading..." : "Load more"}
+                </button>
+            )}
         </div>
     );
 }
@@ -1,7 +1,7 @@
 import React, { useState, useEffect, useContext } from 'react';
 import { Link } from 'react-router-dom';
 import { sendFollowRequest } from '../services/follows';
-import { fetchProfileWithPosts, updateProfile } from '../services/profile';
+import { fetchProfileWithPosts, fetchProfilePosts, updateProfile } from '../services/profile';
 import { fetchFollows } from '../services/follows';
 import { deletePost } from '../services/posts';
 import { AuthContext } from '../context/AuthContext';
@@ -15,6 +15,7 @@ export default function ProfilePage() {
   const [formData, setFormData] = useState({});
   const [editing, setEditing] = useState(false);
   const [myPosts, setMyPosts] = useState([]);
+  const [postsNext, setPostsNext] = useState(null);
   const [activeTab, setActiveTab] = useState('posts');
   const [followersList, setFollowersList] = useState([]);
   const [followingList, setFollowingList] = useState([]);
@@ -35,6 +36,7 @@ export default function ProfilePage() {
           followers_count: data.followers_count,
           following_count: data.following_count,
           mutual_follow_count: data.mutual_follow_count,
+          posts_count: data.posts_count,
         });
 
         setFormData({
@@ -48,13 +50,24 @@ export default function ProfilePage() {
         });
 
         setMyPosts(data.posts || []);
+        setPostsNext(data.posts_next || null);
       })
       .catch(console.error);
   }, [user]);
 
+  const loadMorePosts = async () => {
+    try {
+      const res = await fetchProfilePosts(user.username, postsNext);
+      setMyPosts(prev => [...prev, ...res.data.results]);
+      setPostsNext(res.data.next);
+    } catch (err) {
+      console.error('Failed to load more posts', err);
+    }
+  };
+
   const fetchFollowLists = async () => {
     try {
-      const res = await fetchFollows();
+      const res = await fetchFollows(['followers', 'following', 'requests_sent']);
       setFollowersList(res.data.followers || []);
       setFollowingList(res.data.following || []);
       setSentRequestIds(res.data.requests_sent.map(r => r.to_user.id));
@@ -122,6 +135,7 @@ export default function ProfilePage() {
         followers_count: newData.followers_count,
         following_count: newData.following_count,
         mutual_follow_count: newData.mutual_follow_count,
+        posts_count: newData.posts_count,
       });
 
       setFormData({
@@ -210,7 +224,7 @@ export default function ProfilePage() {
             className={`px-4 py-2 rounded-md text-lg ${activeTab === 'posts' ? 'bg-blue-500 text-white font-semibold' : 'text-gray-300 hover:text-white'}`}
             onClick={() => setActiveTab('posts')}
           >
-            Posts <span className="font-semibold text-sm">({myPosts.length})</span>
+            Posts <span className="font-semibold text-sm">({profile.posts_count ?? myPosts.length})</span>
           </button>
           <button
             className={`px-4 py-2 rounded-md text-lg ${activeTab === 'followers' ? 'bg-blue-500 text-white font-semibold' : 'text-gray-300 hover:text-white'}`}
@@ -364,6 +378,14 @@ export default function ProfilePage() {
             </div>
           ))}
           {myPosts.length === 0 && <p className="text-gray-400 mt-4 text-center col-span-full">No posts yet.</p>}
+          {postsNext && (
+            <button
+              onClick={loadMorePosts}
+              className="col-span-full py-2 text-sm text-gray-300 bg-gray-800 rounded-md hover:bg-gray-700"
+            >
+              Load more
+            </button>
+          )}
         </div>
       )}
     </div>
@@ -1,6 +1,6 @@
 import { useParams, Link, useNavigate } from 'react-router-dom';
 import { useEffect, useState, useContext } from 'react';
-import { fetchProfileWithPosts } from '../services/profile';
+import { fetchProfileWithPosts, fetchProfilePosts } from '../services/profile';
 import { fetchUserFollows } from '../services/follows';
 import { sendFollowRequest, cancelFollowRequest, unfollowUser } from '../services/follows';
 import { AuthContext } from '../context/AuthContext';
@@ -16,6 +16,7 @@ export default function UserProfile() {
 
   const [profile, setProfile] = useState(null);
   const [posts, setPosts] = useState([]);
+  const [postsNext, setPostsNext] = useState(null);
   const [followersList, setFollowersList] = useState([]);
   const [followingList, setFollowingList] = useState([]);
   const [activeTab, setActiveTab] = useState('posts'); // 'posts', 'followers', 'following'
@@ -37,12 +38,24 @@ export default function UserProfile() {
           ...data.profile,
           followers_count: data.followers_count,
           following_count: data.following_count,
+          posts_count: data.posts_count,
         });
         setPosts(data.posts || []);
+        setPostsNext(data.posts_next || null);
       })
       .catch(console.error);
   }, [username]);
 
+  const loadMorePosts = async () => {
+    try {
+      const res = await fetchProfilePosts(username, postsNext);
+      setPosts(prev => [...prev, ...res.data.results]);
+      setPostsNext(res.data.next);
+    } catch (err) {
+      console.error('Failed to load more posts', err);
+    }
+  };
+
   const fetchFollowLists = async () => {
     try {
       // Fetch followers and following lists for the current user profile
@@ -176,7 +189,7 @@ export default function UserProfile() {
             } rounded-l-md`}
           onClick={() => setActiveTab('posts')}
         >
-          Posts ({posts.length})
+          Posts ({profile?.posts_count ?? posts.length})
         </button>
         <button
           className={`flex-1 py-2 text-sm font-medium text-gray-300 focus:outline-none ${activeTab === 'followers' ? 'bg-blue-500 text-white' : 'hover:bg-gray-700'
@@ -233,6 +246,14 @@ export default function UserProfile() {
                 <p className="text-sm text-gray-300">{post.text_content}</p>
               </div>
             ))}
+            {postsNext && (
+              <button
+                onClick={loadMorePosts}
+                className="col-span-full py-2 text-sm text-gray-300 bg-gray-800 rounded hover:bg-gray-700"
+              >
+                Load more
+              </button>
+            )}
           </div>
         )}
 
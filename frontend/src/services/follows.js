@@ -12,13 +12,23 @@ export const cancelFollowRequest = (userId) =>
 export const acceptFollowRequest = (requestId) =>
   API.post(`/follows/accept/${requestId}/`);
 
+// Accept every pending follow request at once. Returns { accepted }.
+export const acceptAllFollowRequests = () =>
+  API.post('/follows/accept-all/');
+
 // Unfollow a user
 export const unfollowUser = (userId) =>
   API.delete(`/follows/unfollow/${userId}/`);
 
-// Get all follow-related data (followers, following, requests, mutuals)
-export const fetchMyFollows = () =>
-  API.get('/follows/my-follows/');
+// Get follow-related data (followers, following, requests, mutuals).
+// Pass the sections the page needs, e.g. ['following', 'requests_sent']; omit for all.
+export const fetchMyFollows = (sections) =>
+  API.get('/follows/my-follows/', { params: sections ? { sections: sections.join(',') } : {} });
+
+// One paginated list: section is 'followers', 'following', 'mutual',
+// 'requests/sent' or 'requests/received'. Returns { results, next }.
+export const fetchMyFollowsPage = (section, cursor) =>
+  API.get(`/follows/my-follows/${section}/`, { params: { cursor } });
 
 // Alias export to match naming in components
 export const fetchDetailedFollows = fetchMyFollows;
@@ -2,6 +2,8 @@ import API from './api';
 
 export const fetchProfileWithPosts = (username) =>
   API.get(`/profileview/user/${username}/`);
+export const fetchProfilePosts = (username, cursor) =>
+  API.get(`/profileview/user/${username}/posts/`, { params: { cursor } });
 export const fetchProfile = () => API.get('/profile/edit/');
 
 
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv, find_dotenv
 import dj_database_url
 
@@ -12,4 +13,81 @@ ALLOWED_HOSTS = os.environ.get('ALLOWED_HOSTS', '').split(',')
 
 DATABASES = {
     'default': dj_database_url.config(default=os.environ.get('DATABASE_URL'))
-}
\ No newline at end of file
+}
+
+# Feed pagination
+FEED_PAGE_SIZE = int(os.environ.get('FEED_PAGE_SIZE', 20))
+FEED_MAX_PAGE_SIZE = int(os.environ.get('FEED_MAX_PAGE_SIZE', 100))
+
+# Materialized home timelines. Personal timelines are cut back to this length
+# by `manage.py trim_timelines --loop`; the shared public one is not capped.
+TIMELINE_MAX_LENGTH = int(os.environ.get('TIMELINE_MAX_LENGTH', 800))
+# Authors with at least this many accepted followers are merged into feeds
+# at read time instead of being fanned out on write.
+FEED_CELEBRITY_THRESHOLD = int(os.environ.get('FEED_CELEBRITY_THRESHOLD', 10000))
+FEED_CELEBRITY_CACHE_SIZE = int(os.environ.get('FEED_CELEBRITY_CACHE_SIZE', 200))
+
+# In-memory follow graph (follows/graph.py), per process. Off by default.
+FOLLOW_GRAPH_INDEX = os.environ.get('FOLLOW_GRAPH_INDEX', 'False') == 'True'
+FOLLOW_GRAPH_MAX_AGE = int(os.environ.get('FOLLOW_GRAPH_MAX_AGE', 600))
+
+# Most targets one bulk follow/unfollow/accept request may name (follows/bulk.py)
+FOLLOW_BULK_MAX_TARGETS = int(os.environ.get('FOLLOW_BULK_MAX_TARGETS', 100))
+
+# Write-behind notifications (notifications/emitter.py). When on, events are
+# spooled to NOTIFICATION_SPOOL_DIR and written by
+# `manage.py flush_notifications --loop`; when off they are written inline.
+# The tmp default is for development only: production.py refuses to enable
+# write-behind without an explicit spool directory and fsyncs by default.
+NOTIFICATIONS_WRITE_BEHIND = os.environ.get('NOTIFICATIONS_WRITE_BEHIND', 'False') == 'True'
+NOTIFICATION_SPOOL_DIR = os.environ.get('NOTIFICATION_SPOOL_DIR', os.path.join(tempfile.gettempdir(), 'showme-notifications'))
+NOTIFICATION_SPOOL_FSYNC = os.environ.get('NOTIFICATION_SPOOL_FSYNC', 'False') == 'True'
+NOTIFICATION_BATCH_SIZE = int(os.environ.get('NOTIFICATION_BATCH_SIZE', 500))
+NOTIFICATION_FLUSH_INTERVAL = float(os.environ.get('NOTIFICATION_FLUSH_INTERVAL', 1.0))
+# Repeated follow/message/post notifications within this many seconds are
+# folded into one row that keeps a count and the latest few actors.
+NOTIFICATION_COALESCE_WINDOW = int(os.environ.get('NOTIFICATION_COALESCE_WINDOW', 3600))
+NOTIFICATION_MAX_ACTORS = int(os.environ.get('NOTIFICATION_MAX_ACTORS', 5))
+
+# "People you may know" (follows/suggestions.py)
+SUGGESTIONS_TOP_K = int(os.environ.get('SUGGESTIONS_TOP_K', 50))
+SUGGESTIONS_BLOCK_SIZE = int(os.environ.get('SUGGESTIONS_BLOCK_SIZE', 2000))
+
+# Profile page cache (profileview/cache.py). Keep well under the media URL
+# expiry: cached pages embed media URLs.
+PROFILE_CACHE_TTL = int(os.environ.get('PROFILE_CACHE_TTL', 300))
+
+# Media URL resolver (mediafiles.resolver). Signed URLs live
+# AWS_QUERYSTRING_EXPIRE seconds; cached ones are handed out for at most half
+# of that, so every URL served has at least the other half left, well over
+# PROFILE_CACHE_TTL.
+AWS_QUERYSTRING_EXPIRE = int(os.environ.get('AWS_QUERYSTRING_EXPIRE', 3600))
+MEDIA_URL_CACHE_SIZE = int(os.environ.get('MEDIA_URL_CACHE_SIZE', 10000))
+MEDIA_URL_CACHE_TTL = int(os.environ.get('MEDIA_URL_CACHE_TTL', AWS_QUERYSTRING_EXPIRE // 2))
+
+# Post media processing (posts/processing.py)
+MEDIA_PROCESS_WORKERS = int(os.environ.get('MEDIA_PROCESS_WORKERS', 2))
+# Posts still pending after this many seconds are assumed lost (e.g. the web
+# process restarted) and picked up by `manage.py process_post_media --stale`.
+# Keep it above the longest video encode.
+MEDIA_PROCESS_STALE_AFTER = int(os.environ.get('MEDIA_PROCESS_STALE_AFTER', 3600))
+POST_IMAGE_DERIVATIVES = {'thumb': 320, 'feed': 1080, 'full': 2048}  # name -> max width (px)
+POST_IMAGE_QUALITY = 85
+FFMPEG_BINARY = os.environ.get('FFMPEG_BINARY', 'ffmpeg')
+FFPROBE_BINARY = os.environ.get('FFPROBE_BINARY', 'ffprobe')
+POST_VIDEO_HLS_SEGMENT_SECONDS = 4
+POST_VIDEO_MAX_HEIGHT = 720
+
+# Direct-to-storage uploads (posts/uploads.py)
+POST_UPLOAD_URL_EXPIRY = int(os.environ.get('POST_UPLOAD_URL_EXPIRY', 900))
+POST_UPLOAD_MAX_IMAGE_BYTES = int(os.environ.get('POST_UPLOAD_MAX_IMAGE_BYTES', 20 * 1024 * 1024))
+POST_UPLOAD_MAX_VIDEO_BYTES = int(os.environ.get('POST_UPLOAD_MAX_VIDEO_BYTES', 1024 * 1024 * 1024))
+
+# Resumable chunked uploads. Must be on disk shared by every web worker.
+CHUNKED_UPLOAD_DIR = os.environ.get('CHUNKED_UPLOAD_DIR', os.path.join(tempfile.gettempdir(), 'showme-chunks'))
+CHUNKED_UPLOAD_CHUNK_SIZE = int(os.environ.get('CHUNKED_UPLOAD_CHUNK_SIZE', 8 * 1024 * 1024))
+CHUNKED_UPLOAD_EXPIRY_HOURS = int(os.environ.get('CHUNKED_UPLOAD_EXPIRY_HOURS', 24))
+
+# Deferred media deletion (mediafiles.gc)
+MEDIA_GC_BATCH_SIZE = int(os.environ.get('MEDIA_GC_BATCH_SIZE', 1000))
+MEDIA_GC_MAX_ATTEMPTS = int(os.environ.get('MEDIA_GC_MAX_ATTEMPTS', 10))
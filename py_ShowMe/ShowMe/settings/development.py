@@ -41,6 +41,7 @@ INSTALLED_APPS = [
     'profileview',
     'search',
     'follows',
+    'mediafiles',
 
     # Dev tools
     'django_extensions',
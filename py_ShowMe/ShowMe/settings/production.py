@@ -3,6 +3,7 @@ from dotenv import load_dotenv
 import os
 from .base import *
 from datetime import timedelta
+from django.core.exceptions import ImproperlyConfigured
 
 BASE_DIR = Path(__file__).resolve().parent.parent.parent 
 
@@ -64,6 +65,7 @@ INSTALLED_APPS = [
     'follows',
     'chat',
     'notifications',
+    'mediafiles',
 
     # Search
     'django_elasticsearch_dsl',
@@ -183,6 +185,23 @@ CHANNEL_LAYERS = {
     },
 }
 
+# ✅ CACHE (Shared by all workers: feed recent-posts cache, profile page cache)
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": f"redis://{os.getenv('REDIS_HOST', 'localhost')}:6379/1",
+    },
+}
+
+# ✅ NOTIFICATIONS (Opt-in write-behind; needs the flush_notifications worker on every web host)
+NOTIFICATIONS_WRITE_BEHIND = os.getenv('NOTIFICATIONS_WRITE_BEHIND', 'False') == 'True'
+NOTIFICATION_SPOOL_FSYNC = os.getenv('NOTIFICATION_SPOOL_FSYNC', 'True') == 'True'
+if NOTIFICATIONS_WRITE_BEHIND:
+    # The spool is the only copy of an event until it is flushed: never default it to tmp
+    if not os.getenv('NOTIFICATION_SPOOL_DIR'):
+        raise ImproperlyConfigured("NOTIFICATIONS_WRITE_BEHIND needs NOTIFICATION_SPOOL_DIR on a persistent disk.")
+    NOTIFICATION_SPOOL_DIR = os.environ['NOTIFICATION_SPOOL_DIR']
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # ✅ AWS S3 STORAGE (For media files)
@@ -193,10 +212,17 @@ AWS_SECRET_ACCESS_KEY = os.getenv('AWS_SECRET_ACCESS_KEY')
 AWS_STORAGE_BUCKET_NAME = os.getenv('AWS_STORAGE_BUCKET_NAME','showme-media')
 AWS_S3_REGION_NAME = os.getenv('AWS_S3_REGION_NAME','ap-south-1')  # Example: 'us-west-2'
 AWS_S3_CUSTOM_DOMAIN = f'{AWS_STORAGE_BUCKET_NAME}.s3.{AWS_S3_REGION_NAME}.amazonaws.com'
+# Point at an S3-compatible stand-in (MinIO, LocalStack) for local testing
+AWS_S3_ENDPOINT_URL = os.getenv('AWS_S3_ENDPOINT_URL')
+if AWS_S3_ENDPOINT_URL:
+    AWS_S3_CUSTOM_DOMAIN = None
 
 MEDIA_URL = f'https://{AWS_S3_CUSTOM_DOMAIN}/'
 
 AWS_DEFAULT_ACL = None
+# Re-read after .env.production; the URL cache TTL follows the signed-URL expiry
+AWS_QUERYSTRING_EXPIRE = int(os.getenv('AWS_QUERYSTRING_EXPIRE', AWS_QUERYSTRING_EXPIRE))
+MEDIA_URL_CACHE_TTL = int(os.getenv('MEDIA_URL_CACHE_TTL', AWS_QUERYSTRING_EXPIRE // 2))
 AWS_S3_URL_PROTOCOL = 'https'
 AWS_S3_USE_SSL = True
 AWS_S3_VERIFY = True
@@ -207,6 +233,12 @@ STORAGES = {
         "OPTIONS": {
             "bucket_name": AWS_STORAGE_BUCKET_NAME,
             "region_name": AWS_S3_REGION_NAME,
+            "endpoint_url": AWS_S3_ENDPOINT_URL,
+            "custom_domain": AWS_S3_CUSTOM_DOMAIN,
+            "querystring_expire": AWS_QUERYSTRING_EXPIRE,
+            # A re-upload under a queued name gets a fresh key instead of
+            # overwriting it, so mediafiles.gc never deletes the new file
+            "file_overwrite": False,
         },
     },
     "staticfiles": {  # Store static files locally
@@ -0,0 +1,40 @@
+# ShowMe/testing.py
+#
+# Shared base for the app test suites.
+
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from userProfile.models import Profile
+
+
+@override_settings(ELASTICSEARCH_DSL_AUTOSYNC=False)
+class ShowMeTestCase(TestCase):
+    """
+    Search indexing is off and search.signals.ProfileDocument is patched for
+    the whole test, setUp included, so profiles can be saved without an
+    Elasticsearch cluster. Subclasses that override setUp call super().
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.profile_document = self.enterContext(mock.patch('search.signals.ProfileDocument'))
+
+    def make_user(self, username, privacy=Profile.PUBLIC):
+        user = User.objects.create_user(username, password='x')
+        Profile.objects.create(user=user, privacy=privacy)
+        return user
+
+    def make_users(self, *usernames, private=()):
+        return [
+            self.make_user(username, Profile.PRIVATE if username in private else Profile.PUBLIC)
+            for username in usernames
+        ]
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
@@ -0,0 +1,88 @@
+# benchmarks/common.py
+#
+# Shared bootstrap for the benchmark scripts in this folder. Each script runs
+# against a throwaway test database (same as `manage.py test`), so it never
+# touches real data:
+#
+#     cd py_ShowMe && python benchmarks/feed_fanout.py
+
+import os
+import random
+import statistics
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+
+def setup_django():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "ShowMe.settings")
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+    import django
+    from django.conf import settings
+    django.setup()
+
+    # No Elasticsearch while benchmarking
+    settings.ELASTICSEARCH_DSL_AUTOSYNC = False
+    from django.db.models.signals import post_save, post_delete
+    from search import signals as search_signals
+    post_save.disconnect(search_signals.update_profile_document)
+    post_delete.disconnect(search_signals.delete_profile_document)
+
+    from django.test.utils import setup_test_environment
+    from django.db import connection
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+
+
+def power_law_follows(user_ids, avg_degree, alpha=1.2, seed=7):
+    """
+    Synthetic follow graph whose in-degree roughly follows a power law:
+    each follower picks targets weighted by a Pareto-distributed popularity.
+    Returns a list of (follower_id, following_id) pairs.
+    """
+    rng = random.Random(seed)
+    popularity = [rng.paretovariate(alpha) for _ in user_ids]
+    edges = set()
+    for follower in user_ids:
+        degree = max(1, int(rng.expovariate(1 / avg_degree)))
+        for following in rng.choices(user_ids, weights=popularity, k=degree):
+            if following != follower:
+                edges.add((follower, following))
+    return list(edges)
+
+
+def create_users(count, privacy='private', prefix='bench'):
+    from django.contrib.auth.models import User
+    from userProfile.models import Profile
+
+    User.objects.bulk_create([User(username=f"{prefix}{i}") for i in range(count)], batch_size=2000)
+    users = list(User.objects.filter(username__startswith=prefix).values_list('id', flat=True))
+    Profile.objects.bulk_create([Profile(user_id=user_id, privacy=privacy) for user_id in users], batch_size=2000)
+    return users
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(samples):
+    return {
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3),
+        "mean_ms": round(statistics.mean(samples) * 1000, 3),
+    }
+
+
+@contextmanager
+def timed(samples):
+    start = time.perf_counter()
+    yield
+    samples.append(time.perf_counter() - start)
@@ -0,0 +1,97 @@
+# benchmarks/feed_fanout.py
+#
+# Compares pure fan-out-on-write against the hybrid push/pull feed on a
+# synthetic power-law follow graph. Reports p50/p99 post-write and
+# feed-read latency, plus write amplification (timeline rows per post).
+#
+#     python benchmarks/feed_fanout.py --users 3000 --avg-degree 40 --threshold 300
+
+import argparse
+import random
+
+from common import create_users, power_law_follows, setup_django, summarize, timed
+
+
+def run_strategy(name, threshold, users, args):
+    from django.core.cache import cache
+    from django.db.models import Count
+    from django.test import override_settings
+    from follows.models import Follow
+    from posts import timeline
+    from posts.models import Post, TimelineEntry
+    from userProfile.models import Profile
+    from django.contrib.auth.models import User
+
+    Post.objects.all().delete()
+    TimelineEntry.objects.all().delete()
+    cache.clear()
+
+    with override_settings(FEED_CELEBRITY_THRESHOLD=threshold):
+        celebrities = [
+            row['following_id']
+            for row in Follow.objects.filter(accepted=True).values('following_id').annotate(n=Count('id'))
+            if row['n'] >= threshold
+        ]
+        Profile.objects.update(is_celebrity=False)
+        Profile.objects.filter(user_id__in=celebrities).update(is_celebrity=True)
+
+        rng = random.Random(11)
+        authors = User.objects.in_bulk(users)
+        write_samples = []
+        rows_before = TimelineEntry.objects.count()
+        for _ in range(args.posts):
+            author = authors[rng.choice(users)]
+            with timed(write_samples):
+                Post.objects.create(user=author, text_content="bench")
+        rows_written = TimelineEntry.objects.count() - rows_before
+
+        read_samples = []
+        for viewer_id in rng.sample(users, min(args.reads, len(users))):
+            with timed(read_samples):
+                timeline.read_timeline(authors[viewer_id], page_size=20)
+
+    return {
+        "strategy": name,
+        "celebrities": len(celebrities),
+        "write_amplification": round(rows_written / args.posts, 1),
+        "write": summarize(write_samples),
+        "read": summarize(read_samples),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--avg-degree', type=int, default=30)
+    parser.add_argument('--posts', type=int, default=300)
+    parser.add_argument('--reads', type=int, default=300)
+    parser.add_argument('--threshold', type=int, default=200, help="Celebrity threshold for the hybrid run.")
+    args = parser.parse_args()
+
+    setup_django()
+    from follows.models import Follow
+    from userProfile import counters
+
+    users = create_users(args.users)
+    edges = power_law_follows(users, args.avg_degree)
+    Follow.objects.bulk_create(
+        [Follow(follower_id=a, following_id=b, accepted=True) for a, b in edges], batch_size=5000
+    )
+    counters.recount()  # bulk_create skips the counter signals
+    print(f"{len(users)} users, {len(edges)} follow edges")
+
+    results = [
+        run_strategy("push", threshold=10 ** 9, users=users, args=args),
+        run_strategy("hybrid", threshold=args.threshold, users=users, args=args),
+    ]
+    for result in results:
+        print(
+            f"{result['strategy']:>7}: celebrities={result['celebrities']:<5} "
+            f"rows/post={result['write_amplification']:<8} "
+            f"write p50={result['write']['p50_ms']}ms p99={result['write']['p99_ms']}ms  "
+            f"read p50={result['read']['p50_ms']}ms p99={result['read']['p99_ms']}ms"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+# benchmarks/graph_index.py
+#
+# Load time, query latency and memory of the in-memory follow graph
+# (follows/graph.py) on a synthetic power-law graph, with a dict of Python
+# sets of ids alongside for the memory comparison.
+#
+#     python benchmarks/graph_index.py --users 20000 --avg-degree 50
+
+import argparse
+import random
+import sys
+import time
+
+from common import create_users, power_law_follows, setup_django, timed
+
+
+def micro(samples):
+    ordered = sorted(samples)
+    return (
+        f"p50={ordered[len(ordered) // 2] * 1e6:.1f}us "
+        f"p99={ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1e6:.1f}us"
+    )
+
+
+def set_index_bytes(edges):
+    following, followers = {}, {}
+    for a, b in edges:
+        following.setdefault(a, set()).add(b)
+        followers.setdefault(b, set()).add(a)
+    total = sys.getsizeof(following) + sys.getsizeof(followers)
+    for index in (following, followers):
+        total += sum(sys.getsizeof(ids) + sum(sys.getsizeof(i) for i in ids) for ids in index.values())
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--avg-degree', type=int, default=40)
+    parser.add_argument('--queries', type=int, default=20000)
+    args = parser.parse_args()
+
+    setup_django()
+    from follows.graph import FollowGraph
+    from follows.models import Follow
+
+    users = create_users(args.users, privacy='public')
+    edges = power_law_follows(users, args.avg_degree)
+    Follow.objects.bulk_create(
+        [Follow(follower_id=a, following_id=b, accepted=True) for a, b in edges], batch_size=5000
+    )
+
+    graph = FollowGraph()
+    start = time.perf_counter()
+    graph.load()
+    print(f"{len(users)} users, {graph.edges} edges, loaded in {time.perf_counter() - start:.2f}s")
+
+    rng = random.Random(3)
+    pairs = [(rng.choice(users), rng.choice(users)) for _ in range(args.queries)]
+    checks = {
+        "is_following": lambda a, b: graph.is_following(a, b),
+        "followers_count": lambda a, b: graph.followers_count(a),
+        "shared_following": lambda a, b: graph.shared_following(a, b),
+        "friends": lambda a, b: graph.friends(a),
+    }
+    for name, check in checks.items():
+        samples = []
+        for a, b in pairs:
+            with timed(samples):
+                check(a, b)
+        print(f"{name:>17}: {micro(samples)}")
+
+    start = time.perf_counter()
+    for a, b in pairs[:2000]:
+        graph.add(a, b)
+        graph.remove(a, b)
+    print(f"{'add+remove':>17}: {(time.perf_counter() - start) / 2000 * 1e6:.1f}us")
+
+    per_million = graph.bytes_per_million_edges()
+    sets_per_million = round(set_index_bytes(edges) / len(edges) * 1_000_000)
+    print(f"memory: {per_million / 2**20:.1f} MiB per million edges (dict of sets: {sets_per_million / 2**20:.1f} MiB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+# benchmarks/mutual_follows.py
+#
+# Mutual-follow count and first listing page for two users as their
+# following lists grow: the old approach (both id lists pulled into Python
+# and intersected) against the EXISTS semi-join in follows/relationships.py.
+#
+#     python benchmarks/mutual_follows.py --sizes 1000 10000 50000 --overlap 0.1
+
+import argparse
+import random
+
+from common import create_users, setup_django, summarize, timed
+
+
+def python_intersection(viewer_id, target_id):
+    from follows.models import Follow
+
+    mine = Follow.objects.filter(follower_id=viewer_id, accepted=True).values_list('following_id', flat=True)
+    theirs = Follow.objects.filter(follower_id=target_id, accepted=True).values_list('following_id', flat=True)
+    return len(set(mine) & set(theirs))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[500, 2000, 10000, 40000])
+    parser.add_argument('--overlap', type=float, default=0.1, help="Fraction of each list that is shared.")
+    parser.add_argument('--repeat', type=int, default=30)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth.models import User
+    from follows.models import Follow
+    from follows.relationships import mutual_follow_count, shared_following
+    from posts.pagination import paginate_by_cursor
+
+    accounts = create_users(max(args.sizes) * 2, privacy='public', prefix='acct')
+    viewer = User.objects.create(username='viewer')
+    target = User.objects.create(username='target')
+
+    for size in args.sizes:
+        Follow.objects.filter(follower__in=[viewer, target]).delete()
+        rng = random.Random(size)
+        shared = int(size * args.overlap)
+        picks = rng.sample(accounts, size * 2 - shared)
+        mine = picks[:size]
+        theirs = picks[:shared] + picks[size:]
+        rng.shuffle(mine)
+        rng.shuffle(theirs)
+        Follow.objects.bulk_create(
+            [Follow(follower=viewer, following_id=a, accepted=True) for a in mine] +
+            [Follow(follower=target, following_id=a, accepted=True) for a in theirs],
+            batch_size=5000,
+        )
+
+        results = {}
+        for name, run in [
+            ("python", lambda: python_intersection(viewer.id, target.id)),
+            ("sql count", lambda: mutual_follow_count(viewer, target)),
+            ("sql page", lambda: paginate_by_cursor(shared_following(viewer.id, target.id), page_size=20)),
+        ]:
+            samples = []
+            for _ in range(args.repeat):
+                with timed(samples):
+                    value = run()
+            results[name] = summarize(samples)
+            if name != "sql page":
+                assert value == shared, (name, value, shared)
+
+        print(
+            f"following={size:<7} mutual={shared:<6} " +
+            "  ".join(f"{name} p50={r['p50_ms']}ms p99={r['p99_ms']}ms" for name, r in results.items())
+        )
+
+
+if __name__ == '__main__':
+    main()
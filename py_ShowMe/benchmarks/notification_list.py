@@ -0,0 +1,63 @@
+# benchmarks/notification_list.py
+#
+# First-page latency of the notification list against history size: the
+# cursor-paginated endpoint (?page_size=20, with and without ?compact=true)
+# next to the unpaginated list, which serializes the whole history.
+#
+#     python benchmarks/notification_list.py --sizes 1000 10000 100000
+
+import argparse
+from datetime import timedelta
+
+from common import create_users, setup_django, summarize, timed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--full-requests', type=int, default=3, help="Samples for the unpaginated list (slow).")
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth.models import User
+    from django.utils import timezone
+    from rest_framework.test import APIClient
+    from notifications.models import Notification
+
+    for size in args.sizes:
+        user_id, sender_id = create_users(2, privacy='public', prefix=f'notiflist{size}_')
+        now = timezone.now()
+        Notification.objects.bulk_create(
+            [
+                Notification(
+                    user_id=user_id, sender_id=sender_id, type='message', content="You have a new message",
+                    created_at=now - timedelta(seconds=i), read=i % 5 != 0,
+                )
+                for i in range(size)
+            ],
+            batch_size=5000,
+        )
+
+        client = APIClient()
+        client.force_authenticate(User.objects.get(pk=user_id))
+        url = '/notifications/notifications/'
+        second_cursor = client.get(url, {'page_size': 20}).data['next']
+        runs = {
+            'first page': (args.requests, lambda: client.get(url, {'page_size': 20})),
+            'first page, compact': (args.requests, lambda: client.get(url, {'page_size': 20, 'compact': 'true'})),
+            'second page': (args.requests, lambda: client.get(url, {'page_size': 20, 'cursor': second_cursor})),
+            'first unread page': (args.requests, lambda: client.get(url, {'page_size': 20, 'unread': 'true'})),
+            'unpaginated': (args.full_requests, lambda: client.get(url)),
+        }
+        print(f"{size} notifications")
+        for name, (requests, run) in runs.items():
+            samples = []
+            for _ in range(requests):
+                with timed(samples):
+                    run()
+            print(f"  {name:>20}: {summarize(samples)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+# benchmarks/suggestions.py
+#
+# Full and incremental "people you may know" runs (follows/suggestions.py) on
+# a synthetic power-law graph. The default size is about 1M edges; the full
+# sparse run should finish inside --budget seconds.
+#
+#     python benchmarks/suggestions.py --users 25000 --avg-degree 40 --budget 120
+
+import argparse
+import random
+import time
+
+from common import create_users, power_law_follows, setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=25000)
+    parser.add_argument('--avg-degree', type=int, default=40)
+    parser.add_argument('--private-share', type=float, default=0.1)
+    parser.add_argument('--budget', type=float, default=120.0, help="Seconds allowed for the full sparse run.")
+    parser.add_argument('--python', action='store_true', help="Also time the full pure-Python run.")
+    parser.add_argument('--dirty', type=int, default=1000, help="Users to refresh incrementally.")
+    args = parser.parse_args()
+
+    setup_django()
+    from follows import suggestions
+    from follows.models import Follow
+    from userProfile.models import Profile
+
+    users = create_users(args.users, privacy='public')
+    rng = random.Random(5)
+    Profile.objects.filter(user_id__in=rng.sample(users, int(len(users) * args.private_share))).update(
+        privacy=Profile.PRIVATE
+    )
+    edges = power_law_follows(users, args.avg_degree)
+    Follow.objects.bulk_create(
+        [Follow(follower_id=a, following_id=b, accepted=True) for a, b in edges], batch_size=5000
+    )
+    print(f"{len(users)} users, {len(edges)} edges")
+
+    runs = [('sparse', True)]
+    if args.python:
+        runs.append(('python', False))
+    for name, use_sparse in runs:
+        start = time.perf_counter()
+        computed, rows = suggestions.refresh_all(use_sparse=use_sparse)
+        elapsed = time.perf_counter() - start
+        verdict = "within" if elapsed <= args.budget else "OVER"
+        print(f"full ({name}): {computed} users, {rows} suggestions in {elapsed:.1f}s ({verdict} {args.budget:.0f}s budget)")
+
+    dirty = rng.sample(users, min(args.dirty, len(users)))
+    start = time.perf_counter()
+    suggestions.refresh_users(dirty)
+    elapsed = time.perf_counter() - start
+    print(f"incremental: {len(dirty)} users in {elapsed:.2f}s ({elapsed / len(dirty) * 1000:.1f}ms per user)")
+
+
+if __name__ == '__main__':
+    main()
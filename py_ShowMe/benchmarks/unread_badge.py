@@ -0,0 +1,68 @@
+# benchmarks/unread_badge.py
+#
+# Badge latency against notification history size: the unread-count
+# endpoint (notifications/unread.py) next to what clients used to do,
+# fetching ?unread=true and counting rows, and a COUNT(*) over the
+# (user, read) index for reference.
+#
+#     python benchmarks/unread_badge.py --sizes 1000 10000 100000
+
+import argparse
+from datetime import timedelta
+
+from common import create_users, setup_django, summarize, timed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--list-requests', type=int, default=5, help="Samples for the full-list baseline (slow).")
+    parser.add_argument('--unread-share', type=float, default=0.2)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth.models import User
+    from django.utils import timezone
+    from rest_framework.test import APIClient
+    from notifications import unread
+    from notifications.models import Notification
+
+    for size in args.sizes:
+        user_id, sender_id = create_users(2, privacy='public', prefix=f'badge{size}_')
+        now = timezone.now()
+        unread_every = max(1, round(1 / args.unread_share))
+        Notification.objects.bulk_create(
+            [
+                Notification(
+                    user_id=user_id, sender_id=sender_id, type='message', content="You have a new message",
+                    created_at=now - timedelta(seconds=i), read=i % unread_every != 0,
+                )
+                for i in range(size)
+            ],
+            batch_size=5000,
+        )
+        unread.recount([user_id])
+
+        client = APIClient()
+        client.force_authenticate(User.objects.get(pk=user_id))
+        runs = {
+            'unread-count endpoint': (args.requests, lambda: client.get('/notifications/notifications/unread-count/')),
+            'COUNT(*) unread': (
+                args.requests, lambda: Notification.objects.filter(user_id=user_id, read=False).count()
+            ),
+            'list ?unread=true': (
+                args.list_requests, lambda: len(client.get('/notifications/notifications/?unread=true').data)
+            ),
+        }
+        print(f"{size} notifications, {unread.counts_for(user_id)['notifications']} unread")
+        for name, (requests, run) in runs.items():
+            samples = []
+            for _ in range(requests):
+                with timed(samples):
+                    run()
+            print(f"  {name:>22}: {summarize(samples)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -107,7 +107,8 @@ class ChatConsumer(AsyncWebsocketConsumer):
         print("➡️ save_message method in ChatConsumer called!")  # Add this
 
         from .models import Message, ChatRoom
-        from notifications.models import Notification, NotificationType  # Import here
+        from notifications import emitter
+        from notifications.models import NotificationType  # Import here
 
         room_name = self.get_room_name(sender.username, receiver.username)
 
@@ -129,9 +130,9 @@ class ChatConsumer(AsyncWebsocketConsumer):
         # 🔔 Create notification for the receiver
         print("Attempting to create notification...")  # Add this
 
-        Notification.objects.create(
-            user=receiver,
-            content=f"You have a new message from {sender.username}",
+        emitter.emit(
+            receiver,
+            f"You have a new message from {sender.username}",
             sender=sender,
             type=NotificationType.MESSAGE,
         )
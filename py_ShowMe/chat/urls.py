@@ -1,7 +1,8 @@
 from django.urls import path
-from .views import SendMessageView, ConversationView
+from .views import SendMessageView, ConversationView, MarkConversationReadView
 
 urlpatterns = [
     path('send/', SendMessageView.as_view(), name='send-message'),  # Endpoint to send a message
     path('conversation/<str:username>/', ConversationView.as_view(), name='conversation'),  # Endpoint to get conversation messages
+    path('conversation/<str:username>/read/', MarkConversationReadView.as_view(), name='conversation-read'),  # Read receipt
 ]
@@ -7,7 +7,9 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
 from django.contrib.auth.models import User
 from .models import Message
-from notifications.models import Notification,NotificationType # Assuming you have a Notification model
+from django.db import transaction
+from notifications import emitter, unread
+from notifications.models import NotificationType
 from .serializers import MessageSerializer
 
 class SendMessageView(APIView):
@@ -29,16 +31,15 @@ class SendMessageView(APIView):
 
         # Save the message
         message = Message.objects.create(sender=request.user, receiver=receiver, content=content)
-        # Inside SendMessageView (after Notification.objects.create)
         print(f"Creating message notification: from {request.user.username} to {receiver.username}")
         print(f"Message created: {message.content}")
 
 
         # Create a notification for the recipient
         try:
-            Notification.objects.create(
-                user=receiver,
-                content=f"You have a new message from {request.user.username}",
+            emitter.emit(
+                receiver,
+                f"You have a new message from {request.user.username}",
                 sender=request.user,
                 type=NotificationType.MESSAGE,
             )
@@ -72,3 +73,19 @@ class ConversationView(APIView):
         # Serialize the messages
         serializer = MessageSerializer(messages, many=True)
         return Response(serializer.data)
+
+
+class MarkConversationReadView(APIView):
+    """Read receipt: marks every message from <username> to the requesting user as read."""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, username):
+        try:
+            other_user = User.objects.get(username=username)
+        except User.DoesNotExist:
+            return Response({"error": "User not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        with transaction.atomic():
+            marked = Message.objects.filter(sender=other_user, receiver=request.user, is_read=False).update(is_read=True)
+            unread.removed('messages', request.user.id, marked)
+        return Response({"read": marked})
@@ -0,0 +1,243 @@
+# follows/bulk.py
+#
+# Follow, unfollow and accept for many users in one request (onboarding's
+# "follow these 30 accounts"). Targets are resolved in one query, Follow rows
+# are written with bulk_create or a single UPDATE/DELETE, notifications go
+# out in one emitter.emit_many() call, and what the per-row Follow signals
+# would have done (counters, timelines, profile cache, graph index,
+# suggestions) is applied once per batch by follows_changed(). Deletes go
+# through the ORM, so the Follow receivers check in_batch() and leave those
+# rows to follows_changed().
+#
+# Every operation returns one result per requested target, in request order:
+# {"target": <id or username as sent>, "user_id", "username", "status"}.
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+
+from notifications import emitter
+from notifications.models import NotificationType
+from posts import timeline
+from profileview import cache as profile_cache
+from userProfile import counters
+from userProfile.models import Profile
+from . import suggestions
+from .graph import loaded_graph
+from .models import Follow
+
+User = get_user_model()
+
+FOLLOWED = 'followed'
+REQUESTED = 'requested'
+ALREADY_FOLLOWING = 'already_following'
+ALREADY_REQUESTED = 'already_requested'
+UNFOLLOWED = 'unfollowed'
+CANCELLED = 'cancelled'
+NOT_FOLLOWING = 'not_following'
+ACCEPTED = 'accepted'
+NO_REQUEST = 'no_request'
+SELF = 'self'
+NOT_FOUND = 'not_found'
+
+_in_batch = ContextVar('follows_bulk_in_batch', default=False)
+
+
+def in_batch():
+    """True while a write here applies the Follow side effects itself."""
+    return _in_batch.get()
+
+
+@contextmanager
+def _batch():
+    token = _in_batch.set(True)
+    try:
+        yield
+    finally:
+        _in_batch.reset(token)
+
+
+def resolve_targets(user_ids=(), usernames=()):
+    """
+    [(target, user or None), ...] for the requested ids and usernames, in
+    request order, duplicates dropped. One query, profiles included.
+    """
+    requested = list(dict.fromkeys([*user_ids, *usernames]))
+    if not requested:
+        return []
+    users = User.objects.filter(Q(id__in=list(user_ids)) | Q(username__in=list(usernames))).select_related('profile')
+    by_id, by_name = {}, {}
+    for user in users:
+        by_id[user.id] = by_name[user.username] = user
+    return [(target, (by_id if isinstance(target, int) else by_name).get(target)) for target in requested]
+
+
+def _result(target, user, status):
+    return {
+        "target": target,
+        "user_id": user.id if user else None,
+        "username": user.username if user else None,
+        "status": status,
+    }
+
+
+def follows_changed(pending=(), accepted=(), removed=()):
+    """
+    Side effects of Follow writes made without signals. Each argument is a
+    list of (follower_id, following_id): pending rows created or deleted,
+    rows that are now accepted (new or flipped), and accepted rows deleted.
+    """
+    accepted, removed = list(accepted), list(removed)
+    touched = {user_id for pair in [*pending, *accepted, *removed] for user_id in pair}
+    if not touched:
+        return
+
+    # Counters first: classify_authors() reads followers_count.
+    if accepted:
+        counters.follows_changed(accepted, 1)
+        timeline.follows_accepted(accepted)
+    if removed:
+        counters.follows_changed(removed, -1)
+        timeline.follows_removed(removed)
+
+    changed = {user_id for pair in [*accepted, *removed] for user_id in pair}
+    if changed:
+        profile_cache.profile_changed(*changed)
+        suggestions.neighbourhoods_changed({follower_id for follower_id, _ in [*accepted, *removed]})
+    profile_cache.graph_changed(*touched)
+
+    graph = loaded_graph()
+    if graph is not None:
+        def apply():
+            for follower_id, following_id in accepted:
+                graph.add(follower_id, following_id)
+            for follower_id, following_id in removed:
+                graph.remove(follower_id, following_id)
+        transaction.on_commit(apply)
+
+
+def follow_many(follower, targets):
+    """Follow public targets and request private ones."""
+    existing = dict(
+        Follow.objects.filter(follower=follower, following_id__in=[user.id for _, user in targets if user])
+        .values_list('following_id', 'accepted')
+    )
+    follows = {}
+    for _, user in targets:
+        if user is not None and user.id != follower.id and user.id not in existing and user.id not in follows:
+            profile = getattr(user, 'profile', None)
+            public = profile is None or profile.privacy == Profile.PUBLIC
+            follows[user.id] = Follow(follower=follower, following=user, accepted=public)
+
+    with transaction.atomic():
+        Follow.objects.bulk_create(follows.values(), ignore_conflicts=True)
+        if follows:
+            # ignore_conflicts doesn't say which rows went in. A follow made
+            # concurrently for the same pair carries its own created_at, so
+            # only rows stamped with ours are counted and notified here.
+            stored = Follow.objects.filter(follower=follower, following_id__in=list(follows)).values_list(
+                'following_id', 'accepted', 'created_at'
+            )
+            for user_id, accepted, created_at in stored:
+                if created_at != follows[user_id].created_at:
+                    existing[user_id] = accepted
+                    del follows[user_id]
+        emitter.emit_many(
+            emitter.event(
+                f.following,
+                f"{follower.username} started following you." if f.accepted
+                else f"{follower.username} sent you a follow request.",
+                sender=follower,
+                type=NotificationType.FOLLOW if f.accepted else NotificationType.FOLLOW_REQUEST,
+            )
+            for f in follows.values()
+        )
+        follows_changed(
+            pending=[(follower.id, user_id) for user_id, f in follows.items() if not f.accepted],
+            accepted=[(follower.id, user_id) for user_id, f in follows.items() if f.accepted],
+        )
+
+    results = []
+    for target, user in targets:
+        if user is None:
+            results.append(_result(target, None, NOT_FOUND))
+        elif user.id == follower.id:
+            results.append(_result(target, user, SELF))
+        elif user.id in follows:
+            results.append(_result(target, user, FOLLOWED if follows[user.id].accepted else REQUESTED))
+        else:
+            results.append(_result(target, user, ALREADY_FOLLOWING if existing[user.id] else ALREADY_REQUESTED))
+    return results
+
+
+def unfollow_many(follower, targets):
+    """Unfollow accepted targets and cancel pending requests to the rest."""
+    user_ids = [user.id for _, user in targets if user]
+    with transaction.atomic(), _batch():
+        rows = Follow.objects.select_for_update().filter(follower=follower, following_id__in=user_ids)
+        existing = dict(rows.values_list('following_id', 'accepted'))
+        rows.delete()
+        emitter.emit_many(
+            emitter.event(user_id, f"{follower.username} unfollowed you.")
+            for user_id in dict.fromkeys(user_ids) if existing.get(user_id)
+        )
+        follows_changed(
+            pending=[(follower.id, user_id) for user_id, accepted in existing.items() if not accepted],
+            removed=[(follower.id, user_id) for user_id, accepted in existing.items() if accepted],
+        )
+
+    results = []
+    for target, user in targets:
+        if user is None:
+            results.append(_result(target, None, NOT_FOUND))
+        elif user.id not in existing:
+            results.append(_result(target, user, NOT_FOLLOWING))
+        else:
+            results.append(_result(target, user, UNFOLLOWED if existing[user.id] else CANCELLED))
+    return results
+
+
+def accept_many(user, targets):
+    """Accept pending requests from the given followers."""
+    with transaction.atomic():
+        pending = set(
+            Follow.objects.select_for_update()
+            .filter(following=user, follower_id__in=[follower.id for _, follower in targets if follower], accepted=False)
+            .values_list('follower_id', flat=True)
+        )
+        _accept(user, pending)
+
+    results = []
+    for target, follower in targets:
+        if follower is None:
+            results.append(_result(target, None, NOT_FOUND))
+        else:
+            results.append(_result(target, follower, ACCEPTED if follower.id in pending else NO_REQUEST))
+    return results
+
+
+def accept_all(user):
+    """Accept every pending request to user. Returns how many were accepted."""
+    with transaction.atomic():
+        follower_ids = list(
+            Follow.objects.select_for_update()
+            .filter(following=user, accepted=False)
+            .values_list('follower_id', flat=True)
+        )
+        _accept(user, follower_ids)
+    return len(follower_ids)
+
+
+def _accept(user, follower_ids):
+    """Flip pending follows of user from follower_ids in one UPDATE."""
+    follower_ids = list(follower_ids)
+    if not follower_ids:
+        return
+    Follow.objects.filter(following=user, follower_id__in=follower_ids, accepted=False).update(accepted=True)
+    emitter.emit_many(
+        emitter.event(follower_id, f"{user.username} accepted your follow request.") for follower_id in follower_ids
+    )
+    follows_changed(accepted=[(follower_id, user.id) for follower_id in follower_ids])
@@ -0,0 +1,201 @@
+# follows/graph.py
+#
+# Optional in-memory index of accepted follows (FOLLOW_GRAPH_INDEX=True).
+#
+# Each user's following and followers are kept as sorted array('q') of user
+# ids: 8 bytes per id plus a small per-array header, instead of a Python set
+# of ints or model instances. Membership is a bisect; intersections walk the
+# shorter array and bisect into the longer one.
+#
+# Arrays are never mutated in place. An update builds a new array and swaps
+# the dict entry, so readers never need a lock and never see a half-applied
+# change. The index lives in one process: it follows that process's Follow
+# signals (follows/signals.py) and reloads itself after
+# FOLLOW_GRAPH_MAX_AGE seconds to pick up writes made by other workers.
+#
+# Only the first load blocks. A stale index is reloaded on a background
+# thread while requests keep reading the old one; add()/remove() calls made
+# during the load are recorded and replayed onto the new index before it
+# replaces the old.
+
+import logging
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from django.db import connection
+
+from .models import Follow
+
+logger = logging.getLogger(__name__)
+
+EMPTY = array('q')
+
+
+def _contains(ids, value):
+    i = bisect_left(ids, value)
+    return i < len(ids) and ids[i] == value
+
+
+def _intersect(a, b):
+    if len(a) > len(b):
+        a, b = b, a
+    return array('q', (value for value in a if _contains(b, value)))
+
+
+def _with(ids, value):
+    i = bisect_left(ids, value)
+    if i < len(ids) and ids[i] == value:
+        return ids
+    return ids[:i] + array('q', (value,)) + ids[i:]
+
+
+def _without(ids, value):
+    i = bisect_left(ids, value)
+    if i < len(ids) and ids[i] == value:
+        return ids[:i] + ids[i + 1:]
+    return ids
+
+
+def _apply(following, followers, added, follower_id, following_id):
+    """Add or remove one edge in place; returns the change in edge count."""
+    update = _with if added else _without
+    before = following.get(follower_id, EMPTY)
+    following[follower_id] = update(before, following_id)
+    followers[following_id] = update(followers.get(following_id, EMPTY), follower_id)
+    if following[follower_id] is before:
+        return 0
+    return 1 if added else -1
+
+
+class FollowGraph:
+    def __init__(self):
+        self._following = {}
+        self._followers = {}
+        self._write_lock = threading.Lock()
+        # (added, follower_id, following_id) applied while load() runs
+        self._changes = None
+        self.loaded_at = None
+        self.edges = 0
+
+    def load(self, chunk_size=20000):
+        """Rebuild from the Follow table in one streaming pass."""
+        with self._write_lock:
+            self._changes = []
+        try:
+            following, followers = {}, {}
+            edges = 0
+            for follower_id, following_id in self._rows(chunk_size):
+                # Rows arrive sorted by follower, so following arrays come out sorted
+                following.setdefault(follower_id, array('q')).append(following_id)
+                followers.setdefault(following_id, array('q')).append(follower_id)
+                edges += 1
+            for user_id, ids in followers.items():
+                followers[user_id] = array('q', sorted(ids))
+
+            with self._write_lock:
+                # Replays are idempotent, so changes the query already saw are harmless
+                for change in self._changes:
+                    edges += _apply(following, followers, *change)
+                self._following, self._followers = following, followers
+                self.edges = edges
+                self.loaded_at = time.monotonic()
+        finally:
+            self._changes = None
+
+    def _rows(self, chunk_size):
+        return (
+            Follow.objects.filter(accepted=True)
+            .order_by('follower_id', 'following_id')
+            .values_list('follower_id', 'following_id')
+            .iterator(chunk_size=chunk_size)
+        )
+
+    # Incremental updates
+
+    def add(self, follower_id, following_id):
+        self._update(True, follower_id, following_id)
+
+    def remove(self, follower_id, following_id):
+        self._update(False, follower_id, following_id)
+
+    def _update(self, added, follower_id, following_id):
+        with self._write_lock:
+            if self._changes is not None:
+                self._changes.append((added, follower_id, following_id))
+            self.edges += _apply(self._following, self._followers, added, follower_id, following_id)
+
+    # Queries
+
+    def following(self, user_id):
+        return self._following.get(user_id, EMPTY)
+
+    def followers(self, user_id):
+        return self._followers.get(user_id, EMPTY)
+
+    def is_following(self, follower_id, following_id):
+        return _contains(self.following(follower_id), following_id)
+
+    def following_count(self, user_id):
+        return len(self.following(user_id))
+
+    def followers_count(self, user_id):
+        return len(self.followers(user_id))
+
+    def shared_following(self, a, b):
+        """Accounts both a and b follow, sorted."""
+        return _intersect(self.following(a), self.following(b))
+
+    def friends(self, user_id):
+        """Accounts user_id follows that follow back, sorted."""
+        return _intersect(self.following(user_id), self.followers(user_id))
+
+    def memory_bytes(self):
+        """Approximate footprint: arrays plus the two dicts holding them."""
+        total = sys.getsizeof(self._following) + sys.getsizeof(self._followers)
+        for index in (self._following, self._followers):
+            total += sum(sys.getsizeof(ids) for ids in index.values())
+        return total
+
+    def bytes_per_million_edges(self):
+        return round(self.memory_bytes() / self.edges * 1_000_000) if self.edges else 0
+
+
+_graph = FollowGraph()
+_load_lock = threading.Lock()
+
+
+def get_graph():
+    """The loaded process-wide index, or None when FOLLOW_GRAPH_INDEX is off."""
+    if not settings.FOLLOW_GRAPH_INDEX:
+        return None
+    loaded_at = _graph.loaded_at
+    if loaded_at is None:
+        with _load_lock:
+            if _graph.loaded_at is None:
+                _graph.load()
+    elif time.monotonic() - loaded_at > settings.FOLLOW_GRAPH_MAX_AGE and _load_lock.acquire(blocking=False):
+        # Released by _reload(); until then other callers skip straight to the old index
+        if _graph.loaded_at == loaded_at:
+            threading.Thread(target=_reload, name='follow-graph-reload', daemon=True).start()
+        else:
+            _load_lock.release()
+    return _graph
+
+
+def _reload():
+    try:
+        _graph.load()
+    except Exception:
+        logger.exception("Reloading the follow graph failed; serving the previous index")
+    finally:
+        connection.close()
+        _load_lock.release()
+
+
+def loaded_graph():
+    """The index only if it is already loaded; signal handlers use this to avoid loading it."""
+    return _graph if settings.FOLLOW_GRAPH_INDEX and _graph.loaded_at is not None else None
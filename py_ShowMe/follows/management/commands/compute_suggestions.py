@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+from follows import suggestions
+
+
+class Command(BaseCommand):
+    help = "Recompute \"people you may know\" suggestions: users queued since the last run, or everyone with --all."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="Full recompute over the whole follow graph.")
+        parser.add_argument('--python', action='store_true', help="Score in Python instead of with scipy.sparse.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, all=False, python=False, batch_size=1000, **options):
+        start = time.perf_counter()
+        if all:
+            users, rows = suggestions.refresh_all(use_sparse=not python)
+            summary = f"Recomputed {users} users ({rows} suggestions)"
+        else:
+            users = suggestions.refresh_dirty(batch_size=batch_size)
+            summary = f"Refreshed {users} queued users"
+        self.stdout.write(self.style.SUCCESS(f"{summary} in {time.perf_counter() - start:.1f}s."))
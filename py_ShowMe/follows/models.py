@@ -12,6 +12,29 @@ class Follow(models.Model):
 
     class Meta:
         unique_together = ('follower', 'following')
+        indexes = [
+            # A user's follows (or followers) newest first, for lists and the outer
+            # side of the mutual-follow semi-join. Pending rows are few, so
+            # accepted is filtered on the row rather than indexed.
+            models.Index(fields=['follower', '-created_at', '-id'], name='follow_follower_recent_idx'),
+            models.Index(fields=['following', '-created_at', '-id'], name='follow_following_recent_idx'),
+        ]
 
     def __str__(self):
         return f"{self.follower.username} → {self.following.username} ({'Accepted' if self.accepted else 'Pending'})"
+
+
+class Suggestion(models.Model):
+    """A user's precomputed "people you may know" list (follows/suggestions.py)."""
+    user = models.OneToOneField(User, primary_key=True, related_name='suggestions', on_delete=models.CASCADE)
+    # [[candidate_id, score], ...] best first; score is how many accounts the
+    # user follows that follow the candidate. One row per user keeps a full
+    # run to one insert per user instead of one per candidate.
+    candidates = models.JSONField(default=list)
+    computed_at = models.DateTimeField(auto_now=True)
+
+
+class SuggestionRefresh(models.Model):
+    """Users whose follows changed since suggestions were computed; their followers are refreshed with them."""
+    user = models.OneToOneField(User, primary_key=True, related_name='+', on_delete=models.CASCADE)
+    marked_at = models.DateTimeField(auto_now_add=True)
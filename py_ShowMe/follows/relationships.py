@@ -0,0 +1,112 @@
+# follows/relationships.py
+#
+# Follow relationship between two users in both directions, read with a
+# single query: there are at most two Follow rows between a pair (one per
+# direction, enforced by unique_together), so one OR-filter fetches both.
+#
+# Mutual follows ("accounts you both follow") are an EXISTS semi-join on
+# Follow done in the database: the target's accepted follows are walked
+# newest first on the (follower, created_at, id) index and each is
+# probed against the viewer's rows on the (follower, following) unique index.
+# A listing page stops after page_size hits; no id lists reach Python.
+
+from dataclasses import dataclass
+
+from django.db.models import Exists, OuterRef, Q
+
+from .graph import get_graph
+from .models import Follow
+
+
+@dataclass(frozen=True)
+class Relationship:
+    is_self: bool = False
+    following: bool = False          # viewer -> target, accepted
+    followed_by: bool = False        # target -> viewer, accepted
+    requested: bool = False          # viewer -> target, pending
+    request_received: bool = False   # target -> viewer, pending
+
+    @property
+    def mutual(self):
+        return self.following and self.followed_by
+
+    @property
+    def follow_status(self):
+        """The status string the profile endpoint has always returned."""
+        if self.is_self:
+            return "self"
+        if self.mutual:
+            return "mutual"
+        if self.requested:
+            return "requested"
+        if self.request_received:
+            return "request_received"
+        return "not_following"
+
+
+def relationship_between(viewer, target):
+    """Relationship of viewer to target (users or user ids)."""
+    viewer_id = getattr(viewer, 'pk', viewer)
+    target_id = getattr(target, 'pk', target)
+    if viewer_id == target_id:
+        return Relationship(is_self=True)
+
+    state = {}
+    rows = Follow.objects.filter(
+        Q(follower_id=viewer_id, following_id=target_id) |
+        Q(follower_id=target_id, following_id=viewer_id)
+    ).values_list('follower_id', 'accepted')
+    for follower_id, accepted in rows:
+        if follower_id == viewer_id:
+            state['following' if accepted else 'requested'] = True
+        else:
+            state['followed_by' if accepted else 'request_received'] = True
+    return Relationship(**state)
+
+
+def _accepted_follows(user_id):
+    return Follow.objects.filter(follower_id=user_id, accepted=True)
+
+
+def shared_following(viewer_id, target_id):
+    """target's accepted Follow rows whose followed account viewer also follows."""
+    also_followed = _accepted_follows(viewer_id).filter(following_id=OuterRef('following_id'))
+    return _accepted_follows(target_id).filter(Exists(also_followed))
+
+
+def mutual_follow_count(viewer, target):
+    """Number of accounts both users follow: from the graph index if enabled, else one query."""
+    viewer_id, target_id = getattr(viewer, 'pk', viewer), getattr(target, 'pk', target)
+    graph = get_graph()
+    if graph is not None:
+        return len(graph.shared_following(viewer_id, target_id))
+    return shared_following(viewer_id, target_id).count()
+
+
+# Follow lists. Each is a Follow queryset with the user on the far side (and
+# their profile, for the avatar) joined in, so a page of any size is one
+# query. Ordered newest first on the (follower|following, created_at, id)
+# indexes by paginate_by_cursor().
+
+def followers_of(user_id):
+    return Follow.objects.filter(following_id=user_id, accepted=True).select_related('follower__profile')
+
+
+def following_of(user_id):
+    return Follow.objects.filter(follower_id=user_id, accepted=True).select_related('following__profile')
+
+
+def friends_of(user_id):
+    """Accounts the user follows that follow them back (the "mutual follows" list)."""
+    follows_back = Follow.objects.filter(
+        follower_id=OuterRef('following_id'), following_id=user_id, accepted=True
+    )
+    return following_of(user_id).filter(Exists(follows_back))
+
+
+def requests_received(user_id):
+    return Follow.objects.filter(following_id=user_id, accepted=False).select_related('follower__profile')
+
+
+def requests_sent(user_id):
+    return Follow.objects.filter(follower_id=user_id, accepted=False).select_related('following__profile')
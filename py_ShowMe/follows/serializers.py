@@ -2,6 +2,7 @@
 from rest_framework import serializers
 from .models import Follow
 from django.contrib.auth import get_user_model
+from mediafiles.resolver import media_url
 
 User = get_user_model()
 
@@ -13,14 +14,8 @@ class SimpleUserSerializer(serializers.ModelSerializer):
         fields = ['id', 'username', 'profile_pic']
 
     def get_profile_pic(self, obj):
-        if hasattr(obj, 'profile') and obj.profile and obj.profile.profile_pic:
-            url = obj.profile.profile_pic.url
-            # Fix malformed URL if needed
-            if url.startswith("https//"):
-                url = url.replace("https//", "https://")
-            elif url.startswith("http//"):
-                url = url.replace("http//", "http://")
-            return url
+        if hasattr(obj, 'profile') and obj.profile:
+            return media_url(obj.profile.profile_pic)
         return None
 
 
@@ -0,0 +1,53 @@
+# follows/signals.py
+#
+# Keeps the in-memory follow graph (follows/graph.py) current once a write
+# has committed, queues suggestion refreshes (follows/suggestions.py), and
+# accepts pending requests when a profile goes public.
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from userProfile.models import Profile
+from userProfile.signals import privacy_changed
+from . import bulk, suggestions
+from .graph import loaded_graph
+from .models import Follow
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, **kwargs):
+    graph = loaded_graph()
+    if graph is None:
+        return
+    update = graph.add if instance.accepted else graph.remove
+    follower_id, following_id = instance.follower_id, instance.following_id
+    transaction.on_commit(lambda: update(follower_id, following_id))
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    graph = loaded_graph()
+    if graph is None or bulk.in_batch():
+        return
+    follower_id, following_id = instance.follower_id, instance.following_id
+    transaction.on_commit(lambda: graph.remove(follower_id, following_id))
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved_suggestions(sender, instance, **kwargs):
+    # Pending requests don't change anyone's friends-of-friends; they are filtered when reading.
+    if instance.accepted:
+        suggestions.neighbourhood_changed(instance.follower_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted_suggestions(sender, instance, **kwargs):
+    if instance.accepted and not bulk.in_batch():
+        suggestions.neighbourhood_changed(instance.follower_id)
+
+
+@receiver(privacy_changed)
+def profile_went_public(sender, instance, previous, **kwargs):
+    if previous == Profile.PRIVATE and instance.privacy == Profile.PUBLIC:
+        bulk.accept_all(instance.user)
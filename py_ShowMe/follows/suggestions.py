@@ -0,0 +1,238 @@
+# follows/suggestions.py
+#
+# "People you may know": candidates ranked by how many of the accounts a user
+# follows also follow them, i.e. the (user, candidate) entry of A @ A where A
+# is the accepted-follow adjacency matrix. The top SUGGESTIONS_TOP_K per user
+# are computed offline (manage.py compute_suggestions) and stored as one
+# Suggestion row per user.
+#
+# A full run uses scipy.sparse (row blocks of A @ A), imported only there so
+# web workers never load it. Counting in Python is kept for the incremental
+# runs and as the reference the sparse path is tested against.
+#
+# A follow write queues only the follower in SuggestionRefresh. The default
+# run recomputes each queued user and the accounts that follow them, whose
+# friends-of-friends went through the queued user. Private accounts and
+# accounts the user already follows or has requested are skipped when
+# computing and again when reading, since both can change between runs.
+
+import heapq
+from array import array
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from userProfile.models import Profile
+from .models import Follow, Suggestion, SuggestionRefresh
+
+IN_CHUNK = 500
+
+
+def _chunks(ids, size=IN_CHUNK):
+    ids = list(ids)
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def _private_ids():
+    return set(Profile.objects.filter(privacy=Profile.PRIVATE).values_list('user_id', flat=True))
+
+
+def _load_edges():
+    """Every Follow row as (followers, followings, accepted) arrays, in one streaming pass."""
+    followers, followings, accepted = array('q'), array('q'), array('b')
+    rows = Follow.objects.order_by().values_list('follower_id', 'following_id', 'accepted').iterator(chunk_size=20000)
+    for follower_id, following_id, is_accepted in rows:
+        followers.append(follower_id)
+        followings.append(following_id)
+        accepted.append(is_accepted)
+    return followers, followings, accepted
+
+
+def _load_neighbourhood(user_ids):
+    """(following, excluded) for user_ids: their follows, and the accepted follows of everyone they follow."""
+    following, excluded = {}, {}
+    for chunk in _chunks(user_ids):
+        for follower_id, following_id, accepted in Follow.objects.filter(follower_id__in=chunk).values_list(
+            'follower_id', 'following_id', 'accepted'
+        ):
+            excluded.setdefault(follower_id, set()).add(following_id)
+            if accepted:
+                following.setdefault(follower_id, []).append(following_id)
+
+    second_hop = {followed for ids in following.values() for followed in ids} - set(following)
+    for chunk in _chunks(second_hop):
+        for follower_id, following_id in Follow.objects.filter(follower_id__in=chunk, accepted=True).values_list(
+            'follower_id', 'following_id'
+        ):
+            following.setdefault(follower_id, []).append(following_id)
+    return following, excluded
+
+
+def _top(counts, skip, private_ids, k):
+    ranked = ((-score, candidate) for candidate, score in counts.items()
+              if candidate not in skip and candidate not in private_ids)
+    return [(candidate, -neg_score) for neg_score, candidate in heapq.nsmallest(k, ranked)]
+
+
+def score_python(user_ids, following, excluded, private_ids, k):
+    """{user_id: [(candidate_id, score), ...]} by counting friends-of-friends in Python."""
+    results = {}
+    for user_id in user_ids:
+        counts = Counter()
+        for followed in following.get(user_id, ()):
+            counts.update(following.get(followed, ()))
+        skip = excluded.get(user_id, set()) | {user_id}
+        results[user_id] = _top(counts, skip, private_ids, k)
+    return results
+
+
+def score_sparse(edges, private_ids, k, block_size=None):
+    """Same result as score_python for every user, via row blocks of the sparse product A @ A."""
+    import numpy as np
+    from scipy import sparse
+
+    block_size = block_size or settings.SUGGESTIONS_BLOCK_SIZE
+    followers, followings, accepted = (np.frombuffer(a, dtype=t) for a, t in zip(edges, ('i8', 'i8', 'i1')))
+
+    user_ids, index = np.unique(np.concatenate([followers, followings]), return_inverse=True)
+    n = len(user_ids)
+    rows, cols = index[:len(followers)], index[len(followers):]
+    keep = accepted.astype(bool)
+    A = sparse.csr_matrix(
+        (np.ones(int(keep.sum()), dtype=np.int32), (rows[keep], cols[keep])), shape=(n, n)
+    )
+    # Everything the user already follows or has requested, accepted or not
+    E = sparse.csr_matrix((np.ones(len(rows), dtype=np.int8), (rows, cols)), shape=(n, n))
+    E.sum_duplicates()
+    private = np.isin(user_ids, np.fromiter(private_ids, dtype=np.int64, count=len(private_ids)))
+
+    results = {}
+    for start in range(0, n, block_size):
+        block = A[start:start + block_size] @ A
+        block.sum_duplicates()
+        for offset in range(block.shape[0]):
+            row = start + offset
+            lo, hi = block.indptr[offset], block.indptr[offset + 1]
+            candidates, scores = block.indices[lo:hi], block.data[lo:hi]
+            mask = ~private[candidates] & (candidates != row)
+            mask &= ~np.isin(candidates, E.indices[E.indptr[row]:E.indptr[row + 1]])
+            ids, scores = user_ids[candidates[mask]], scores[mask]
+            # Highest score first, ties by user id, like score_python
+            order = np.lexsort((ids, -scores))[:k]
+            results[int(user_ids[row])] = list(zip(ids[order].tolist(), scores[order].tolist()))
+    return results
+
+
+def _store(results, replace_all=False):
+    rows = [
+        Suggestion(user_id=user_id, candidates=[list(pair) for pair in ranked])
+        for user_id, ranked in results.items()
+    ]
+    with transaction.atomic():
+        if replace_all:
+            Suggestion.objects.all().delete()
+        else:
+            for chunk in _chunks(results):
+                Suggestion.objects.filter(user_id__in=chunk).delete()
+        Suggestion.objects.bulk_create(rows, batch_size=2000)
+    return sum(len(ranked) for ranked in results.values())
+
+
+def refresh_all(use_sparse=True):
+    """Recompute suggestions for every user. Returns (users, suggestions stored)."""
+    started = timezone.now()
+    k = settings.SUGGESTIONS_TOP_K
+    private_ids = _private_ids()
+    edges = _load_edges()
+    if use_sparse:
+        results = score_sparse(edges, private_ids, k)
+    else:
+        following, excluded = {}, {}
+        for follower_id, following_id, accepted in zip(*edges):
+            excluded.setdefault(follower_id, set()).add(following_id)
+            if accepted:
+                following.setdefault(follower_id, []).append(following_id)
+        results = score_python(list(excluded), following, excluded, private_ids, k)
+
+    stored = _store(results, replace_all=True)
+    SuggestionRefresh.objects.filter(marked_at__lte=started).delete()
+    return len(results), stored
+
+
+def refresh_users(user_ids):
+    """Recompute suggestions for the given users only. Returns suggestions stored."""
+    user_ids = list(user_ids)
+    following, excluded = _load_neighbourhood(user_ids)
+    results = score_python(user_ids, following, excluded, _private_ids(), settings.SUGGESTIONS_TOP_K)
+    return _store(results)
+
+
+def _with_followers(user_ids):
+    """user_ids and their accepted followers. Celebrities' followers are left to the periodic full run."""
+    celebrities = Profile.objects.filter(user_id__in=user_ids, is_celebrity=True).values_list('user_id', flat=True)
+    followers = Follow.objects.filter(following_id__in=user_ids, accepted=True).exclude(
+        following_id__in=celebrities
+    ).values_list('follower_id', flat=True)
+    return set(user_ids) | set(followers)
+
+
+def refresh_dirty(batch_size=1000):
+    """
+    Process users marked in SuggestionRefresh, oldest first, together with
+    their followers. Returns users refreshed.
+    """
+    done = 0
+    while True:
+        started = timezone.now()
+        batch = list(SuggestionRefresh.objects.order_by('marked_at').values_list('user_id', flat=True)[:batch_size])
+        if not batch:
+            return done
+        affected = _with_followers(batch)
+        for chunk in _chunks(affected, batch_size):
+            refresh_users(chunk)
+        # Users marked again while we were computing stay queued
+        SuggestionRefresh.objects.filter(user_id__in=batch, marked_at__lte=started).delete()
+        done += len(affected)
+
+
+def mark_dirty(user_ids):
+    SuggestionRefresh.objects.bulk_create(
+        [SuggestionRefresh(user_id=user_id) for user_id in user_ids], ignore_conflicts=True
+    )
+
+
+def neighbourhood_changed(user_id):
+    """
+    user_id's follows changed: their suggestions and their followers' are
+    stale. Only user_id is queued; refresh_dirty() expands to the followers.
+    """
+    neighbourhoods_changed([user_id])
+
+
+def neighbourhoods_changed(user_ids):
+    mark_dirty(set(user_ids))
+
+
+def suggestions_for(user_id, limit=None):
+    """
+    [(user, score), ...] best first, dropping candidates that have since gone
+    private or been followed or requested. Three queries at most.
+    """
+    stored = Suggestion.objects.filter(user_id=user_id).values_list('candidates', flat=True).first()
+    if not stored:
+        return []
+    scores = dict(stored)
+    followed = set(
+        Follow.objects.filter(follower_id=user_id, following_id__in=list(scores)).values_list('following_id', flat=True)
+    )
+    users = (
+        User.objects.filter(id__in=[candidate for candidate in scores if candidate not in followed])
+        .exclude(profile__privacy=Profile.PRIVATE)
+        .select_related('profile')
+    )
+    ranked = sorted(((user, scores[user.id]) for user in users), key=lambda pair: (-pair[1], pair[0].id))
+    return ranked[:limit]
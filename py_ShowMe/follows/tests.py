@@ -1,3 +1,274 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from ShowMe.testing import ShowMeTestCase
+from notifications.models import Notification
+from userProfile import counters
+from userProfile.models import Profile
+from . import suggestions
+from . import graph as graph_module
+from .graph import FollowGraph, get_graph
+from .models import Follow, SuggestionRefresh
+from .relationships import mutual_follow_count
+
+
+class FollowListTests(ShowMeTestCase):
+    def make_graph(self):
+        self.users = self.make_users(*(f'user{i}' for i in range(12)))
+        self.me = self.users[0]
+        for other in self.users[1:9]:
+            Follow.objects.create(follower=other, following=self.me, accepted=True)
+        for other in self.users[5:12]:
+            Follow.objects.create(follower=self.me, following=other, accepted=other.id < self.users[11].id)
+        self.client = self.client_for(self.me)
+
+    def walk(self, url, page_size):
+        names, response = [], self.client.get(f'{url}?page_size={page_size}')
+        while True:
+            names += [row.get('username') or row['to_user']['username'] for row in response.data['results']]
+            if not response.data['next']:
+                return names
+            response = self.client.get(f"{url}?page_size={page_size}&cursor={response.data['next']}")
+
+    def test_page_query_count_is_constant(self):
+        self.make_graph()
+        for page_size in (2, 20):
+            with self.assertNumQueries(1):
+                self.client.get(f'/follows/my-follows/followers/?page_size={page_size}')
+            # Plus the username lookup
+            with self.assertNumQueries(2):
+                self.client.get(f'/follows/user0/following/?page_size={page_size}')
+
+    def test_lists(self):
+        self.make_graph()
+        self.assertEqual(len(self.walk('/follows/my-follows/followers/', 3)), 8)
+        self.assertEqual(len(self.walk('/follows/user0/following/', 4)), 6)
+        self.assertEqual(self.walk('/follows/my-follows/mutual/', 2), ['user8', 'user7', 'user6', 'user5'])
+        self.assertEqual(self.walk('/follows/my-follows/requests/sent/', 2), ['user11'])
+        self.assertEqual(self.client.get('/follows/user1/mutual_follows/').status_code, 404)
+
+    def test_my_follows_sections(self):
+        self.make_graph()
+        with self.assertNumQueries(3):
+            response = self.client.get('/follows/my-follows/?sections=following,requests_sent')
+        self.assertEqual(set(response.data), {'followers_count', 'following_count', 'following', 'requests_sent'})
+        self.assertEqual(len(response.data['following']), 6)
+        self.assertEqual(response.data['requests_sent'][0]['to_user']['username'], 'user11')
+        self.assertEqual(self.client.get('/follows/my-follows/?sections=nope').status_code, 400)
+
+        response = self.client.get('/follows/my-follows/')
+        self.assertEqual(len(response.data['mutual_follows']), 4)
+        self.assertEqual(response.data['followers_count'], 8)
+
+
+@override_settings(FOLLOW_GRAPH_INDEX=True)
+class FollowGraphTests(ShowMeTestCase):
+    def test_index_follows_writes(self):
+        a, b, c = self.make_users('a', 'b', 'c')
+        Follow.objects.create(follower=a, following=c, accepted=True)
+        graph = get_graph()
+        graph.load()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.create(follower=b, following=c, accepted=True)
+            pending = Follow.objects.create(follower=a, following=b, accepted=False)
+        self.assertEqual(list(graph.followers(c.id)), sorted([a.id, b.id]))
+        self.assertFalse(graph.is_following(a.id, b.id))
+        self.assertEqual(mutual_follow_count(a, b), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            pending.accepted = True
+            pending.save()
+            Follow.objects.filter(follower=b).get().delete()
+        self.assertTrue(graph.is_following(a.id, b.id))
+        self.assertEqual(graph.followers_count(c.id), 1)
+        self.assertEqual(graph.edges, 2)
+        self.assertEqual(mutual_follow_count(a, b), 0)
+
+
+    def test_changes_during_a_load_are_replayed(self):
+        a, b, c = self.make_users('a', 'b', 'c')
+        Follow.objects.create(follower=a, following=b, accepted=True)
+        Follow.objects.create(follower=a, following=c, accepted=True)
+        graph = FollowGraph()
+        rows = graph._rows
+
+        def rows_while_writing(chunk_size):
+            # The query has already read its rows when these land
+            result = list(rows(chunk_size))
+            graph.add(b.id, c.id)
+            graph.remove(a.id, b.id)
+            graph.add(c.id, a.id)
+            graph.remove(c.id, a.id)
+            return result
+
+        with mock.patch.object(graph, '_rows', side_effect=rows_while_writing):
+            graph.load()
+        self.assertEqual(list(graph.following(a.id)), [c.id])
+        self.assertEqual(list(graph.followers(c.id)), sorted([a.id, b.id]))
+        self.assertEqual(list(graph.following(c.id)), [])
+        self.assertEqual(graph.edges, 2)
+
+    def test_stale_index_reloads_in_the_background(self):
+        a, b = self.make_users('a', 'b')
+        graph = get_graph()
+        graph.load()
+        Follow.objects.bulk_create([Follow(follower=a, following=b, accepted=True)])  # no signals
+
+        with override_settings(FOLLOW_GRAPH_MAX_AGE=0), mock.patch.object(graph_module.threading, 'Thread') as thread:
+            self.assertIs(get_graph(), graph)
+            self.assertIs(get_graph(), graph)  # reload already running: no second thread
+        self.assertFalse(graph.is_following(a.id, b.id))
+        thread.assert_called_once()
+        thread.return_value.start.assert_called_once_with()
+
+        with mock.patch.object(graph_module, 'connection'):
+            thread.call_args.kwargs['target']()
+        self.assertTrue(graph.is_following(a.id, b.id))
+        self.assertFalse(graph_module._load_lock.locked())
+
+@override_settings(SUGGESTIONS_TOP_K=3)
+class SuggestionTests(ShowMeTestCase):
+    def make_graph(self):
+        self.users = {user.username: user for user in self.make_users(*'abcdefg', private={'g'})}
+        for follower, followings in {'a': 'bc', 'b': 'deg', 'c': 'deg', 'd': 'f', 'e': 'a'}.items():
+            for following in followings:
+                Follow.objects.create(follower=self.users[follower], following=self.users[following], accepted=True)
+        # A pending request is excluded like a follow
+        Follow.objects.create(follower=self.users['a'], following=self.users['e'], accepted=False)
+
+    def ranked(self, name):
+        return [(user.username, score) for user, score in suggestions.suggestions_for(self.users[name].id)]
+
+    def test_full_and_incremental_runs_agree(self):
+        self.make_graph()
+        suggestions.refresh_all(use_sparse=False)
+        expected = {name: self.ranked(name) for name in self.users}
+        self.assertEqual(expected['a'], [('d', 2)])
+        self.assertEqual(expected['b'], [('a', 1), ('f', 1)])
+
+        suggestions.refresh_all(use_sparse=True)
+        self.assertEqual({name: self.ranked(name) for name in self.users}, expected)
+
+        suggestions.refresh_users([user.id for user in self.users.values()])
+        self.assertEqual({name: self.ranked(name) for name in self.users}, expected)
+
+    def test_follow_marks_neighbourhood_dirty(self):
+        self.make_graph()
+        suggestions.refresh_all(use_sparse=False)
+        self.assertFalse(SuggestionRefresh.objects.exists())
+
+        Follow.objects.create(follower=self.users['d'], following=self.users['c'], accepted=True)
+        self.assertEqual(
+            list(SuggestionRefresh.objects.values_list('user__username', flat=True)), ['d']
+        )  # b and c follow d and are refreshed with it
+        self.assertEqual(suggestions.refresh_dirty(), 3)
+        self.assertEqual(self.ranked('b'), [('a', 1), ('c', 1), ('f', 1)])
+
+        client = self.client_for(self.users['b'])
+        with self.assertNumQueries(3):
+            response = client.get('/follows/suggestions/?limit=2')
+        self.assertEqual([row['user']['username'] for row in response.data['results']], ['a', 'c'])
+
+
+class BulkFollowTests(ShowMeTestCase):
+    def make_numbered_users(self, count, private=(), prefix='u'):
+        users = self.make_users(
+            *(f'{prefix}{i}' for i in range(count)), private={f'{prefix}{i}' for i in private}
+        )
+        self.client = self.client_for(users[0])
+        return users
+
+    def counts(self):
+        return dict(Profile.objects.values_list('user__username', 'followers_count'))
+
+    def assert_counters_match_tables(self):
+        before = list(Profile.objects.order_by('pk').values_list('followers_count', 'following_count'))
+        counters.recount()
+        self.assertEqual(list(Profile.objects.order_by('pk').values_list('followers_count', 'following_count')), before)
+
+    def test_follow_unfollow_accept(self):
+        me, public, private, *_ = self.make_numbered_users(4, private={2})
+        response = self.client.post('/follows/bulk/follow/', {
+            'user_ids': [public.id, me.id, 999], 'usernames': ['u2', 'u1', 'nobody'],
+        }, format='json')
+        self.assertEqual(
+            [(row['target'], row['status']) for row in response.data['results']],
+            [(public.id, 'followed'), (me.id, 'self'), (999, 'not_found'),
+             ('u2', 'requested'), ('u1', 'followed'), ('nobody', 'not_found')],
+        )
+        self.assertEqual(Follow.objects.filter(follower=me).count(), 2)
+        self.assertEqual(Notification.objects.filter(sender=me).count(), 2)
+        self.assertEqual(Profile.objects.get(user=me).following_count, 1)
+        self.assert_counters_match_tables()
+
+        again = self.client.post('/follows/bulk/follow/', {'usernames': ['u1', 'u2']}, format='json')
+        self.assertEqual([row['status'] for row in again.data['results']], ['already_following', 'already_requested'])
+
+        other = self.client_for(private)
+        accepted = other.post('/follows/bulk/accept/', {'usernames': ['u0', 'u3']}, format='json')
+        self.assertEqual([row['status'] for row in accepted.data['results']], ['accepted', 'no_request'])
+        self.assertTrue(Follow.objects.get(follower=me, following=private).accepted)
+        self.assert_counters_match_tables()
+
+        removed = self.client.post('/follows/bulk/unfollow/', {'usernames': ['u1', 'u2', 'u3']}, format='json')
+        self.assertEqual([row['status'] for row in removed.data['results']], ['unfollowed', 'unfollowed', 'not_following'])
+        self.assertFalse(Follow.objects.filter(follower=me).exists())
+        self.assertEqual(Profile.objects.get(user=me).following_count, 0)
+        self.assert_counters_match_tables()
+
+    def test_query_count_does_not_grow_with_targets(self):
+        users = self.make_numbered_users(25)
+        with CaptureQueriesContext(connection) as few:
+            self.client.post('/follows/bulk/follow/', {'user_ids': [u.id for u in users[1:4]]}, format='json')
+        with CaptureQueriesContext(connection) as many:
+            self.client.post('/follows/bulk/follow/', {'user_ids': [u.id for u in users[4:25]]}, format='json')
+        self.assertEqual(len(many), len(few))
+
+    def test_follows_made_concurrently_are_not_counted_twice(self):
+        me, first, second = self.make_numbered_users(3)
+        bulk_create = Follow.objects.bulk_create
+
+        def race(objs, **kwargs):
+            # Another request follows `first` between our read and our insert
+            Follow.objects.create(follower=me, following=first, accepted=True)
+            return bulk_create(objs, **kwargs)
+
+        with mock.patch.object(Follow.objects, 'bulk_create', side_effect=race):
+            response = self.client.post('/follows/bulk/follow/', {'usernames': ['u1', 'u2']}, format='json')
+        self.assertEqual([row['status'] for row in response.data['results']], ['already_following', 'followed'])
+        self.assertEqual(Notification.objects.filter(sender=me).count(), 1)
+        self.assertEqual(Profile.objects.get(user=me).following_count, 2)
+        self.assert_counters_match_tables()
+
+    def go_public(self, requests, prefix):
+        me, *others = self.make_numbered_users(requests + 1, private={0}, prefix=prefix)
+        for other in others:
+            Follow.objects.create(follower=other, following=me, accepted=False)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.put('/profile/edit/', {'privacy': 'public'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Follow.objects.filter(following=me, accepted=False).exists())
+        self.assertEqual(Notification.objects.filter(user__in=others, content__contains='accepted').count(), requests)
+        self.assertEqual(Profile.objects.get(user=me).followers_count, requests)
+        self.assert_counters_match_tables()
+        return me, len(queries)
+
+    def test_going_public_accepts_pending_requests(self):
+        _, few = self.go_public(2, 'a')
+        me, many = self.go_public(12, 'b')
+        self.assertEqual(many, few)
+
+        Follow.objects.filter(following=me).update(accepted=False)
+        counters.recount()
+        response = self.client.post('/follows/accept-all/')
+        self.assertEqual(response.data['accepted'], 12)
+        self.assert_counters_match_tables()
+
+    def test_rejects_bad_input(self):
+        self.make_numbered_users(1)
+        for body in ({}, {'user_ids': ['1']}, {'usernames': 'u1'}, {'user_ids': list(range(101))}):
+            self.assertEqual(self.client.post('/follows/bulk/follow/', body, format='json').status_code, 400)
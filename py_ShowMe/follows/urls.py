@@ -1,8 +1,9 @@
 from django.urls import path
 from .views import (
-    FollowUser, AcceptFollowRequest, CancelFollowRequest,
+    FollowUser, AcceptFollowRequest, AcceptAllFollowRequests, CancelFollowRequest,
     UnfollowUser, MyFollows,
-    FollowUserByUsername, CancelFollowRequestByUsername, UnfollowUserByUsername,UserFollows
+    FollowUserByUsername, CancelFollowRequestByUsername, UnfollowUserByUsername,UserFollows,
+    MutualFollows, FollowListView, FollowSuggestions, BulkFollowView,
 )
 
 urlpatterns = [
@@ -10,6 +11,7 @@ urlpatterns = [
     path('follow/<str:username>/', FollowUserByUsername.as_view(), name='follow-user-by-username'),
 
     path('accept/<int:follow_id>/', AcceptFollowRequest.as_view(), name='accept-follow'),
+    path('accept-all/', AcceptAllFollowRequests.as_view(), name='accept-all-follows'),
 
     path('cancel/<int:user_id>/', CancelFollowRequest.as_view(), name='cancel-follow'),
     path('cancel/<str:username>/', CancelFollowRequestByUsername.as_view(), name='cancel-follow-by-username'),
@@ -17,7 +19,21 @@ urlpatterns = [
     path('unfollow/<int:user_id>/', UnfollowUser.as_view(), name='unfollow-user'),
     path('unfollow/<str:username>/', UnfollowUserByUsername.as_view(), name='unfollow-user-by-username'),
 
+    path('bulk/follow/', BulkFollowView.as_view(operation='follow'), name='bulk-follow'),
+    path('bulk/unfollow/', BulkFollowView.as_view(operation='unfollow'), name='bulk-unfollow'),
+    path('bulk/accept/', BulkFollowView.as_view(operation='accept'), name='bulk-accept'),
+
     path('my-follows/', MyFollows.as_view(), name='my-follows'),
+    path('suggestions/', FollowSuggestions.as_view(), name='follow-suggestions'),
+    # Paginated lists (?cursor=&page_size=); these must come before the <username> routes
+    path('my-follows/followers/', FollowListView.as_view(section='followers'), name='my-followers'),
+    path('my-follows/following/', FollowListView.as_view(section='following'), name='my-following'),
+    path('my-follows/mutual/', FollowListView.as_view(section='mutual_follows'), name='my-mutual-follows'),
+    path('my-follows/requests/sent/', FollowListView.as_view(section='requests_sent'), name='my-requests-sent'),
+    path('my-follows/requests/received/', FollowListView.as_view(section='requests_received'), name='my-requests-received'),
+    path('<str:username>/followers/', FollowListView.as_view(section='followers'), name='user-followers'),
+    path('<str:username>/following/', FollowListView.as_view(section='following'), name='user-following'),
     path('<str:username>/follows/', UserFollows.as_view(), name='user-follows'),
+    path('<str:username>/mutual/', MutualFollows.as_view(), name='user-mutual-follows'),
 
 ]
@@ -3,11 +3,22 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
+from django.db import transaction
+from django.conf import settings
 from userProfile.models import Profile
+from userProfile import counters
+from posts.pagination import InvalidCursor, get_page_size, paginate_by_cursor
+from . import bulk
 from .models import Follow
+from .suggestions import suggestions_for
+from .relationships import (
+    followers_of, following_of, friends_of, relationship_between, requests_received, requests_sent,
+    shared_following,
+)
 from django.contrib.auth import get_user_model
 from .serializers import FollowSerializer, SimpleUserSerializer
-from notifications.models import Notification,NotificationType
+from notifications import emitter
+from notifications.models import NotificationType
 
 
 User = get_user_model()
@@ -22,31 +33,33 @@ class FollowUser(APIView):
         if follower == following:
             return Response({"message": "You can't follow yourself."}, status=status.HTTP_400_BAD_REQUEST)
 
-        existing_follow = Follow.objects.filter(follower=follower, following=following).first()
-        if existing_follow:
-            if existing_follow.accepted:
-                return Response({"message": f"You already follow {following.username}."}, status=status.HTTP_200_OK)
-            else:
-                return Response({"message": f"Follow request to {following.username} already sent. Awaiting approval."}, status=status.HTTP_200_OK)
+        relationship = relationship_between(follower, following)
+        if relationship.following:
+            return Response({"message": f"You already follow {following.username}."}, status=status.HTTP_200_OK)
+        if relationship.requested:
+            return Response({"message": f"Follow request to {following.username} already sent. Awaiting approval."}, status=status.HTTP_200_OK)
 
         profile = following.profile
         if profile.privacy == 'public':
-            Follow.objects.create(follower=follower, following=following, accepted=True)
-            Notification.objects.create(
-                user=following,
-                sender=follower,  # The user performing the action (follower)
-                type=NotificationType.FOLLOW,
-                content=f"{follower.username} started following you."
-            )
+            # Follow row, profile counters and notification commit together
+            with transaction.atomic():
+                Follow.objects.create(follower=follower, following=following, accepted=True)
+                emitter.emit(
+                    following,
+                    f"{follower.username} started following you.",
+                    sender=follower,  # The user performing the action (follower)
+                    type=NotificationType.FOLLOW,
+                )
             return Response({"message": f"Followed {following.username} successfully!"})
         else:
-            Follow.objects.create(follower=follower, following=following, accepted=False)
-            Notification.objects.create(
-                user=following,
-                sender=follower,  # The user performing the action (follower)
-                type=NotificationType.FOLLOW_REQUEST,
-                content=f"{follower.username} sent you a follow request."
-            )
+            with transaction.atomic():
+                Follow.objects.create(follower=follower, following=following, accepted=False)
+                emitter.emit(
+                    following,
+                    f"{follower.username} sent you a follow request.",
+                    sender=follower,  # The user performing the action (follower)
+                    type=NotificationType.FOLLOW_REQUEST,
+                )
             return Response({"message": f"Follow request sent to {following.username}."})
 
 
@@ -55,14 +68,19 @@ class AcceptFollowRequest(APIView):
 
     def post(self, request, follow_id):
         follow = get_object_or_404(Follow, id=follow_id, following=request.user, accepted=False)
-        follow.accepted = True
-        follow.save()
-        Notification.objects.create(
-            user=follow.follower,
-            content=f"{request.user.username} accepted your follow request."
-        )
+        with transaction.atomic():
+            follow.accepted = True
+            follow.save()
+            emitter.emit(follow.follower, f"{request.user.username} accepted your follow request.")
         return Response({"message": "Follow request accepted."})
 
+class AcceptAllFollowRequests(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        accepted = bulk.accept_all(request.user)
+        return Response({"message": f"Accepted {accepted} follow requests.", "accepted": accepted})
+
 class CancelFollowRequest(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -79,86 +97,198 @@ class UnfollowUser(APIView):
     def delete(self, request, user_id):
         follow = Follow.objects.filter(follower=request.user, following__id=user_id, accepted=True).first()
         if follow:
-            follow.delete()
-            Notification.objects.create(
-                user=follow.following,
-                content=f"{request.user.username} unfollowed you."
-            )
+            with transaction.atomic():
+                follow.delete()
+                emitter.emit(follow.following, f"{request.user.username} unfollowed you.")
             return Response({"message": "Unfollowed successfully."})
         return Response({"message": "Follow relationship not found."}, status=status.HTTP_404_NOT_FOUND)
 
+# Follow-list sections: name -> (Follow queryset for a user id, row -> response item).
+# Item shapes match what MyFollows has always returned.
+FOLLOW_SECTIONS = {
+    'followers': (followers_of, lambda f: SimpleUserSerializer(f.follower).data),
+    'following': (following_of, lambda f: SimpleUserSerializer(f.following).data),
+    'mutual_follows': (friends_of, lambda f: SimpleUserSerializer(f.following).data),
+    'requests_sent': (requests_sent, lambda f: {"id": f.id, "to_user": SimpleUserSerializer(f.following).data}),
+    'requests_received': (requests_received, lambda f: {"id": f.id, "from_user": SimpleUserSerializer(f.follower).data}),
+}
+PUBLIC_SECTIONS = ('followers', 'following')
+
+
+def _requested_sections(request, allowed):
+    """?sections=followers,requests_sent picks sections; default is all of them."""
+    raw = request.query_params.get('sections')
+    if not raw:
+        return list(allowed)
+    sections = [name.strip() for name in raw.split(',') if name.strip()]
+    unknown = set(sections) - set(allowed)
+    if unknown:
+        raise ValueError(f"Unknown sections: {', '.join(sorted(unknown))}.")
+    return sections
+
+
+def _full_sections(user_id, sections):
+    # One query per section; select_related brings the users and profiles along.
+    response = {}
+    for name in sections:
+        queryset, item = FOLLOW_SECTIONS[name]
+        response[name] = [item(f) for f in queryset(user_id).order_by('-created_at', '-id')]
+    return response
+
+
 class MyFollows(APIView):
+    """
+    The requesting user's follow lists, unpaginated. Pass ?sections= to fetch
+    only what the page shows; the paginated FollowListView is preferred for
+    long lists.
+    """
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
         user = request.user
+        try:
+            sections = _requested_sections(request, FOLLOW_SECTIONS)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Accepted followers and following
-        followers_qs = Follow.objects.filter(following=user, accepted=True)
-        following_qs = Follow.objects.filter(follower=user, accepted=True)
+        counts = counters.counts_for(user.id)
+        return Response({
+            "followers_count": counts['followers_count'],
+            "following_count": counts['following_count'],
+            **_full_sections(user.id, sections),
+        })
 
-        # Pending requests
-        requests_sent_qs = Follow.objects.filter(follower=user, accepted=False)
-        requests_received_qs = Follow.objects.filter(following=user, accepted=False)
+class UserFollows(APIView):
+    permission_classes = [IsAuthenticated]
 
-        # Convert to sets for mutual follow check
-        followers_set = set(f.follower.id for f in followers_qs)
-        following_set = set(f.following.id for f in following_qs)
-        mutual_ids = followers_set & following_set
+    def get(self, request, username):
+        user = get_object_or_404(User.objects.select_related('profile'), username=username)
+        is_me = user == request.user
+        try:
+            sections = _requested_sections(request, PUBLIC_SECTIONS + ('mutual_follows',))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # mutual_follows is only shown on your own page
+        lists = _full_sections(user.id, [name for name in sections if is_me or name != 'mutual_follows'])
+        if 'mutual_follows' in sections and not is_me:
+            lists['mutual_follows'] = []
+        counts = counters.counts_for(user.id)
 
         return Response({
-            "followers": [
-                SimpleUserSerializer(f.follower).data
-                for f in followers_qs
-            ],
-            "following": [
-                SimpleUserSerializer(f.following).data
-                for f in following_qs
-            ],
-            "mutual_follows": SimpleUserSerializer(
-                User.objects.filter(id__in=mutual_ids), many=True
-            ).data,
-            "requests_sent": [
-                {
-                    "id": f.id,
-                    "to_user": SimpleUserSerializer(f.following).data
-                }
-                for f in requests_sent_qs
-            ],
-            "requests_received": [
-                {
-                    "id": f.id,
-                    "from_user": SimpleUserSerializer(f.follower).data
-                }
-                for f in requests_received_qs
-            ]
+            "user": SimpleUserSerializer(user).data,
+            "followers_count": counts['followers_count'],
+            "following_count": counts['following_count'],
+            **lists,
         })
 
-class UserFollows(APIView):
+
+class FollowListView(APIView):
+    """
+    One follow list, cursor-paginated (?cursor=&page_size=). Each page is a
+    single query whatever its size. Pending requests and mutual follows are
+    only available for the requesting user (no username in the URL).
+    """
+    permission_classes = [IsAuthenticated]
+    section = None
+
+    def get(self, request, username=None):
+        if username is None:
+            user_id = request.user.id
+        else:
+            if self.section not in PUBLIC_SECTIONS:
+                return Response({"error": "Not available for other users."}, status=status.HTTP_403_FORBIDDEN)
+            user_id = get_object_or_404(User, username=username).id
+
+        queryset, item = FOLLOW_SECTIONS[self.section]
+        try:
+            rows, next_cursor = paginate_by_cursor(
+                queryset(user_id),
+                cursor=request.query_params.get('cursor'),
+                page_size=get_page_size(request),
+            )
+        except InvalidCursor as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"results": [item(f) for f in rows], "next": next_cursor})
+
+
+class MutualFollows(APIView):
+    """Accounts both the requesting user and <username> follow, cursor-paginated."""
     permission_classes = [IsAuthenticated]
 
     def get(self, request, username):
         user = get_object_or_404(User, username=username)
+        follows = shared_following(request.user.id, user.id).select_related('following__profile')
+        try:
+            rows, next_cursor = paginate_by_cursor(
+                follows,
+                cursor=request.query_params.get('cursor'),
+                page_size=get_page_size(request),
+            )
+        except InvalidCursor as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        followers_qs = Follow.objects.filter(following=user, accepted=True)
-        following_qs = Follow.objects.filter(follower=user, accepted=True)
+        return Response({
+            "results": [SimpleUserSerializer(f.following).data for f in rows],
+            "next": next_cursor,
+        })
 
-        followers_set = set(f.follower.id for f in followers_qs)
-        following_set = set(f.following.id for f in following_qs)
-        mutual_ids = followers_set & following_set
 
-        return Response({
-            "user": SimpleUserSerializer(user).data,
-            "followers": [SimpleUserSerializer(f.follower).data for f in followers_qs],
-            "following": [SimpleUserSerializer(f.following).data for f in following_qs],
-            "mutual_follows": (
-    SimpleUserSerializer(User.objects.filter(id__in=mutual_ids), many=True).data
-    if user == request.user else []
-),
+class FollowSuggestions(APIView):
+    """People you may know: ?limit=N (default 10, at most SUGGESTIONS_TOP_K)."""
+    permission_classes = [IsAuthenticated]
 
+    def get(self, request):
+        try:
+            limit = int(request.query_params.get('limit', 10))
+        except ValueError:
+            limit = 10
+        limit = max(1, min(limit, settings.SUGGESTIONS_TOP_K))
+        return Response({
+            "results": [
+                {"user": SimpleUserSerializer(user).data, "mutual_count": score}
+                for user, score in suggestions_for(request.user.id, limit)
+            ]
         })
 
 
+class BulkFollowView(APIView):
+    """
+    Follow, unfollow or accept many users at once. Body:
+    {"user_ids": [...], "usernames": [...]}; either list may be omitted.
+    Returns one result per target (see follows/bulk.py).
+    """
+    permission_classes = [IsAuthenticated]
+    operations = {
+        'follow': bulk.follow_many,
+        'unfollow': bulk.unfollow_many,
+        'accept': bulk.accept_many,
+    }
+    operation = None
+
+    def post(self, request):
+        user_ids = request.data.get('user_ids') or []
+        usernames = request.data.get('usernames') or []
+        if (
+            not isinstance(user_ids, list) or not isinstance(usernames, list)
+            or not all(isinstance(i, int) and not isinstance(i, bool) for i in user_ids)
+            or not all(isinstance(name, str) for name in usernames)
+        ):
+            return Response(
+                {"error": "user_ids must be a list of integers and usernames a list of strings."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if not user_ids and not usernames:
+            return Response({"error": "No users given."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(user_ids) + len(usernames) > settings.FOLLOW_BULK_MAX_TARGETS:
+            return Response(
+                {"error": f"At most {settings.FOLLOW_BULK_MAX_TARGETS} users per request."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        targets = bulk.resolve_targets(user_ids, usernames)
+        return Response({"results": self.operations[self.operation](request.user, targets)})
+
 
 class FollowUserByUsername(FollowUser):
     def post(self, request, username):
@@ -0,0 +1,18 @@
+# mediafiles/fields.py
+
+from rest_framework import serializers
+from .resolver import media_url
+
+
+class MediaFileField(serializers.FileField):
+    """FileField that renders through the shared media URL resolver."""
+
+    def to_representation(self, value):
+        return media_url(value)
+
+
+class MediaImageField(serializers.ImageField):
+    """ImageField that renders through the shared media URL resolver."""
+
+    def to_representation(self, value):
+        return media_url(value)
@@ -0,0 +1,181 @@
+# mediafiles/gc.py
+#
+# Deferred deletion of stored media. Views call schedule_deletion() instead of
+# FieldFile.delete(); purge_tombstones() runs from a worker
+# (manage.py purge_media_tombstones) and uses S3 DeleteObjects, which takes
+# up to 1000 keys per call. Failures are retried with exponential backoff.
+#
+# A name can be referenced again after it was queued (a re-upload under the
+# same filename). Each batch is checked against the rows that reference
+# media right before deleting, and tombstones for names in use are dropped.
+
+import logging
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db.models import F
+from django.utils import timezone
+
+from .models import StorageTombstone
+from .resolver import forget_name
+
+logger = logging.getLogger(__name__)
+
+S3_DELETE_BATCH = 1000
+
+# Files generated per post (posts/processing.py), keyed by post id
+DERIVATIVE_NAME = re.compile(r'^post_(?:images/derivatives|videos/hls)/(\d+)/')
+
+
+def schedule_deletion(files, storage=None):
+    """Queue FieldFiles or storage names for deletion. Empty values are skipped."""
+    storage = storage or default_storage
+    names = []
+    for item in files:
+        name = getattr(item, 'name', item)
+        if name:
+            names.append(name)
+            forget_name(getattr(item, 'storage', storage), name)
+    StorageTombstone.objects.bulk_create(
+        [StorageTombstone(name=name) for name in names],
+        ignore_conflicts=True,
+    )
+    return len(names)
+
+
+def _s3_client(storage):
+    if hasattr(storage, 'bucket_name') and hasattr(storage, 'connection'):
+        return storage.connection.meta.client
+    return None
+
+
+def _delete_batch(storage, names):
+    """Delete names from storage. Returns {name: error} for the ones that failed."""
+    client = _s3_client(storage)
+    if client is None:
+        errors = {}
+        for name in names:
+            try:
+                storage.delete(name)
+            except Exception as e:
+                errors[name] = str(e)
+        return errors
+
+    keys = {storage._normalize_name(name): name for name in names}
+    response = client.delete_objects(
+        Bucket=storage.bucket_name,
+        Delete={'Objects': [{'Key': key} for key in keys], 'Quiet': True},
+    )
+    return {keys[error['Key']]: f"{error.get('Code')}: {error.get('Message')}" for error in response.get('Errors', [])}
+
+
+def names_in_use(names):
+    """The subset of names that some row points at right now."""
+    from posts.models import Post
+    from posts.processing import derivative_names
+    from userProfile.models import Profile
+
+    names = set(names)
+    if not names:
+        return set()
+    in_use = set(Post.objects.filter(image__in=names).values_list('image', flat=True))
+    in_use.update(Post.objects.filter(video__in=names).values_list('video', flat=True))
+    in_use.update(Profile.objects.filter(profile_pic__in=names).values_list('profile_pic', flat=True))
+    post_ids = {int(match.group(1)) for match in map(DERIVATIVE_NAME.match, names) if match}
+    for post in Post.objects.filter(pk__in=post_ids).only('image_variants', 'video_assets'):
+        in_use.update(names.intersection(derivative_names(post)))
+    return in_use
+
+
+def purge_tombstones(batch_size=None, storage=None):
+    """
+    Delete one batch of due tombstones. Returns (deleted, failed, kept),
+    kept being tombstones dropped because their name is in use again.
+    """
+    storage = storage or default_storage
+    batch_size = min(batch_size or settings.MEDIA_GC_BATCH_SIZE, S3_DELETE_BATCH)
+
+    due = list(
+        StorageTombstone.objects.filter(
+            next_attempt_at__lte=timezone.now(),
+            attempts__lt=settings.MEDIA_GC_MAX_ATTEMPTS,
+        ).order_by('next_attempt_at').values_list('id', 'name', 'attempts')[:batch_size]
+    )
+    if not due:
+        return 0, 0, 0
+
+    in_use = names_in_use(name for _, name, _ in due)
+    if in_use:
+        logger.info("Keeping %s queued media files that are referenced again", len(in_use))
+        StorageTombstone.objects.filter(name__in=in_use).delete()
+        due = [row for row in due if row[1] not in in_use]
+
+    names = [name for _, name, _ in due]
+    errors = {}
+    if names:
+        try:
+            errors = _delete_batch(storage, names)
+        except Exception as e:
+            logger.exception("Batch delete of %s media files failed", len(names))
+            errors = {name: str(e) for name in names}
+
+    deleted_ids = [pk for pk, name, _ in due if name not in errors]
+    StorageTombstone.objects.filter(id__in=deleted_ids).delete()
+
+    now = timezone.now()
+    for pk, name, attempts in due:
+        if name in errors:
+            StorageTombstone.objects.filter(pk=pk).update(
+                attempts=F('attempts') + 1,
+                last_error=errors[name][:2000],
+                next_attempt_at=now + timedelta(seconds=min(2 ** attempts * 30, 6 * 3600)),
+            )
+    return len(deleted_ids), len(errors), len(in_use)
+
+
+def iter_stored_names(storage=None, prefix=''):
+    """(name, last_modified) for every object under prefix."""
+    storage = storage or default_storage
+    client = _s3_client(storage)
+    if client is not None:
+        location = storage._normalize_name(prefix) if prefix else storage.location
+        paginator = client.get_paginator('list_objects_v2')
+        strip = len(storage.location.rstrip('/') + '/') if storage.location else 0
+        for page in paginator.paginate(Bucket=storage.bucket_name, Prefix=location):
+            for obj in page.get('Contents', []):
+                yield obj['Key'][strip:], obj['LastModified']
+        return
+
+    def walk(path):
+        directories, files = storage.listdir(path)
+        for filename in files:
+            name = f"{path}/{filename}" if path else filename
+            yield name, storage.get_modified_time(name)
+        for directory in directories:
+            yield from walk(f"{path}/{directory}" if path else directory)
+
+    if not prefix or storage.exists(prefix):
+        yield from walk(prefix.rstrip('/'))
+
+
+def referenced_names():
+    """Every storage name some row still points at."""
+    from posts.models import Post
+    from userProfile.models import Profile
+
+    names = set()
+    for image, video, variants, assets in Post.objects.values_list(
+        'image', 'video', 'image_variants', 'video_assets'
+    ).iterator():
+        assets = assets or {}
+        names.update(name for name in (image, video) if name)
+        names.update((variants or {}).values())
+        names.update(assets[key] for key in ('poster', 'playlist') if assets.get(key))
+        names.update(assets.get('segments', []))
+    names.update(
+        Profile.objects.exclude(profile_pic='').exclude(profile_pic__isnull=True)
+        .values_list('profile_pic', flat=True).iterator()
+    )
+    return names
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+from mediafiles import gc
+
+
+class Command(BaseCommand):
+    help = "Delete queued media files from storage in batches (run with --loop as a background worker)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help="Keep running, polling every --interval seconds.")
+        parser.add_argument('--interval', type=float, default=10.0)
+        parser.add_argument('--batch-size', type=int, default=None)
+
+    def handle(self, *args, loop=False, interval=10.0, batch_size=None, **options):
+        while True:
+            total_deleted = total_failed = total_kept = 0
+            while True:
+                deleted, failed, kept = gc.purge_tombstones(batch_size=batch_size)
+                total_deleted += deleted
+                total_failed += failed
+                total_kept += kept
+                if not (deleted or failed or kept):
+                    break
+            if total_deleted or total_failed or total_kept or not loop:
+                self.stdout.write(
+                    f"Deleted {total_deleted} files, {total_failed} failed (will retry), "
+                    f"{total_kept} kept (in use again)."
+                )
+            if not loop:
+                return
+            time.sleep(interval)
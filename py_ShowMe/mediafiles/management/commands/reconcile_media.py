@@ -0,0 +1,39 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from mediafiles import gc
+
+
+class Command(BaseCommand):
+    help = "Find stored media files that no row references; optionally queue them for deletion."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prefix', action='append', dest='prefixes',
+                            help="Only scan this storage prefix (repeatable). Defaults to all media folders.")
+        parser.add_argument('--min-age-hours', type=float, default=24,
+                            help="Ignore files newer than this, e.g. direct uploads not yet attached to a post.")
+        parser.add_argument('--delete', action='store_true', help="Queue orphans for deletion.")
+
+    def handle(self, *args, prefixes=None, min_age_hours=24, delete=False, **options):
+        prefixes = prefixes or ['post_images/', 'post_videos/', 'profile_pics/']
+        cutoff = timezone.now() - timedelta(hours=min_age_hours)
+        referenced = gc.referenced_names()
+
+        orphans = []
+        for prefix in prefixes:
+            for name, modified in gc.iter_stored_names(prefix=prefix):
+                if name in referenced:
+                    continue
+                if modified and timezone.is_naive(modified):
+                    modified = timezone.make_aware(modified)
+                if modified and modified > cutoff:
+                    continue
+                orphans.append(name)
+                self.stdout.write(name)
+
+        if delete:
+            gc.schedule_deletion(orphans)
+            self.stdout.write(self.style.SUCCESS(f"Queued {len(orphans)} orphaned files for deletion."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Found {len(orphans)} orphaned files (use --delete to queue them)."))
@@ -0,0 +1,17 @@
+from django.db import models
+
+
+class StorageTombstone(models.Model):
+    """
+    A stored file waiting to be deleted. Rows are written in the same
+    transaction that drops the reference; mediafiles.gc removes the objects
+    in batches, off the request path.
+    """
+    name = models.CharField(max_length=1024, unique=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    next_attempt_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} (attempts: {self.attempts})"
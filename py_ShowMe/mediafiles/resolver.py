@@ -0,0 +1,92 @@
+# mediafiles/resolver.py
+#
+# One place to turn a stored file into a public URL. Storage backends like
+# S3Boto3Storage do real work in .url() (and will do more once URLs are
+# signed or routed through a CDN), so results are kept in a bounded LRU
+# keyed by storage + file name. MEDIA_URL_CACHE_TTL defaults to half of
+# AWS_QUERYSTRING_EXPIRE, so a cached signed URL is never close to expiry.
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+class MediaURLCache:
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            url, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return url
+
+    def set(self, key, url):
+        with self._lock:
+            self._data[key] = (url, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+url_cache = MediaURLCache(settings.MEDIA_URL_CACHE_SIZE, settings.MEDIA_URL_CACHE_TTL)
+
+
+def clean_url(url):
+    # Fix malformed URL (common if colon is missed)
+    if url.startswith("https//"):
+        return url.replace("https//", "https://", 1)
+    elif url.startswith("http//"):
+        return url.replace("http//", "http://", 1)
+    return url
+
+
+def _cache_key(storage, name):
+    return (type(storage).__module__, type(storage).__qualname__, getattr(storage, 'bucket_name', None), name)
+
+
+def storage_url(storage, name):
+    if not name:
+        return None
+    key = _cache_key(storage, name)
+    url = url_cache.get(key)
+    if url is None:
+        url = clean_url(storage.url(name))
+        url_cache.set(key, url)
+    return url
+
+
+def media_url(field_file):
+    """URL for a FieldFile (ImageField/FileField value), or None if empty."""
+    if not field_file:
+        return None
+    return storage_url(field_file.storage, field_file.name)
+
+
+def forget_name(storage, name):
+    url_cache.discard(_cache_key(storage, name))
+
+
+def forget(field_file):
+    """Drop a file from the cache, e.g. when it is deleted or replaced."""
+    if field_file:
+        forget_name(field_file.storage, field_file.name)
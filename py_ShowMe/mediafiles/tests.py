@@ -0,0 +1,146 @@
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+
+from ShowMe.testing import ShowMeTestCase
+from posts.models import Post
+from . import gc
+from .resolver import MediaURLCache
+from .models import StorageTombstone
+
+
+class MediaGCTests(ShowMeTestCase):
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root.name))
+
+    def store(self, *names):
+        return [default_storage.save(name, ContentFile(b'x')) for name in names]
+
+    def test_queue_is_purged_in_batches(self):
+        names = self.store('post_images/a.jpg', 'post_images/b.jpg', 'post_images/c.jpg')
+        self.assertEqual(gc.schedule_deletion([*names, '', None]), 3)
+        gc.schedule_deletion(names[:1])  # queued twice, one tombstone
+
+        self.assertEqual(gc.purge_tombstones(batch_size=2), (2, 0, 0))
+        self.assertEqual(gc.purge_tombstones(batch_size=2), (1, 0, 0))
+        self.assertEqual(gc.purge_tombstones(), (0, 0, 0))
+        self.assertFalse(any(default_storage.exists(name) for name in names))
+
+    def test_names_referenced_again_are_not_deleted(self):
+        user = self.make_user('me')
+        picture, gone = self.store('profile_pics/me.jpg', 'profile_pics/old.jpg')
+        gc.schedule_deletion([picture, gone])
+        # Same filename uploaded again before the worker ran
+        user.profile.profile_pic = picture
+        user.profile.save()
+        post = Post.objects.create(user=user, image='post_images/p.jpg')
+        variant = f'post_images/derivatives/{post.pk}/thumb.jpg'
+        Post.objects.filter(pk=post.pk).update(image_variants={'thumb': variant})
+        gc.schedule_deletion([variant, f'post_images/derivatives/{post.pk}/stale.jpg'])
+
+        self.assertEqual(gc.purge_tombstones(), (2, 0, 2))
+        self.assertTrue(default_storage.exists(picture))
+        self.assertFalse(default_storage.exists(gone))
+        self.assertFalse(StorageTombstone.objects.exists())
+
+    def test_failures_back_off_and_give_up(self):
+        good, bad = self.store('post_images/good.jpg', 'post_images/bad.jpg')
+        gc.schedule_deletion([good, bad])
+        real_delete = default_storage.delete
+
+        def flaky(name):
+            if name == bad:
+                raise OSError("storage unavailable")
+            real_delete(name)
+
+        with mock.patch.object(default_storage, 'delete', side_effect=flaky):
+            self.assertEqual(gc.purge_tombstones(), (1, 1, 0))
+            # Not due again until the backoff has passed
+            self.assertEqual(gc.purge_tombstones(), (0, 0, 0))
+        tombstone = StorageTombstone.objects.get()
+        self.assertEqual((tombstone.name, tombstone.attempts), (bad, 1))
+        self.assertIn("storage unavailable", tombstone.last_error)
+        self.assertGreater(tombstone.next_attempt_at, timezone.now() + timedelta(seconds=20))
+
+        StorageTombstone.objects.update(next_attempt_at=timezone.now(), attempts=3)
+        with mock.patch.object(default_storage, 'delete', side_effect=OSError("still down")):
+            gc.purge_tombstones()
+        delay = StorageTombstone.objects.get().next_attempt_at - timezone.now()
+        self.assertGreater(delay, timedelta(seconds=200))  # 2 ** 3 * 30s
+
+        with override_settings(MEDIA_GC_MAX_ATTEMPTS=4):
+            StorageTombstone.objects.update(next_attempt_at=timezone.now())
+            self.assertEqual(gc.purge_tombstones(), (0, 0, 0))
+        self.assertEqual(gc.purge_tombstones(), (1, 0, 0))
+        self.assertFalse(default_storage.exists(bad))
+
+    def test_s3_batch_reports_per_key_errors(self):
+        client = mock.Mock()
+        client.delete_objects.return_value = {'Errors': [{'Key': 'media/b', 'Code': 'AccessDenied', 'Message': 'no'}]}
+        storage = mock.Mock(bucket_name='bucket')
+        storage.connection.meta.client = client
+        storage._normalize_name.side_effect = lambda name: f'media/{name}'
+
+        self.assertEqual(gc._delete_batch(storage, ['a', 'b']), {'b': 'AccessDenied: no'})
+        client.delete_objects.assert_called_once_with(
+            Bucket='bucket', Delete={'Objects': [{'Key': 'media/a'}, {'Key': 'media/b'}], 'Quiet': True},
+        )
+
+    def test_reconcile_media_finds_old_orphans(self):
+        user = self.make_user('me')
+        kept, orphan, recent = self.store('post_images/kept.jpg', 'post_images/orphan.jpg', 'post_images/new.jpg')
+        Post.objects.create(user=user, image=kept)
+        old = (timezone.now() - timedelta(days=2)).timestamp()
+        for name in (kept, orphan):
+            os.utime(default_storage.path(name), (old, old))
+
+        out = StringIO()
+        call_command('reconcile_media', stdout=out)
+        self.assertEqual(out.getvalue().splitlines()[0], orphan)
+        self.assertIn("Found 1 orphaned files", out.getvalue())
+        self.assertFalse(StorageTombstone.objects.exists())
+
+        call_command('reconcile_media', '--delete', stdout=StringIO())
+        self.assertEqual(list(StorageTombstone.objects.values_list('name', flat=True)), [orphan])
+        call_command('purge_media_tombstones', stdout=StringIO())
+        self.assertEqual(
+            (default_storage.exists(kept), default_storage.exists(orphan), default_storage.exists(recent)),
+            (True, False, True),
+        )
+
+
+class MediaURLCacheTests(ShowMeTestCase):
+    def test_least_recently_used_entries_are_evicted(self):
+        urls = MediaURLCache(maxsize=2, ttl=60)
+        urls.set('a', 'https://a')
+        urls.set('b', 'https://b')
+        self.assertEqual(urls.get('a'), 'https://a')  # b is now the oldest
+        urls.set('c', 'https://c')
+        self.assertEqual([urls.get(key) for key in 'abc'], ['https://a', None, 'https://c'])
+
+    def test_entries_expire_after_the_ttl(self):
+        urls = MediaURLCache(maxsize=10, ttl=60)
+        with mock.patch('mediafiles.resolver.time.monotonic', return_value=1000.0) as clock:
+            urls.set('a', 'https://a')
+            clock.return_value = 1059.0
+            self.assertEqual(urls.get('a'), 'https://a')
+            clock.return_value = 1061.0
+            self.assertIsNone(urls.get('a'))
+            clock.return_value = 1000.0
+            self.assertIsNone(urls.get('a'))  # dropped on the expired read, not just hidden
+
+    def test_ttl_leaves_a_margin_on_signed_urls(self):
+        self.assertLessEqual(settings.MEDIA_URL_CACHE_TTL, settings.AWS_QUERYSTRING_EXPIRE // 2)
+        self.assertLess(settings.MEDIA_URL_CACHE_TTL + settings.PROFILE_CACHE_TTL, settings.AWS_QUERYSTRING_EXPIRE)
@@ -66,6 +66,14 @@ class NotificationConsumer(AsyncWebsocketConsumer):
             await self.send(text_data=json.dumps(notification_data))
             print(f"📢 [Sent notification] User: {self.user_id}, Notification ID: {notification_id}, Data: {notification_data}")  # Log the sending
 
+    async def send_unread_count(self, event):
+        """Push new badge counts (notifications/unread.py)."""
+        await self.send(text_data=json.dumps({
+            'type': 'unread_count',
+            'notifications': event['notifications'],
+            'messages': event['messages'],
+        }))
+
     @staticmethod
     async def send_notification_to_user(user_id, notification_data):
         """
@@ -0,0 +1,204 @@
+# notifications/emitter.py
+#
+# Write-behind notifications. Views call emit() instead of
+# Notification.objects.create(): with NOTIFICATIONS_WRITE_BEHIND on, the
+# event is appended to the local spool (notifications/spool.py) once the
+# surrounding transaction commits, and the request never waits on an
+# INSERT. A worker (manage.py flush_notifications --loop) writes spooled
+# events with bulk_create, NOTIFICATION_BATCH_SIZE at a time, and pushes
+# each one to its user_notifications_<id> channel group.
+#
+# With the setting off (the default, production included) emit() writes and
+# pushes inline, as before.
+#
+# Repeated events (a chat burst, a run of new followers) are coalesced: see
+# write(). A coalesced notification is pushed again each time it changes,
+# under the same id.
+#
+# Delivery is at least once: if the worker dies between bulk_create and
+# deleting the segment, that segment's events are written again.
+
+import logging
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import unread
+from .models import Notification, NotificationType
+from .spool import Spool
+
+logger = logging.getLogger(__name__)
+
+
+def _spool():
+    return Spool(settings.NOTIFICATION_SPOOL_DIR, fsync=settings.NOTIFICATION_SPOOL_FSYNC)
+
+
+def event(user, content, sender=None, type=''):
+    """A notification event. user and sender may be users or ids."""
+    return {
+        'user_id': getattr(user, 'pk', user),
+        'sender_id': getattr(sender, 'pk', sender),
+        'type': type,
+        'content': content,
+        'created_at': timezone.now().isoformat(),
+    }
+
+
+def emit(user, content, sender=None, type=''):
+    emit_many([event(user, content, sender, type)])
+
+
+def emit_many(events):
+    events = list(events)
+    if not events:
+        return
+    if settings.NOTIFICATIONS_WRITE_BEHIND:
+        transaction.on_commit(lambda: _spool().append(events))
+    else:
+        write(events)
+
+
+def _push(notifications):
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    send = async_to_sync(channel_layer.group_send)
+    for notification in notifications:
+        try:
+            send(
+                f'user_notifications_{notification.user_id}',
+                {'type': 'send_notification', 'notification_id': notification.pk},
+            )
+        except Exception:
+            logger.exception("Could not push notification %s", notification.pk)
+
+
+# What repeated events are grouped on besides the recipient. Types not listed
+# (accepted requests, unfollows) always get a row of their own.
+COALESCE_BY = {
+    NotificationType.MESSAGE: 'sender',
+    NotificationType.POST: 'sender',
+    NotificationType.FOLLOW: 'type',
+    NotificationType.FOLLOW_REQUEST: 'type',
+}
+
+
+def _group_key(e):
+    by = COALESCE_BY.get(e['type'])
+    if by == 'sender' and e['sender_id']:
+        return f"{e['type']}:{e['sender_id']}"
+    if by == 'type':
+        return e['type']
+    return ''
+
+
+def _others(n):
+    return f"{n} other" if n == 1 else f"{n} others"
+
+
+def _render(notification):
+    """Content for a notification that stands for several events."""
+    n = notification.count
+    name = notification.actors[0]['username'] if notification.actors else "Someone"
+    if notification.type == NotificationType.MESSAGE:
+        return f"You have {n} new messages from {name}"
+    if notification.type == NotificationType.POST:
+        return f"{name} shared {n} new posts."
+    if notification.type == NotificationType.FOLLOW:
+        return f"{name} and {_others(n - 1)} started following you."
+    return f"{name} and {_others(n - 1)} sent you follow requests."
+
+
+def _add_event(notification, e, names):
+    notification.count += 1
+    created_at = parse_datetime(e['created_at'])
+    notification.created_at = max(notification.created_at, created_at) if notification.count > 1 else created_at
+    if e['sender_id']:
+        notification.sender_id = e['sender_id']
+        actor = {'id': e['sender_id'], 'username': names[e['sender_id']]}
+        others = [a for a in notification.actors if a['id'] != actor['id']]
+        notification.actors = [actor, *others][:settings.NOTIFICATION_MAX_ACTORS]
+    notification.content = e['content'] if notification.count == 1 else _render(notification)
+
+
+def write(events):
+    """
+    Store events, coalescing repeats into open notifications, and push every
+    row touched once committed. Returns notifications inserted or updated.
+    """
+    User = get_user_model()
+    user_ids = {e['user_id'] for e in events} | {e['sender_id'] for e in events if e['sender_id']}
+    names = dict(User.objects.filter(pk__in=user_ids).values_list('pk', 'username'))
+    # Users deleted since the event was emitted would fail the whole batch
+    events = [e for e in events if e['user_id'] in names and (e['sender_id'] is None or e['sender_id'] in names)]
+
+    groups, singles = {}, []
+    for e in events:
+        key = _group_key(e)
+        if key:
+            groups.setdefault((e['user_id'], key), []).append(e)
+        else:
+            singles.append(e)
+
+    with transaction.atomic():
+        open_rows = {}
+        if groups:
+            # One writer per recipient at a time. Locking the open rows alone
+            # isn't enough: two writers that both find none would both insert
+            # one. (A unique constraint can't do it either, since an unread row
+            # past the window is left open while a new one starts.)
+            unread.lock({user_id for user_id, _ in groups})
+            rows = Notification.objects.select_for_update().filter(
+                user_id__in={user_id for user_id, _ in groups},
+                group_key__in={key for _, key in groups},
+                read=False,
+                created_at__gte=timezone.now() - timedelta(seconds=settings.NOTIFICATION_COALESCE_WINDOW),
+            ).order_by('created_at')
+            for row in rows:
+                open_rows[(row.user_id, row.group_key)] = row  # newest wins
+
+        inserted, updated = [], []
+        for (user_id, key), group in groups.items():
+            notification = open_rows.get((user_id, key))
+            if notification is None:
+                first = group[0]
+                notification = Notification(
+                    user_id=user_id, sender_id=first['sender_id'], type=first['type'], group_key=key, count=0,
+                )
+                inserted.append(notification)
+            else:
+                updated.append(notification)
+            for e in group:
+                _add_event(notification, e, names)
+        for e in singles:
+            notification = Notification(user_id=e['user_id'], sender_id=e['sender_id'], type=e['type'], count=0)
+            _add_event(notification, e, names)
+            inserted.append(notification)
+
+        Notification.objects.bulk_create(inserted, batch_size=settings.NOTIFICATION_BATCH_SIZE)
+        unread.added('notifications', [notification.user_id for notification in inserted])
+        Notification.objects.bulk_update(
+            updated, ['count', 'actors', 'content', 'created_at', 'sender'], batch_size=settings.NOTIFICATION_BATCH_SIZE
+        )
+    touched = inserted + updated
+    transaction.on_commit(lambda: _push(touched))
+    return len(touched)
+
+
+def flush(batch_size=None):
+    """Write every spooled event to the database. Returns notifications written."""
+    batch_size = batch_size or settings.NOTIFICATION_BATCH_SIZE
+    spool = _spool()
+    written = 0
+    for path in spool.claim():
+        with spool.read(path) as events:
+            for start in range(0, len(events), batch_size):
+                written += write(events[start:start + batch_size])
+    return written
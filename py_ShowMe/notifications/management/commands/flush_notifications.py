@@ -0,0 +1,24 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from notifications import emitter
+
+
+class Command(BaseCommand):
+    help = "Write spooled notification events in batches and push them (run with --loop as a background worker)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help="Keep running, flushing every --interval seconds.")
+        parser.add_argument('--interval', type=float, default=None)
+        parser.add_argument('--batch-size', type=int, default=None)
+
+    def handle(self, *args, loop=False, interval=None, batch_size=None, **options):
+        interval = interval or settings.NOTIFICATION_FLUSH_INTERVAL
+        while True:
+            written = emitter.flush(batch_size=batch_size)
+            if written or not loop:
+                self.stdout.write(f"Wrote {written} notifications.")
+            if not loop:
+                return
+            time.sleep(interval)
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from notifications import unread
+
+
+class Command(BaseCommand):
+    help = "Recompute unread notification and message counts from the Notification and Message tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user-id', type=int, action='append', dest='user_ids', help="Only reconcile this user (repeatable).")
+
+    def handle(self, *args, user_ids=None, **options):
+        updated = unread.recount(user_ids)
+        self.stdout.write(self.style.SUCCESS(f"Reconciled {updated} unread counts."))
@@ -0,0 +1,53 @@
+# Generated by Django 5.1.7 on 2026-10-18 19:41
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def backfill_counts(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    UnreadCount = apps.get_model('notifications', 'UnreadCount')
+    Notification = apps.get_model('notifications', 'Notification')
+    Message = apps.get_model('chat', 'Message')
+
+    def count(queryset, field):
+        return Coalesce(
+            models.Subquery(
+                queryset.filter(**{field: models.OuterRef('user_id')}).order_by()
+                .values(field).annotate(n=models.Count('pk')).values('n'),
+                output_field=models.IntegerField(),
+            ),
+            models.Value(0),
+        )
+
+    UnreadCount.objects.bulk_create(
+        [UnreadCount(user_id=user_id) for user_id in User.objects.values_list('pk', flat=True)],
+        batch_size=2000,
+    )
+    UnreadCount.objects.update(
+        notifications=count(Notification.objects.filter(read=False), 'user_id'),
+        messages=count(Message.objects.filter(is_read=False), 'receiver_id'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('notifications', '0004_notification_coalescing'),
+        ('chat', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UnreadCount',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('notifications', models.PositiveIntegerField(default=0)),
+                ('messages', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(backfill_counts, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 class NotificationType(models.TextChoices):
     FOLLOW_REQUEST = 'follow_request', 'Follow Request'
@@ -24,14 +25,25 @@ class Notification(models.Model):
         choices=NotificationType.choices
     )
     content = models.TextField(blank=True, null=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Not auto_now_add: write-behind inserts keep the time the event happened.
+    # For a coalesced notification this is the time of the newest event.
+    created_at = models.DateTimeField(default=timezone.now)
     read = models.BooleanField(default=False)
+    # Coalescing (notifications/emitter.py): events with the same group_key
+    # update an unread notification from the last NOTIFICATION_COALESCE_WINDOW
+    # seconds instead of inserting. Empty group_key: never coalesced.
+    group_key = models.CharField(max_length=64, blank=True, default='')
+    count = models.PositiveIntegerField(default=1)
+    actors = models.JSONField(default=list, blank=True)  # newest first: [{"id", "username"}]
 
     class Meta:
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['user', 'read']),
+            # Keyset pages of the list endpoint, with and without ?unread=true
+            models.Index(fields=['user', 'read', '-created_at', '-id'], name='notification_unread_recent_idx'),
+            models.Index(fields=['user', '-created_at', '-id'], name='notification_user_recent_idx'),
             models.Index(fields=['type']),
+            models.Index(fields=['user', 'group_key', 'read', 'created_at'], name='notification_group_idx'),
         ]
 
     def __str__(self):
@@ -39,3 +51,15 @@ class Notification(models.Model):
         user_username = self.user.username if self.user else "Unknown User"
         print(f"Debug: Notification from {sender_username} to {user_username}")  # Debugging line
         return f'{self.type} from {sender_username} to {user_username}'
+
+
+class UnreadCount(models.Model):
+    """Per-user unread badge counts, kept by notifications/unread.py."""
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        primary_key=True,
+        related_name='+',
+        on_delete=models.CASCADE
+    )
+    notifications = models.PositiveIntegerField(default=0)
+    messages = models.PositiveIntegerField(default=0)
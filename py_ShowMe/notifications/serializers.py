@@ -9,7 +9,7 @@ class UserSerializer(serializers.ModelSerializer):
 
 class NotificationSerializer(serializers.ModelSerializer):
     sender = UserSerializer(read_only=True)  # Add this only if you want detailed sender info
-    sender_id = serializers.IntegerField(source='sender.id', read_only=True)
+    sender_id = serializers.IntegerField(read_only=True)
     sender_username = serializers.CharField(source='sender.username', read_only=True)
 
     class Meta:
@@ -23,4 +23,12 @@ class NotificationSerializer(serializers.ModelSerializer):
             'content',
             'created_at',
             'read',
+            'count',           # events folded into this notification
+            'actors',          # newest first, at most NOTIFICATION_MAX_ACTORS
         ]
+
+
+class CompactNotificationSerializer(NotificationSerializer):
+    """Same as NotificationSerializer without the nested sender block (?compact=true)."""
+    class Meta(NotificationSerializer.Meta):
+        fields = [field for field in NotificationSerializer.Meta.fields if field != 'sender']
@@ -0,0 +1,36 @@
+# notifications/signals.py
+#
+# Keeps UnreadCount (notifications/unread.py) in step with single-row
+# writes. Bulk paths (emitter.write, mark_all_read, read receipts) adjust
+# the counts themselves.
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from chat.models import Message
+from . import unread
+from .models import Notification
+
+
+@receiver(post_save, sender=Notification)
+def notification_saved(sender, instance, created, **kwargs):
+    if created and not instance.read:
+        unread.added('notifications', [instance.user_id])
+
+
+@receiver(post_delete, sender=Notification)
+def notification_deleted(sender, instance, **kwargs):
+    if not instance.read:
+        unread.removed('notifications', instance.user_id)
+
+
+@receiver(post_save, sender=Message)
+def message_saved(sender, instance, created, **kwargs):
+    if created and not instance.is_read:
+        unread.added('messages', [instance.receiver_id])
+
+
+@receiver(post_delete, sender=Message)
+def message_deleted(sender, instance, **kwargs):
+    if not instance.is_read:
+        unread.removed('messages', instance.receiver_id)
@@ -0,0 +1,112 @@
+# notifications/spool.py
+#
+# Append-only local queue for notification events (notifications/emitter.py).
+#
+# Each process appends JSON lines to its own segment, <pid>.jsonl, under
+# NOTIFICATION_SPOOL_DIR. The flusher claims a segment by renaming it to
+# <pid>.<ns>.claimed; the next append from that process creates a fresh
+# segment. Appends and reads take an exclusive flock on the file, and a
+# writer that finds its path renamed under it starts again, so no line is
+# written into a segment after it has been read.
+#
+# Appends survive a process crash once write() returns. They survive a
+# power loss only with NOTIFICATION_SPOOL_FSYNC=True.
+
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: no locking; run a single web process there
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_SUFFIX = '.jsonl'
+CLAIMED_SUFFIX = '.claimed'
+
+
+@contextmanager
+def _locked(fd):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+    try:
+        yield
+    finally:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+class Spool:
+    def __init__(self, directory, fsync=False):
+        self.directory = directory
+        self.fsync = fsync
+
+    def _segment_path(self):
+        return os.path.join(self.directory, f"{os.getpid()}{ACTIVE_SUFFIX}")
+
+    def append(self, events):
+        """Append events (JSON-serialisable dicts) to this process's segment."""
+        data = ''.join(json.dumps(event, separators=(',', ':')) + '\n' for event in events).encode()
+        if not data:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._segment_path()
+        while True:
+            fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o640)
+            try:
+                with _locked(fd):
+                    try:
+                        current = os.path.samestat(os.fstat(fd), os.stat(path))
+                    except FileNotFoundError:
+                        current = False
+                    if not current:
+                        continue  # claimed while we waited for the lock
+                    os.write(fd, data)
+                    if self.fsync:
+                        os.fsync(fd)
+                    return
+            finally:
+                os.close(fd)
+
+    def claim(self):
+        """Rename active segments for processing; returns every claimed segment, oldest first."""
+        if not os.path.isdir(self.directory):
+            return []
+        for name in os.listdir(self.directory):
+            if name.endswith(ACTIVE_SUFFIX):
+                stem = name[:-len(ACTIVE_SUFFIX)]
+                os.replace(
+                    os.path.join(self.directory, name),
+                    os.path.join(self.directory, f"{stem}.{time.time_ns()}{CLAIMED_SUFFIX}"),
+                )
+        # Leftovers from a flusher that died mid-way are picked up again here.
+        claimed = [
+            os.path.join(self.directory, name)
+            for name in os.listdir(self.directory) if name.endswith(CLAIMED_SUFFIX)
+        ]
+        return sorted(claimed, key=os.path.getmtime)
+
+    @contextmanager
+    def read(self, path):
+        """
+        Yield the events in a claimed segment, holding its lock so no late
+        writer can add to it; the segment is deleted if the block succeeds.
+        """
+        fd = os.open(path, os.O_RDWR)
+        try:
+            with _locked(fd):
+                events = []
+                with os.fdopen(os.dup(fd), 'rb') as f:
+                    for line in f:
+                        try:
+                            events.append(json.loads(line))
+                        except ValueError:
+                            logger.error("Skipping unreadable line in notification spool %s: %r", path, line[:200])
+                yield events
+                os.unlink(path)
+        finally:
+            os.close(fd)
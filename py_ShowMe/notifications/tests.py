@@ -1,3 +1,192 @@
-from django.test import TestCase
+import tempfile
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.test import override_settings
+from django.utils import timezone
+
+from ShowMe.testing import ShowMeTestCase
+from . import emitter, unread
+from .models import Notification, UnreadCount
+from .spool import Spool
+
+
+@override_settings(NOTIFICATIONS_WRITE_BEHIND=True)
+class WriteBehindTests(ShowMeTestCase):
+    def setUp(self):
+        super().setUp()
+        spool_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(spool_dir.cleanup)
+        self.enterContext(override_settings(NOTIFICATION_SPOOL_DIR=spool_dir.name))
+
+    def test_follow_is_spooled_then_flushed(self):
+        alice, bob = self.make_users('alice', 'bob')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client_for(alice).post(f'/follows/follow/{bob.id}/')
+        self.assertFalse(Notification.objects.exists())
+
+        with mock.patch.object(emitter, '_push') as push, self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(emitter.flush(), 1)
+        notification = Notification.objects.get()
+        self.assertEqual((notification.user, notification.sender, notification.type), (bob, alice, 'follow'))
+        self.assertEqual([n.pk for n in push.call_args.args[0]], [notification.pk])
+        self.assertEqual(emitter.flush(), 0)
+
+    def test_flush_keeps_event_time_and_skips_deleted_users(self):
+        alice, bob = self.make_users('alice', 'bob')
+        earlier = emitter.event(bob, "hello", sender=alice)
+        earlier['created_at'] = (timezone.now() - timedelta(minutes=5)).isoformat()
+        gone = emitter.event(bob, "bye", sender=User.objects.create_user('carol').id)
+        with self.captureOnCommitCallbacks(execute=True):
+            emitter.emit_many([earlier, gone])
+        User.objects.filter(username='carol').delete()
+
+        self.assertEqual(emitter.flush(), 1)
+        self.assertLess(Notification.objects.get().created_at, timezone.now() - timedelta(minutes=4))
+
+    def test_appends_after_a_claim_go_to_a_new_segment(self):
+        spool = emitter._spool()
+        spool.append([{'n': 1}])
+        first = spool.claim()
+        spool.append([{'n': 2}])
+        segments = spool.claim()
+        self.assertEqual(len(segments), 2)
+        read = []
+        for path in segments:
+            with spool.read(path) as events:
+                read += events
+        self.assertEqual(sorted(e['n'] for e in read), [1, 2])
+        self.assertEqual(Spool(spool.directory).claim(), [])
+        self.assertIn(first[0], segments)
+
+
+@override_settings(NOTIFICATIONS_WRITE_BEHIND=False, NOTIFICATION_MAX_ACTORS=2)
+class CoalescingTests(ShowMeTestCase):
+    def test_message_burst_is_one_row_per_sender(self):
+        alice, bob, carol = self.make_users('alice', 'bob', 'carol')
+        emitter.emit_many(
+            emitter.event(alice, f"You have a new message from {bob.username}", sender=bob, type='message')
+            for _ in range(50)
+        )
+        emitter.emit(alice, "You have a new message from carol", sender=carol, type='message')
+        rows = {n.sender.username: n for n in Notification.objects.filter(user=alice)}
+        self.assertEqual(len(rows), 2)
+        self.assertEqual((rows['bob'].count, rows['bob'].content), (50, "You have 50 new messages from bob"))
+        self.assertEqual((rows['carol'].count, rows['carol'].content), (1, "You have a new message from carol"))
+
+    def test_followers_fold_into_one_row_until_read(self):
+        alice, *followers = self.make_users('alice', 'f1', 'f2', 'f3')
+        for follower in followers:
+            emitter.emit(alice, f"{follower.username} started following you.", sender=follower, type='follow')
+        emitter.emit(alice, "f1 unfollowed you.")
+        follows = Notification.objects.get(user=alice, type='follow')
+        self.assertEqual(follows.content, "f3 and 2 others started following you.")
+        self.assertEqual([a['username'] for a in follows.actors], ['f3', 'f2'])
+        self.assertEqual(Notification.objects.filter(user=alice).count(), 2)
+
+        # Read: the next follower starts a new row
+        follows.read = True
+        follows.save()
+        emitter.emit(alice, "f1 started following you.", sender=followers[0], type='follow')
+        # Unread again but outside the window: left alone
+        Notification.objects.filter(pk=follows.pk).update(read=False, created_at=timezone.now() - timedelta(hours=2))
+        emitter.emit(alice, "f2 started following you.", sender=followers[1], type='follow')
+        self.assertEqual(
+            sorted(Notification.objects.filter(user=alice, type='follow').values_list('count', flat=True)), [2, 3]
+        )
+
+
+    def test_writers_are_serialized_per_recipient(self):
+        alice, bob, carol = self.make_users('alice', 'bob', 'carol')
+        with mock.patch.object(unread, 'lock', wraps=unread.lock) as lock:
+            emitter.write([
+                emitter.event(carol, "bob started following you.", sender=bob, type='follow'),
+                emitter.event(alice, "carol started following you.", sender=carol, type='follow'),
+                emitter.event(alice, "bob unfollowed you."),
+            ])
+        self.assertEqual(sorted(lock.call_args.args[0]), [alice.id, carol.id])
+        self.assertEqual(sorted(UnreadCount.objects.values_list('user_id', 'notifications')), [(alice.id, 2), (carol.id, 1)])
+
+@override_settings(NOTIFICATIONS_WRITE_BEHIND=False)
+class UnreadCountTests(ShowMeTestCase):
+    def badge(self):
+        with self.assertNumQueries(1):
+            return self.client.get('/notifications/notifications/unread-count/').data
+
+    def test_counts_follow_reads_and_receipts(self):
+        alice, bob, carol = self.make_users('alice', 'bob', 'carol')
+        self.client = self.client_for(alice)
+        for sender in (bob, carol):
+            emitter.emit(alice, "follow", sender=sender, type='follow')  # coalesced: one unread row
+        sender_client = self.client_for(bob)
+        for text in ("hi", "there"):
+            sender_client.post('/chat/send/', {'receiver_username': 'alice', 'content': text}, format='json')
+        self.assertEqual(self.badge(), {'notifications': 2, 'messages': 2})
+
+        message_row = Notification.objects.get(user=alice, type='message')
+        for _ in range(2):
+            self.client.post(f'/notifications/notifications/{message_row.pk}/read/')
+        self.assertEqual(self.badge(), {'notifications': 1, 'messages': 2})
+
+        self.assertEqual(self.client.post('/chat/conversation/bob/read/').data, {'read': 2})
+        self.client.post('/notifications/notifications/mark-all-read/')
+        self.assertEqual(self.badge(), {'notifications': 0, 'messages': 0})
+
+        UnreadCount.objects.update(notifications=40, messages=7)
+        Notification.objects.filter(pk=message_row.pk).update(read=False)
+        unread.recount()
+        self.assertEqual(self.badge(), {'notifications': 1, 'messages': 0})
+
+
+    def test_push_failures_are_logged_after_commit(self):
+        alice, bob = self.make_users('alice', 'bob')
+        self.client = self.client_for(alice)
+        layer = mock.Mock(group_send=mock.AsyncMock(side_effect=ConnectionError("redis down")))
+        spool_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(spool_dir.cleanup)
+        with mock.patch.object(unread, 'get_channel_layer', return_value=layer), \
+                mock.patch.object(emitter, 'get_channel_layer', return_value=layer), \
+                self.assertLogs('notifications', 'ERROR') as logs:
+            with self.captureOnCommitCallbacks(execute=True):
+                sent = self.client_for(bob).post('/chat/send/', {'receiver_username': 'alice', 'content': 'hi'}, format='json')
+            self.assertEqual(sent.status_code, 201)
+            row = Notification.objects.get(user=alice)
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(self.client.post(f'/notifications/notifications/{row.pk}/read/').status_code, 200)
+
+            with override_settings(NOTIFICATIONS_WRITE_BEHIND=True, NOTIFICATION_SPOOL_DIR=spool_dir.name):
+                with self.captureOnCommitCallbacks(execute=True):
+                    emitter.emit(alice, "follow", sender=bob, type='follow')
+                self.assertEqual(emitter.flush(), 1)
+                self.assertEqual(emitter.flush(), 0)  # the segment was removed, not replayed
+        self.assertIn("Could not push unread counts for user", logs.output[0])
+        self.assertEqual(Notification.objects.filter(user=alice, type='follow').count(), 1)
+        self.assertEqual(self.badge(), {'notifications': 1, 'messages': 1})
+
+class NotificationListTests(ShowMeTestCase):
+    def test_cursor_pages_in_one_query_each(self):
+        alice, bob = self.make_users('alice', 'bob')
+        now = timezone.now()
+        # Same timestamp for a few rows: ties are broken by id
+        Notification.objects.bulk_create(
+            Notification(user=alice, sender=bob, type='message', content=str(i), created_at=now - timedelta(seconds=i // 3))
+            for i in range(7)
+        )
+        client = self.client_for(alice)
+
+        seen, cursor = [], ''
+        while True:
+            with self.assertNumQueries(1):
+                page = client.get('/notifications/notifications/', {'page_size': 3, 'cursor': cursor}).data
+            seen += page['results']
+            cursor = page['next']
+            if not cursor:
+                break
+        self.assertEqual([n['content'] for n in seen], ['2', '1', '0', '5', '4', '3', '6'])
+        self.assertEqual(seen[0]['sender'], {'id': bob.id, 'username': 'bob'})
+
+        compact = client.get('/notifications/notifications/', {'page_size': 1, 'compact': 'true'}).data['results'][0]
+        self.assertNotIn('sender', compact)
+        self.assertEqual((compact['sender_id'], compact['sender_username']), (bob.id, 'bob'))
+        self.assertEqual(client.get('/notifications/notifications/', {'cursor': 'nope'}).status_code, 400)
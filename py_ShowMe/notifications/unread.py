@@ -0,0 +1,132 @@
+# notifications/unread.py
+#
+# Unread notification and message counts for the badge, one UnreadCount row
+# per user, so reading them is a primary-key lookup however long the
+# history is. Counts are adjusted with F() expressions in the same
+# transaction as the change:
+#
+#   notifications  +1 per new unread row (emitter.write, Notification
+#                  post_save); -1 on read, -n on mark_all_read, -1 when an
+#                  unread row is deleted. Coalescing into an unread row
+#                  doesn't change the count.
+#   messages       +1 per new Message; -n on a read receipt; -1 when an
+#                  unread message is deleted.
+#
+# Every change pushes an "unread_count" event to user_notifications_<id>
+# after commit; a failed push is logged and the badge catches up on the next
+# change or page load. manage.py reconcile_unread_counts recomputes the counts
+# from the tables if they drift.
+
+import logging
+from collections import Counter
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from chat.models import Message
+from .models import Notification, UnreadCount
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ('notifications', 'messages')
+
+
+def adjust(field, deltas):
+    """Apply {user_id: delta} to field with one UPDATE per distinct delta."""
+    deltas = {user_id: delta for user_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    UnreadCount.objects.bulk_create(
+        [UnreadCount(user_id=user_id) for user_id in deltas], ignore_conflicts=True
+    )
+    by_delta = {}
+    for user_id, delta in deltas.items():
+        by_delta.setdefault(delta, []).append(user_id)
+    for delta, user_ids in by_delta.items():
+        rows = UnreadCount.objects.filter(user_id__in=user_ids)
+        if delta < 0:
+            # Never go below zero if a count has drifted
+            rows = rows.filter(**{f'{field}__gte': -delta})
+        rows.update(**{field: F(field) + delta})
+    user_ids = list(deltas)
+    transaction.on_commit(lambda: push(user_ids))
+
+
+def lock(user_ids):
+    """
+    Lock the users' UnreadCount rows, creating them first, in user id order
+    so concurrent callers can't deadlock. Call inside a transaction.
+    """
+    user_ids = sorted(set(user_ids))
+    UnreadCount.objects.bulk_create([UnreadCount(user_id=user_id) for user_id in user_ids], ignore_conflicts=True)
+    list(UnreadCount.objects.select_for_update().filter(user_id__in=user_ids).order_by('user_id').values_list('pk'))
+
+
+def added(field, user_ids):
+    """One more unread item for each user id (repeats count)."""
+    adjust(field, Counter(user_ids))
+
+
+def removed(field, user_id, n=1):
+    adjust(field, {user_id: -n})
+
+
+def counts_for(user_id):
+    """{'notifications', 'messages'} for a user; zeros before their first change."""
+    return UnreadCount.objects.filter(user_id=user_id).values(*FIELDS).first() or dict.fromkeys(FIELDS, 0)
+
+
+def push(user_ids):
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    counts = {row['user_id']: row for row in UnreadCount.objects.filter(user_id__in=user_ids).values('user_id', *FIELDS)}
+    send = async_to_sync(channel_layer.group_send)
+    for user_id in user_ids:
+        row = counts.get(user_id, dict.fromkeys(FIELDS, 0))
+        try:
+            send(f'user_notifications_{user_id}', {
+                'type': 'send_unread_count',
+                'notifications': row['notifications'],
+                'messages': row['messages'],
+            })
+        except Exception:
+            # Runs after commit: a channel layer outage mustn't fail the request
+            logger.exception("Could not push unread counts for user %s", user_id)
+
+
+def _count(queryset, group_field):
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{group_field: OuterRef('user_id')})
+            .order_by()
+            .values(group_field)
+            .annotate(n=Count('pk'))
+            .values('n'),
+            output_field=IntegerField(),
+        ),
+        Value(0),
+    )
+
+
+def recount(user_ids=None):
+    """Recompute counts from the Notification and Message tables. Returns rows updated."""
+    users = get_user_model().objects.all()
+    if user_ids is not None:
+        users = users.filter(pk__in=user_ids)
+    UnreadCount.objects.bulk_create(
+        [UnreadCount(user_id=user_id) for user_id in users.values_list('pk', flat=True).iterator()],
+        ignore_conflicts=True,
+        batch_size=2000,
+    )
+    rows = UnreadCount.objects.all()
+    if user_ids is not None:
+        rows = rows.filter(user_id__in=user_ids)
+    return rows.update(
+        notifications=_count(Notification.objects.filter(read=False), 'user_id'),
+        messages=_count(Message.objects.filter(is_read=False), 'receiver_id'),
+    )
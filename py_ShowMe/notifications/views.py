@@ -2,8 +2,11 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.db import transaction
+from . import unread
 from .models import Notification
-from .serializers import NotificationSerializer
+from .serializers import CompactNotificationSerializer, NotificationSerializer
+from posts.pagination import InvalidCursor, get_page_size, paginate_by_cursor, wants_pagination
 from .consumers import NotificationConsumer
 import asyncio
 
@@ -14,8 +17,11 @@ class NotificationViewSet(viewsets.ViewSet):
         """
         Retrieve the current user's notifications with optional filters.
         Supports: ?unread=true&type=message
+        Cursor-paginated mode: ?page_size=20&cursor=<next>, returning
+        {"results": [...], "next": <cursor or null>}, newest first.
+        ?compact=true leaves out the nested sender block.
         """
-        notifications = Notification.objects.filter(user=request.user)
+        notifications = Notification.objects.filter(user=request.user).select_related('sender')
 
         notif_type = request.query_params.get('type')
         unread_only = request.query_params.get('unread') == 'true'
@@ -25,7 +31,24 @@ class NotificationViewSet(viewsets.ViewSet):
         if unread_only:
             notifications = notifications.filter(read=False)
 
-        serializer = NotificationSerializer(notifications, many=True)
+        if request.query_params.get('compact') == 'true':
+            serializer_class = CompactNotificationSerializer
+        else:
+            serializer_class = NotificationSerializer
+
+        if wants_pagination(request):
+            try:
+                notifications, next_cursor = paginate_by_cursor(
+                    notifications,
+                    cursor=request.query_params.get('cursor'),
+                    page_size=get_page_size(request),
+                )
+            except InvalidCursor as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            serializer = serializer_class(notifications, many=True)
+            return Response({"results": serializer.data, "next": next_cursor})
+
+        serializer = serializer_class(notifications, many=True)
         return Response(serializer.data)
 
     @action(detail=True, methods=['POST'])
@@ -33,22 +56,33 @@ class NotificationViewSet(viewsets.ViewSet):
         """
         Mark a specific notification as read.
         """
-        try:
-            notification = Notification.objects.get(pk=pk, user=request.user)
-            notification.read = True
-            notification.save()
-            return Response({'status': 'Notification marked as read.'}, status=status.HTTP_200_OK)
-        except Notification.DoesNotExist:
-            return Response({'status': 'Notification not found.'}, status=status.HTTP_404_NOT_FOUND)
+        notifications = Notification.objects.filter(pk=pk, user=request.user)
+        with transaction.atomic():
+            # Only the request that flips it decrements the badge
+            if notifications.filter(read=False).update(read=True):
+                unread.removed('notifications', request.user.id)
+            elif not notifications.exists():
+                return Response({'status': 'Notification not found.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response({'status': 'Notification marked as read.'}, status=status.HTTP_200_OK)
 
     @action(detail=False, methods=['POST'])
     def mark_all_read(self, request):
         """
         Mark all of the current user's notifications as read.
         """
-        Notification.objects.filter(user=request.user, read=False).update(read=True)
+        with transaction.atomic():
+            marked = Notification.objects.filter(user=request.user, read=False).update(read=True)
+            unread.removed('notifications', request.user.id, marked)
         return Response({'status': 'All notifications marked as read.'}, status=status.HTTP_200_OK)
 
+    @action(detail=False, methods=['GET'], url_path='unread-count')
+    def unread_count(self, request):
+        """
+        Badge counts: {"notifications": n, "messages": n}. One primary-key
+        lookup, whatever the size of the history.
+        """
+        return Response(unread.counts_for(request.user.id))
+
     @action(detail=False, methods=['POST'])
     def create_notification(self, request):
         """
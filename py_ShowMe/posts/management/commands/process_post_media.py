@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+from posts.models import Post
+from posts import processing
+
+
+class Command(BaseCommand):
+    help = "Build (or rebuild) image derivatives and video renditions for posts that are pending or failed."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="Reprocess every media post, not just pending/failed ones.")
+        parser.add_argument('--stale', action='store_true',
+                            help="Only posts left pending longer than MEDIA_PROCESS_STALE_AFTER (lost background jobs).")
+        parser.add_argument('--loop', action='store_true', help="With --stale: keep sweeping every --interval seconds.")
+        parser.add_argument('--interval', type=float, default=300.0)
+
+    def handle(self, *args, **options):
+        if options['stale']:
+            while True:
+                images, videos = processing.stale_pending()
+                self.process(images, videos)
+                if not options['loop']:
+                    return
+                time.sleep(options['interval'])
+
+        unfinished = [Post.MEDIA_PENDING, Post.MEDIA_FAILED, '']
+
+        images = Post.objects.exclude(image='').exclude(image__isnull=True)
+        videos = Post.objects.exclude(video='').exclude(video__isnull=True)
+        if not options['all']:
+            images = images.filter(image_status__in=unfinished)
+            videos = videos.filter(video_status__in=unfinished)
+        self.process(images.values_list('id', flat=True).iterator(), videos.values_list('id', flat=True).iterator())
+
+    def process(self, image_post_ids, video_post_ids):
+        count = 0
+        for post_id in image_post_ids:
+            processing.build_image_derivatives(post_id)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f"Processed images for {count} posts."))
+
+        count = 0
+        for post_id in video_post_ids:
+            processing.build_video_assets(post_id)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f"Processed videos for {count} posts."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from posts import uploads
+
+
+class Command(BaseCommand):
+    help = "Delete chunked upload sessions (and their parts on disk) older than CHUNKED_UPLOAD_EXPIRY_HOURS."
+
+    def handle(self, *args, **options):
+        count = 0
+        for session in uploads.expired_sessions().iterator():
+            uploads.discard_session_files(session)
+            session.delete()
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f"Purged {count} expired upload sessions."))
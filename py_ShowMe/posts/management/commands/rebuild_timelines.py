@@ -0,0 +1,26 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from posts import timeline
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Rebuild materialized home timelines from the Post, Follow and Profile tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', action='append', dest='usernames', help="Only rebuild this user's timeline (repeatable).")
+
+    def handle(self, *args, usernames=None, **options):
+        users = User.objects.all()
+        if usernames:
+            users = users.filter(username__in=usernames)
+        else:
+            timeline.rebuild_public_timeline()
+            self.stdout.write("Rebuilt shared public timeline.")
+
+        count = 0
+        for user_id in users.values_list('id', flat=True).iterator():
+            timeline.rebuild_timeline(user_id)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} personal timelines."))
@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+from posts import timeline
+
+
+class Command(BaseCommand):
+    help = "Cut personal home timelines back to TIMELINE_MAX_LENGTH entries (run with --loop as a background worker)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help="Keep running, trimming every --interval seconds.")
+        parser.add_argument('--interval', type=float, default=60.0)
+
+    def handle(self, *args, loop=False, interval=60.0, **options):
+        while True:
+            deleted = timeline.trim_timelines()
+            if deleted or not loop:
+                self.stdout.write(f"Trimmed {deleted} timeline entries.")
+            if not loop:
+                return
+            time.sleep(interval)
@@ -0,0 +1,44 @@
+# Generated by Django 5.1.7 on 2026-10-18 18:29
+
+from django.db import migrations, models
+
+
+def backfill_author_snapshot(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    User = apps.get_model('auth', 'User')
+    Profile = apps.get_model('userProfile', 'Profile')
+
+    Post.objects.update(
+        author_username=models.Subquery(
+            User.objects.filter(pk=models.OuterRef('user_id')).values('username')[:1]
+        )
+    )
+    for profile in Profile.objects.exclude(profile_pic='').exclude(profile_pic__isnull=True).iterator():
+        url = profile.profile_pic.url
+        if url.startswith("https//"):
+            url = url.replace("https//", "https://")
+        elif url.startswith("http//"):
+            url = url.replace("http//", "http://")
+        Post.objects.filter(user_id=profile.user_id).update(author_profile_pic=url)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0003_timelineentry'),
+        ('userProfile', '0003_profile_is_celebrity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='author_profile_pic',
+            field=models.CharField(blank=True, default='', max_length=500),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='author_username',
+            field=models.CharField(blank=True, default='', max_length=150),
+        ),
+        migrations.RunPython(backfill_author_snapshot, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.1.7 on 2026-10-18 20:01
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def drop_duplicate_shared_entries(apps, schema_editor):
+    TimelineEntry = apps.get_model('posts', 'TimelineEntry')
+    shared = TimelineEntry.objects.filter(owner__isnull=True)
+    keep = shared.values('post_id').annotate(keep=Min('id')).values('keep')
+    shared.exclude(id__in=keep).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_upload_sessions'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_shared_entries, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='timelineentry',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='timelineentry',
+            constraint=models.UniqueConstraint(condition=models.Q(('owner__isnull', False)), fields=('owner', 'post'), name='timeline_owner_post_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='timelineentry',
+            constraint=models.UniqueConstraint(condition=models.Q(('owner__isnull', True)), fields=('post',), name='timeline_shared_post_uniq'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def store_profile_pic_names(apps, schema_editor):
+    # author_profile_pic held a resolved (possibly signed) URL; store the storage name instead
+    Post = apps.get_model('posts', 'Post')
+    Profile = apps.get_model('userProfile', 'Profile')
+    Post.objects.update(
+        author_profile_pic=Coalesce(
+            models.Subquery(Profile.objects.filter(user_id=models.OuterRef('user_id')).values('profile_pic')[:1]),
+            models.Value(''),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_timeline_unique_constraints'),
+        ('userProfile', '0004_profile_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(store_profile_pic_names, migrations.RunPython.noop),
+    ]
@@ -3,6 +3,41 @@ from django.db import models
 # Create your models here.
 from django.db import models
 from django.conf import settings
+from mediafiles.resolver import storage_url
+import uuid
+
+class PostQuerySet(models.QuerySet):
+    def visible_to(self, user):
+        """
+        Posts the given user may see: public authors, their own posts, and
+        authors they follow with an accepted request. Resolved entirely in SQL.
+        Anonymous users see public authors only.
+        """
+        from follows.models import Follow
+        from userProfile.models import Profile
+
+        if not user.is_authenticated:
+            return self.filter(user__profile__privacy=Profile.PUBLIC)
+        accepted_follow = Follow.objects.filter(
+            follower=user,
+            following=models.OuterRef('user'),
+            accepted=True,
+        )
+        return self.filter(
+            models.Q(user__profile__privacy=Profile.PUBLIC) |
+            models.Q(user=user) |
+            models.Exists(accepted_follow)
+        )
+
+    def refresh_author_snapshot(self, user):
+        """Rewrite the denormalized author card on every post by this user in one UPDATE."""
+        snapshot = Post.author_snapshot(user)
+        return (
+            self.filter(user=user)
+            .exclude(**snapshot)
+            .update(**snapshot)
+        )
+
 
 class Post(models.Model):
     TEXT = 'text'
@@ -15,6 +50,16 @@ class Post(models.Model):
         (VIDEO, 'Video'),
     ]
 
+    MEDIA_PENDING = 'pending'
+    MEDIA_READY = 'ready'
+    MEDIA_FAILED = 'failed'
+
+    MEDIA_STATUSES = [
+        (MEDIA_PENDING, 'Pending'),
+        (MEDIA_READY, 'Ready'),
+        (MEDIA_FAILED, 'Failed'),
+    ]
+
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     post_type = models.CharField(max_length=10, choices=POST_TYPES, default=TEXT)
     text_content = models.TextField(blank=True, null=True)
@@ -22,7 +67,54 @@ class Post(models.Model):
     video = models.FileField(upload_to='post_videos/', blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Resized copies of `image` ({"thumb": <storage name>, ...}), see posts/processing.py
+    image_variants = models.JSONField(default=dict, blank=True)
+    image_status = models.CharField(max_length=10, choices=MEDIA_STATUSES, blank=True, default='')
+
+    # Video processing results: {"poster": name, "playlist": name, "segments": [names]}
+    video_assets = models.JSONField(default=dict, blank=True)
+    video_status = models.CharField(max_length=10, choices=MEDIA_STATUSES, blank=True, default='')
+    video_duration = models.FloatField(null=True, blank=True)  # seconds
+    video_width = models.PositiveIntegerField(null=True, blank=True)
+    video_height = models.PositiveIntegerField(null=True, blank=True)
+
+    # Author card snapshot so feeds serialize without touching User/Profile.
+    # Kept current by posts.signals when the user or profile changes. The
+    # picture is stored as its storage name and resolved when serialized,
+    # since the URL may be signed and expire.
+    author_username = models.CharField(max_length=150, blank=True, default='')
+    author_profile_pic = models.CharField(max_length=500, blank=True, default='')
+
+    objects = PostQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Keyset pagination on (created_at, id), globally and per author
+            models.Index(fields=['-created_at', '-id'], name='post_created_id_idx'),
+            models.Index(fields=['user', '-created_at', '-id'], name='post_user_created_id_idx'),
+        ]
+
+    @staticmethod
+    def author_snapshot(user):
+        profile = getattr(user, 'profile', None)
+        return {
+            'author_username': user.username,
+            'author_profile_pic': (profile.profile_pic.name if profile else None) or '',
+        }
+
+    def author_profile_pic_url(self):
+        from userProfile.models import Profile
+
+        return storage_url(Profile._meta.get_field('profile_pic').storage, self.author_profile_pic)
+
     def save(self, *args, **kwargs):
+        if self._state.adding and not self.author_username:
+            for attr, value in self.author_snapshot(self.user).items():
+                setattr(self, attr, value)
+        if self._state.adding and self.image:
+            self.image_status = self.MEDIA_PENDING
+        if self._state.adding and self.video:
+            self.video_status = self.MEDIA_PENDING
         if self.video:
             self.post_type = self.VIDEO
         elif self.image:
@@ -35,3 +127,73 @@ class Post(models.Model):
 
     def __str__(self):
         return f"{self.user.username} - {self.post_type} ({self.created_at})"
+
+
+class TimelineEntry(models.Model):
+    """
+    Materialized home-timeline row. owner=NULL is the shared timeline that
+    holds posts from public authors; everyone reads it alongside their own.
+    """
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='timeline_entries', on_delete=models.CASCADE, null=True)
+    post = models.ForeignKey(Post, related_name='timeline_entries', on_delete=models.CASCADE)
+    post_created_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            # NULLs never compare equal, so the shared timeline needs its own constraint
+            models.UniqueConstraint(
+                fields=['owner', 'post'], condition=models.Q(owner__isnull=False), name='timeline_owner_post_uniq'
+            ),
+            models.UniqueConstraint(
+                fields=['post'], condition=models.Q(owner__isnull=True), name='timeline_shared_post_uniq'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['owner', '-post_created_at', '-post'], name='timeline_owner_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.owner_id or 'public'} ← post {self.post_id}"
+
+
+class UploadSession(models.Model):
+    """Resumable chunked upload of a large post video, see posts/uploads.py."""
+    OPEN = 'open'
+    COMPLETE = 'complete'
+
+    STATUSES = [
+        (OPEN, 'Open'),
+        (COMPLETE, 'Complete'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='upload_sessions', on_delete=models.CASCADE)
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100)
+    total_size = models.BigIntegerField()
+    chunk_size = models.PositiveIntegerField()
+    status = models.CharField(max_length=10, choices=STATUSES, default=OPEN)
+    post = models.ForeignKey(Post, related_name='+', on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    @property
+    def total_chunks(self):
+        return -(-self.total_size // self.chunk_size)
+
+    def expected_chunk_size(self, index):
+        if index == self.total_chunks - 1:
+            return self.total_size - self.chunk_size * index
+        return self.chunk_size
+
+    def __str__(self):
+        return f"{self.user_id} - {self.filename} ({self.status})"
+
+
+class UploadChunk(models.Model):
+    session = models.ForeignKey(UploadSession, related_name='chunks', on_delete=models.CASCADE)
+    index = models.PositiveIntegerField()
+    size = models.PositiveIntegerField()
+    sha256 = models.CharField(max_length=64)
+
+    class Meta:
+        unique_together = ('session', 'index')
@@ -0,0 +1,76 @@
+# posts/pagination.py
+
+import base64
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(created_at, pk):
+    """Opaque cursor for the (created_at, id) position of the last row on a page."""
+    raw = f"{created_at.isoformat()}|{pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_raw, pk_raw = base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+        created_at = parse_datetime(created_raw)
+        pk = int(pk_raw)
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidCursor("Invalid cursor.")
+    if created_at is None:
+        raise InvalidCursor("Invalid cursor.")
+    return created_at, pk
+
+
+def wants_pagination(request):
+    return 'cursor' in request.query_params or 'page_size' in request.query_params
+
+
+def get_page_size(request, default=None):
+    default = default or settings.FEED_PAGE_SIZE
+    try:
+        page_size = int(request.query_params.get('page_size', default))
+    except (TypeError, ValueError):
+        page_size = default
+    return max(1, min(page_size, settings.FEED_MAX_PAGE_SIZE))
+
+
+def paginate_by_cursor(queryset, cursor=None, page_size=None, created_field='created_at', id_field='id'):
+    """
+    Keyset pagination over (created_field, id_field), newest first.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    page_size = page_size or settings.FEED_PAGE_SIZE
+
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(**{f'{created_field}__lt': created_at}) |
+            Q(**{created_field: created_at, f'{id_field}__lt': pk})
+        )
+
+    rows = list(queryset.order_by(f'-{created_field}', f'-{id_field}')[:page_size + 1])
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor(_value(last, created_field), _value(last, id_field))
+    return rows, next_cursor
+
+
+def _value(row, field):
+    # Support both model instances and .values() dicts, and "post__created_at" style lookups.
+    if isinstance(row, dict):
+        return row[field]
+    for part in field.split('__'):
+        row = getattr(row, part)
+    return row
@@ -0,0 +1,276 @@
+# posts/processing.py
+#
+# Background media processing for posts. Work is handed off after the
+# request's transaction commits: a small thread pool does the storage I/O and
+# DB updates, and CPU-heavy encoding runs in a process pool. Posts are visible
+# right away; serializers fall back to the original file until the
+# derivatives are recorded.
+#
+# The pools live in the web process, so queued work is lost on a restart.
+# `manage.py process_post_media --stale --loop` re-runs posts left pending
+# for longer than MEDIA_PROCESS_STALE_AFTER.
+
+import io
+import json
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from mediafiles.resolver import media_url, storage_url
+from profileview import cache as profile_cache
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+_process_pool = None
+_dispatcher = None
+
+
+def _pools():
+    global _process_pool, _dispatcher
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=settings.MEDIA_PROCESS_WORKERS)
+        _dispatcher = ThreadPoolExecutor(max_workers=settings.MEDIA_PROCESS_WORKERS, thread_name_prefix='post-media')
+    return _process_pool, _dispatcher
+
+
+def render_image_derivatives(data, widths, quality):
+    """
+    Pure function run in the process pool: decode once, then emit a
+    progressive JPEG per {name: max_width}. EXIF orientation is applied and
+    all metadata is dropped. Transparent areas come out white.
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(data)) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode in ('RGBA', 'LA', 'PA') or (image.mode == 'P' and 'transparency' in image.info):
+            rgba = image.convert('RGBA')
+            image = Image.new('RGB', rgba.size, 'white')
+            image.paste(rgba, mask=rgba.getchannel('A'))
+        elif image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+
+        rendered = {}
+        for name, max_width in widths.items():
+            variant = image
+            if image.width > max_width:
+                height = max(1, round(image.height * max_width / image.width))
+                variant = image.resize((max_width, height), Image.LANCZOS)
+            out = io.BytesIO()
+            variant.save(out, 'JPEG', quality=quality, optimize=True, progressive=True)
+            rendered[name] = out.getvalue()
+        return rendered
+
+
+def build_image_derivatives(post_id):
+    """Create and record the derivative set for one post. Safe to re-run."""
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None or not post.image:
+        return
+
+    try:
+        with post.image.open('rb') as source:
+            data = source.read()
+        process_pool, _ = _pools()
+        rendered = process_pool.submit(
+            render_image_derivatives, data, settings.POST_IMAGE_DERIVATIVES, settings.POST_IMAGE_QUALITY
+        ).result()
+
+        storage = post.image.storage
+        variants = {}
+        for name, content in rendered.items():
+            path = f"post_images/derivatives/{post.pk}/{name}.jpg"
+            if storage.exists(path):
+                storage.delete(path)
+            variants[name] = storage.save(path, ContentFile(content))
+    except Exception:
+        logger.exception("Image derivatives failed for post %s", post_id)
+        Post.objects.filter(pk=post_id).update(image_status=Post.MEDIA_FAILED)
+        return
+
+    Post.objects.filter(pk=post_id).update(image_variants=variants, image_status=Post.MEDIA_READY)
+    profile_cache.profile_changed(post.user_id)
+
+
+def _run_in_background(func, post_id):
+    def job():
+        close_old_connections()
+        try:
+            func(post_id)
+        except Exception:
+            # The future is never read; log instead of losing the error
+            logger.exception("Background %s failed for post %s", func.__name__, post_id)
+        finally:
+            # Worker threads own their connection; don't leak it.
+            connection.close()
+
+    _, dispatcher = _pools()
+    dispatcher.submit(job)
+
+
+def schedule_image_derivatives(post):
+    transaction.on_commit(lambda: _run_in_background(build_image_derivatives, post.pk))
+
+
+def probe_video(path):
+    """Duration (seconds), width and height of the first video stream, via ffprobe."""
+    output = subprocess.run(
+        [
+            settings.FFPROBE_BINARY, '-v', 'error', '-select_streams', 'v:0',
+            '-show_entries', 'stream=width,height:format=duration', '-of', 'json', path,
+        ],
+        capture_output=True, check=True, text=True,
+    ).stdout
+    info = json.loads(output)
+    stream = (info.get('streams') or [{}])[0]
+    duration = info.get('format', {}).get('duration')
+    return {
+        'duration': float(duration) if duration else None,
+        'width': stream.get('width'),
+        'height': stream.get('height'),
+    }
+
+
+def render_video_assets(source_path, work_dir, duration):
+    """Write poster.jpg and an HLS VOD rendition (index.m3u8 + segments) into work_dir."""
+    poster_at = min(1.0, duration / 2) if duration else 0
+    scale = f"scale=-2:'min({settings.POST_VIDEO_MAX_HEIGHT},ih)'"
+
+    subprocess.run(
+        [
+            settings.FFMPEG_BINARY, '-v', 'error', '-y', '-ss', str(poster_at), '-i', source_path,
+            '-frames:v', '1', '-vf', scale, '-q:v', '3', os.path.join(work_dir, 'poster.jpg'),
+        ],
+        check=True, capture_output=True,
+    )
+    subprocess.run(
+        [
+            settings.FFMPEG_BINARY, '-v', 'error', '-y', '-i', source_path,
+            '-vf', scale, '-c:v', 'libx264', '-preset', 'veryfast', '-crf', '23',
+            # Keyframe at every segment boundary so segments cut where asked
+            '-force_key_frames', f"expr:gte(t,n_forced*{settings.POST_VIDEO_HLS_SEGMENT_SECONDS})",
+            '-c:a', 'aac', '-b:a', '128k',
+            '-f', 'hls', '-hls_time', str(settings.POST_VIDEO_HLS_SEGMENT_SECONDS),
+            '-hls_playlist_type', 'vod',
+            '-hls_segment_filename', os.path.join(work_dir, 'segment_%04d.ts'),
+            os.path.join(work_dir, 'index.m3u8'),
+        ],
+        check=True, capture_output=True,
+    )
+
+
+def build_video_assets(post_id):
+    """Poster frame, metadata and HLS rendition for one video post. Safe to re-run."""
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None or not post.video:
+        return
+
+    storage = post.video.storage
+    prefix = f"post_videos/hls/{post.pk}"
+    work_dir = tempfile.mkdtemp(prefix=f'post-video-{post.pk}-')
+    try:
+        source_path = os.path.join(work_dir, 'source')
+        with post.video.open('rb') as source, open(source_path, 'wb') as target:
+            shutil.copyfileobj(source, target, length=1024 * 1024)
+
+        meta = probe_video(source_path)
+        out_dir = os.path.join(work_dir, 'out')
+        os.mkdir(out_dir)
+        render_video_assets(source_path, out_dir, meta['duration'])
+
+        # Segment names must stay as written: the playlist references them relatively.
+        assets = {'segments': []}
+        for filename in sorted(os.listdir(out_dir)):
+            path = f"{prefix}/{filename}"
+            if storage.exists(path):
+                storage.delete(path)
+            with open(os.path.join(out_dir, filename), 'rb') as fh:
+                saved = storage.save(path, File(fh))
+            if filename == 'poster.jpg':
+                assets['poster'] = saved
+            elif filename == 'index.m3u8':
+                assets['playlist'] = saved
+            else:
+                assets['segments'].append(saved)
+    except Exception:
+        logger.exception("Video processing failed for post %s", post_id)
+        Post.objects.filter(pk=post_id).update(video_status=Post.MEDIA_FAILED)
+        return
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    Post.objects.filter(pk=post_id).update(
+        video_assets=assets,
+        video_status=Post.MEDIA_READY,
+        video_duration=meta['duration'],
+        video_width=meta['width'],
+        video_height=meta['height'],
+    )
+    profile_cache.profile_changed(post.user_id)
+
+
+def schedule_video_assets(post):
+    transaction.on_commit(lambda: _run_in_background(build_video_assets, post.pk))
+
+
+def stale_pending(older_than=None):
+    """
+    (image post ids, video post ids) of posts whose media is still pending
+    older_than seconds (default MEDIA_PROCESS_STALE_AFTER) after creation.
+    """
+    cutoff = timezone.now() - timedelta(seconds=older_than or settings.MEDIA_PROCESS_STALE_AFTER)
+    posts = Post.objects.filter(created_at__lt=cutoff)
+    return (
+        list(posts.filter(image_status=Post.MEDIA_PENDING).exclude(image='').values_list('id', flat=True)),
+        list(posts.filter(video_status=Post.MEDIA_PENDING).exclude(video='').values_list('id', flat=True)),
+    )
+
+
+def image_srcset(post):
+    """{variant: url} for the post image, falling back to the original until derivatives are ready."""
+    if not post.image:
+        return None
+    original = media_url(post.image)
+    if post.image_status != Post.MEDIA_READY:
+        return {name: original for name in settings.POST_IMAGE_DERIVATIVES}
+    storage = post.image.storage
+    return {
+        name: storage_url(storage, post.image_variants[name]) if name in post.image_variants else original
+        for name in settings.POST_IMAGE_DERIVATIVES
+    }
+
+
+def video_meta(post):
+    """Playback info for the feed; poster/stream stay None until processing is done."""
+    if not post.video:
+        return None
+    assets = post.video_assets or {}
+    storage = post.video.storage
+    return {
+        'status': post.video_status,
+        'poster': storage_url(storage, assets.get('poster')),
+        'stream': storage_url(storage, assets.get('playlist')),
+        'duration': post.video_duration,
+        'width': post.video_width,
+        'height': post.video_height,
+    }
+
+
+def derivative_names(post):
+    """Storage names of every file generated from the post's original media."""
+    names = list((post.image_variants or {}).values())
+    assets = post.video_assets or {}
+    names += [assets[key] for key in ('poster', 'playlist') if assets.get(key)]
+    names += assets.get('segments', [])
+    return names
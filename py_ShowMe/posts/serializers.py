@@ -1,30 +1,33 @@
 from rest_framework import serializers
+from mediafiles.fields import MediaFileField, MediaImageField
 from .models import Post
+from .processing import image_srcset, video_meta
 
 class PostSerializer(serializers.ModelSerializer):
-    user = serializers.ReadOnlyField(source='user.username')
-    user_id = serializers.ReadOnlyField(source='user.id')
+    # Author fields come from the snapshot columns on Post, not from User/Profile
+    user = serializers.ReadOnlyField(source='author_username')
+    user_id = serializers.ReadOnlyField()
     profile_pic = serializers.SerializerMethodField()
+    image = MediaImageField(required=False, allow_null=True)
+    video = MediaFileField(required=False, allow_null=True)
+    image_srcset = serializers.SerializerMethodField()
+    video_meta = serializers.SerializerMethodField()
 
     class Meta:
         model = Post
-        fields = ['id', 'user','user_id', 'text_content', 'image', 'video', 'created_at','profile_pic']
+        fields = ['id', 'user','user_id', 'text_content', 'image', 'image_srcset', 'video', 'video_meta', 'created_at','profile_pic']
     def get_profile_pic(self, obj):
-        if hasattr(obj.user, 'profile') and obj.user.profile.profile_pic:
-            return self._clean_url(obj.user.profile.profile_pic.url)
-        return None
+        return obj.author_profile_pic_url()
+
+    def get_image_srcset(self, obj):
+        return image_srcset(obj)
+
+    def get_video_meta(self, obj):
+        return video_meta(obj)
 
     def to_representation(self, instance):
         representation = super().to_representation(instance)
-        if instance.image:
-            representation['image'] = self._clean_url(instance.image.url)
-        if instance.video:
-            representation['video'] = self._clean_url(instance.video.url)
+        # Feed cards get the feed-width derivative (or the original until it exists)
+        if representation['image_srcset']:
+            representation['image'] = representation['image_srcset']['feed']
         return representation
-
-    def _clean_url(self, url):
-        if url.startswith("https//"):
-            return url.replace("https//", "https://")
-        elif url.startswith("http//"):
-            return url.replace("http//", "http://")
-        return url
\ No newline at end of file
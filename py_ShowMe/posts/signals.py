@@ -0,0 +1,80 @@
+# posts/signals.py
+
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+from django.contrib.auth.models import User
+from follows import bulk
+from follows.models import Follow
+from userProfile import counters
+from userProfile.models import Profile
+from userProfile.signals import privacy_changed
+from .models import Post
+from . import processing, timeline
+
+
+@receiver(post_save, sender=Post)
+def fan_out_post(sender, instance, created, **kwargs):
+    if created:
+        counters.adjust(instance.user_id, 'posts_count', 1)
+        timeline.push_post(instance)
+        timeline.invalidate_recent_posts(instance.user_id)
+        if instance.image:
+            processing.schedule_image_derivatives(instance)
+        if instance.video:
+            processing.schedule_video_assets(instance)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    # TimelineEntry rows go with the FK cascade; only the pull cache needs clearing.
+    counters.adjust(instance.user_id, 'posts_count', -1)
+    timeline.invalidate_recent_posts(instance.user_id)
+
+
+@receiver(pre_save, sender=Follow)
+def remember_follow_state(sender, instance, **kwargs):
+    instance._was_accepted = bool(
+        instance.pk and Follow.objects.filter(pk=instance.pk, accepted=True).exists()
+    )
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, **kwargs):
+    # Counters first: classify_author() reads followers_count.
+    if instance.accepted and not getattr(instance, '_was_accepted', False):
+        counters.follow_accepted(instance.follower_id, instance.following_id)
+        timeline.follow_accepted(instance.follower_id, instance.following_id)
+    elif not instance.accepted and getattr(instance, '_was_accepted', False):
+        counters.follow_removed(instance.follower_id, instance.following_id)
+        timeline.follow_removed(instance.follower_id, instance.following_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    if instance.accepted and not bulk.in_batch():
+        counters.follow_removed(instance.follower_id, instance.following_id)
+        timeline.follow_removed(instance.follower_id, instance.following_id)
+
+
+@receiver(post_save, sender=User)
+def refresh_author_from_user(sender, instance, created, update_fields=None, **kwargs):
+    # Logins save last_login only; skip those.
+    if created or (update_fields and 'username' not in update_fields):
+        return
+    Post.objects.refresh_author_snapshot(instance)
+
+
+@receiver(post_save, sender=Profile)
+def refresh_author_from_profile(sender, instance, **kwargs):
+    Post.objects.refresh_author_snapshot(instance.user)
+
+
+@receiver(post_save, sender=Profile)
+def profile_created(sender, instance, created, **kwargs):
+    if created:
+        timeline.rebuild_author(instance.user_id)
+
+
+@receiver(privacy_changed)
+def reroute_posts(sender, instance, **kwargs):
+    timeline.rebuild_author(instance.user_id)
@@ -1,4 +1,585 @@
-from django.test import TestCase
+import hashlib
+import io
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+
+from ShowMe.testing import ShowMeTestCase
+from follows.models import Follow
+from mediafiles.models import StorageTombstone
+from mediafiles.resolver import url_cache
+from userProfile.models import Profile
+from . import processing, timeline, uploads
+from .models import Post, TimelineEntry, UploadSession
+from .pagination import InvalidCursor, decode_cursor, encode_cursor
+from .timeline import rebuild_public_timeline
+
+
+class FeedPaginationTests(ShowMeTestCase):
+    def make_feed(self, count):
+        author, self.viewer = self.make_users('author', 'viewer')
+        self.client = self.client_for(self.viewer)
+        now = timezone.now()
+        posts = [Post.objects.create(user=author, text_content=f"post {i}") for i in range(count)]
+        # Pairs sharing a timestamp: the cursor has to break ties on id
+        for i, post in enumerate(posts):
+            post.created_at = now - timedelta(seconds=(count - i) // 2)
+        Post.objects.bulk_update(posts, ['created_at'])
+        rebuild_public_timeline()
+        return [post.id for post in reversed(posts)]
+
+    def walk(self, page_size):
+        ids, cursor = [], None
+        while True:
+            params = {'page_size': page_size}
+            if cursor:
+                params['cursor'] = cursor
+            response = self.client.get('/posts/posts/', params)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data['results']), page_size)
+            ids += [post['id'] for post in response.data['results']]
+            cursor = response.data['next']
+            if not cursor:
+                return ids
+
+    def test_cursor_pages_cover_the_feed_once(self):
+        expected = self.make_feed(9)
+        for page_size in (1, 2, 4, 9, 20):
+            self.assertEqual(self.walk(page_size), expected)
+
+    def test_unpaginated_feed_keeps_the_list_shape(self):
+        expected = self.make_feed(3)
+        response = self.client.get('/posts/posts/')
+        self.assertEqual([post['id'] for post in response.data], expected)
+
+    def test_malformed_cursors_are_rejected(self):
+        self.make_feed(2)
+        bad = [
+            'bogus',
+            encode_cursor(timezone.now(), 1)[:-3],
+            'bm90LWEtZGF0ZXwx',  # "not-a-date|1"
+            'MjAyNS0wMS0wMVQwMDowMDowMHx4',  # "2025-01-01T00:00:00|x"
+        ]
+        for cursor in bad:
+            response = self.client.get('/posts/posts/', {'cursor': cursor})
+            self.assertEqual(response.status_code, 400, cursor)
+            self.assertIn('error', response.data)
+
+    @override_settings(FEED_PAGE_SIZE=3, FEED_MAX_PAGE_SIZE=5)
+    def test_page_size_bounds(self):
+        self.make_feed(8)
+
+        def page_length(page_size):
+            return len(self.client.get('/posts/posts/', {'page_size': page_size}).data['results'])
+
+        self.assertEqual(page_length(2), 2)
+        self.assertEqual(page_length(0), 1)
+        self.assertEqual(page_length(-4), 1)
+        self.assertEqual(page_length(50), 5)
+        self.assertEqual(page_length('many'), 3)
+
+    def test_cursor_round_trip(self):
+        created_at = timezone.now()
+        self.assertEqual(decode_cursor(encode_cursor(created_at, 42)), (created_at, 42))
+        with self.assertRaises(InvalidCursor):
+            decode_cursor('')
+
+
+class TimelineTests(ShowMeTestCase):
+    def feed(self, user):
+        response = self.client_for(user).get('/posts/posts/', {'page_size': 100})
+        return [post['text_content'] for post in response.data['results']]
+
+    def follow(self, follower, author, accepted=True):
+        return Follow.objects.create(follower=follower, following=author, accepted=accepted)
+
+    def test_push_cost_does_not_grow_with_followers(self):
+        def post_as(author, followers):
+            for follower in followers:
+                self.follow(follower, author)
+            with CaptureQueriesContext(connection) as queries:
+                Post.objects.create(user=author, text_content=f"by {author.username}")
+            return len(queries)
+
+        few = post_as(self.make_user('few', Profile.PRIVATE), self.make_users(*(f'f{i}' for i in range(3))))
+        many = post_as(self.make_user('many', Profile.PRIVATE), self.make_users(*(f'm{i}' for i in range(40))))
+        self.assertEqual(many, few)
+        self.assertEqual(TimelineEntry.objects.filter(post__user__username='many').count(), 41)
+        self.assertEqual(self.feed(self.make_user('stranger')), [])
+
+    def test_public_posts_are_stored_once(self):
+        author = self.make_user('author')
+        post = Post.objects.create(user=author, text_content="hello")
+        timeline.push_post(post)
+        timeline.push_author_posts(author.id, [None])
+        self.assertEqual(list(TimelineEntry.objects.values_list('owner_id', 'post_id')), [(None, post.id)])
+        self.assertEqual(self.feed(self.make_user('reader')), ["hello"])
+
+    def test_follow_accept_and_remove(self):
+        author = self.make_user('author', Profile.PRIVATE)
+        reader = self.make_user('reader')
+        for i in range(3):
+            Post.objects.create(user=author, text_content=f"post {i}")
+
+        request = self.follow(reader, author, accepted=False)
+        self.assertEqual(self.feed(reader), [])
+        request.accepted = True
+        request.save()
+        self.assertEqual(self.feed(reader), ["post 2", "post 1", "post 0"])
+        Post.objects.create(user=author, text_content="post 3")
+        self.assertEqual(self.feed(reader)[0], "post 3")
+
+        request.delete()
+        self.assertEqual(self.feed(reader), [])
+        self.assertEqual(self.feed(author), ["post 3", "post 2", "post 1", "post 0"])
+
+    def test_privacy_flip_reroutes_posts(self):
+        author, follower, stranger = self.make_users('author', 'follower', 'stranger')
+        self.follow(follower, author)
+        Post.objects.create(user=author, text_content="first")
+        self.assertEqual(self.feed(stranger), ["first"])
+
+        profile = author.profile
+        profile.privacy = Profile.PRIVATE
+        profile.save()
+        self.assertEqual(self.feed(stranger), [])
+        self.assertEqual(self.feed(follower), ["first"])
+
+        profile.privacy = Profile.PUBLIC
+        profile.save()
+        self.assertEqual(self.feed(stranger), ["first"])
+        self.assertFalse(TimelineEntry.objects.filter(owner__isnull=False).exists())
+
+    @override_settings(TIMELINE_MAX_LENGTH=3)
+    def test_rebuild_and_trim(self):
+        public, private, reader = self.make_users('public', 'private', 'reader', private={'private'})
+        self.follow(reader, private)
+        for i in range(5):
+            Post.objects.create(user=public, text_content=f"public {i}")
+            Post.objects.create(user=private, text_content=f"private {i}")
+
+        # Trimming is deferred: the personal timeline is over the cap until the job runs
+        self.assertEqual(TimelineEntry.objects.filter(owner=reader).count(), 5)
+        out = StringIO()
+        call_command('trim_timelines', stdout=out)
+        self.assertIn("Trimmed 4 timeline entries.", out.getvalue())
+        self.assertEqual(TimelineEntry.objects.filter(owner=reader).count(), 3)
+        self.assertEqual(TimelineEntry.objects.filter(owner=private).count(), 3)
+        # Public history is never capped
+        self.assertEqual(TimelineEntry.objects.filter(owner__isnull=True).count(), 5)
+
+        TimelineEntry.objects.all().delete()
+        call_command('rebuild_timelines', stdout=StringIO())
+        self.assertEqual(TimelineEntry.objects.filter(owner__isnull=True).count(), 5)
+        self.assertEqual(TimelineEntry.objects.filter(owner=reader).count(), 3)
+        self.assertEqual(self.feed(reader), [
+            "private 4", "public 4", "private 3", "public 3", "private 2", "public 2", "public 1", "public 0",
+        ])
+
+
+@override_settings(FEED_CELEBRITY_THRESHOLD=2, FEED_CELEBRITY_CACHE_SIZE=3)
+class CelebrityFeedTests(ShowMeTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.star, self.fan, self.other_fan = self.make_users('star', 'fan', 'other_fan', private={'star'})
+
+    def follow_star(self):
+        for follower in (self.fan, self.other_fan):
+            Follow.objects.create(follower=follower, following=self.star, accepted=True)
+        self.star.profile.refresh_from_db()
+        self.assertTrue(self.star.profile.is_celebrity)
+
+    def walk(self, user, page_size):
+        client, names, cursor = self.client_for(user), [], None
+        while True:
+            params = {'page_size': page_size, **({'cursor': cursor} if cursor else {})}
+            response = client.get('/posts/posts/', params)
+            names += [post['text_content'] for post in response.data['results']]
+            cursor = response.data['next']
+            if not cursor:
+                return names
+
+    def test_celebrity_posts_are_merged_at_read_time(self):
+        Post.objects.create(user=self.star, text_content="before")
+        self.follow_star()  # fan was backfilled with "before"; other_fan tipped the star over
+        public = self.make_user('public')
+        Post.objects.create(user=self.star, text_content="star 1")
+        Post.objects.create(user=public, text_content="public")
+        Post.objects.create(user=self.star, text_content="star 2")
+
+        self.assertEqual(
+            sorted(TimelineEntry.objects.filter(post__user=self.star).values_list('owner__username', flat=True)),
+            ['fan', 'star', 'star', 'star'],  # only "before" reached a follower's timeline
+        )
+        expected = ["star 2", "public", "star 1", "before"]
+        self.assertEqual(self.walk(self.fan, 100), expected)  # "before" is in both sources, shown once
+        self.assertEqual(self.walk(self.other_fan, 100), expected)
+        self.assertEqual(self.walk(self.make_user('stranger'), 100), ["public"])
+
+    def test_paging_past_the_cached_posts_reads_the_index(self):
+        self.follow_star()
+        for i in range(7):
+            Post.objects.create(user=self.star, text_content=f"star {i}")
+        self.assertEqual(len(timeline.recent_posts(self.star.id)), 3)
+        self.assertEqual(self.walk(self.fan, 2), [f"star {i}" for i in reversed(range(7))])
+
+    def test_demoted_author_is_backfilled(self):
+        self.follow_star()
+        for i in range(2):
+            Post.objects.create(user=self.star, text_content=f"star {i}")
+        self.assertFalse(TimelineEntry.objects.filter(owner=self.fan).exists())
+
+        Follow.objects.get(follower=self.other_fan).delete()
+        self.star.profile.refresh_from_db()
+        self.assertFalse(self.star.profile.is_celebrity)
+        self.assertEqual(TimelineEntry.objects.filter(owner=self.fan).count(), 2)
+        self.assertEqual(self.walk(self.fan, 100), ["star 1", "star 0"])
+        self.assertEqual(self.walk(self.other_fan, 100), [])
+
+
+class VisibilityTests(ShowMeTestCase):
+    def test_visible_to(self):
+        public, private, follower, pending, stranger = self.make_users(
+            'public', 'private', 'follower', 'pending', 'stranger', private={'private'}
+        )
+        for author in (public, private):
+            Post.objects.create(user=author, text_content=author.username)
+            Follow.objects.create(follower=follower, following=author, accepted=True)
+            Follow.objects.create(follower=pending, following=author, accepted=False)
+
+        def visible(user):
+            return sorted(Post.objects.visible_to(user).values_list('text_content', flat=True))
+
+        self.assertEqual(visible(AnonymousUser()), ['public'])
+        self.assertEqual(visible(public), ['public'])
+        self.assertEqual(visible(private), ['private', 'public'])
+        self.assertEqual(visible(follower), ['private', 'public'])
+        self.assertEqual(visible(pending), ['public'])
+        self.assertEqual(visible(stranger), ['public'])
+
+
+class AuthorSnapshotTests(ShowMeTestCase):
+    def test_profile_pic_is_stored_by_name_and_resolved_on_read(self):
+        author = self.make_user('author')
+        profile = author.profile
+        profile.profile_pic = 'profile_pics/me.jpg'
+        profile.save()
+        post = Post.objects.create(user=author, text_content="hi")
+        self.assertEqual(post.author_profile_pic, 'profile_pics/me.jpg')
+
+        storage = Profile._meta.get_field('profile_pic').storage
+        url_cache.clear()
+        self.addCleanup(url_cache.clear)
+        with mock.patch.object(storage, 'url', return_value='https://cdn.example/profile_pics/me.jpg?sig=1'):
+            response = self.client_for(author).get('/posts/posts/')
+        self.assertEqual(response.data[0]['profile_pic'], 'https://cdn.example/profile_pics/me.jpg?sig=1')
+
+        profile.profile_pic = 'profile_pics/new.jpg'
+        profile.save()
+        post.refresh_from_db()
+        self.assertEqual(post.author_profile_pic, 'profile_pics/new.jpg')
+
+
+class PresignedUploadTests(ShowMeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = self.make_user('uploader')
+        self.client = self.client_for(self.user)
+        # An S3-compatible storage whose client is stubbed
+        self.s3 = mock.Mock()
+        self.s3.exceptions.ClientError = type('ClientError', (Exception,), {})
+        self.s3.generate_presigned_post.return_value = {'url': 'https://s3.local/bucket', 'fields': {'key': 'k'}}
+        self.s3.head_object.return_value = {'ContentLength': 1024, 'ContentType': 'image/jpeg'}
+        storage = mock.Mock(bucket_name='bucket')
+        storage.connection.meta.client = self.s3
+        storage._normalize_name.side_effect = lambda name: f'media/{name}'
+        self.enterContext(mock.patch.object(uploads, 'default_storage', storage))
+
+    def presign(self, kind='image', content_type='image/jpeg'):
+        return self.client.post('/posts/uploads/presign/', {
+            'kind': kind, 'filename': 'photo.JPG', 'content_type': content_type,
+        }, format='json')
+
+    def create(self, **keys):
+        return self.client.post('/posts/posts/', {'text_content': 'hi', **keys}, format='json')
+
+    def test_presign_scopes_the_key_to_the_user(self):
+        response = self.presign()
+        self.assertEqual(response.status_code, 201)
+        key = response.data['key']
+        self.assertTrue(key.startswith(f'post_images/uploads/{self.user.id}/'))
+        self.assertTrue(key.endswith('.jpg'))
+        self.assertEqual(response.data['url'], 'https://s3.local/bucket')
+        kwargs = self.s3.generate_presigned_post.call_args.kwargs
+        self.assertEqual((kwargs['Bucket'], kwargs['Key']), ('bucket', f'media/{key}'))
+        self.assertIn(['content-length-range', 1, response.data['max_bytes']], kwargs['Conditions'])
+
+        self.assertEqual(self.presign(content_type='application/pdf').status_code, 400)
+        self.assertEqual(self.presign(kind='audio').status_code, 400)
+
+    def test_uploaded_image_becomes_a_post(self):
+        key = self.presign().data['key']
+        response = self.create(image_key=key)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Post.objects.get(pk=response.data['id']).image.name, key)
+        self.s3.head_object.assert_called_once_with(Bucket='bucket', Key=f'media/{key}')
+
+        again = self.create(image_key=key)
+        self.assertEqual((again.status_code, again.data['error']), (400, "That image is already attached to a post."))
+
+    def test_uploaded_video_becomes_a_post(self):
+        key = self.presign('video', 'video/mp4').data['key']
+        self.s3.head_object.return_value = {'ContentLength': 4096, 'ContentType': 'video/mp4'}
+        response = self.create(video_key=key)
+        self.assertEqual(response.status_code, 201)
+        post = Post.objects.get(pk=response.data['id'])
+        self.assertEqual((post.video.name, post.video_status), (key, Post.MEDIA_PENDING))
+
+    def test_bad_uploads_are_rejected(self):
+        key = self.presign().data['key']
+        other = self.make_user('other')
+        for bad in (f'post_images/uploads/{other.id}/x.jpg', f'post_images/uploads/{self.user.id}/../x.jpg',
+                    f'post_videos/uploads/{self.user.id}/x.jpg'):
+            response = self.create(image_key=bad)
+            self.assertEqual((response.status_code, response.data['error']), (400, "Invalid image key."))
+
+        self.s3.head_object.side_effect = self.s3.exceptions.ClientError("404")
+        self.assertEqual(self.create(image_key=key).data['error'], "Uploaded image not found.")
+        self.s3.head_object.side_effect = None
+
+        with override_settings(POST_UPLOAD_MAX_IMAGE_BYTES=512):
+            self.assertEqual(self.create(image_key=key).data['error'], "Uploaded image is too large.")
+        self.s3.head_object.return_value = {'ContentLength': 1024, 'ContentType': 'text/html'}
+        self.assertEqual(self.create(image_key=key).data['error'], "Unsupported content type for image: text/html.")
+        self.assertFalse(Post.objects.exists())
+
+
+class ChunkedUploadTests(ShowMeTestCase):
+    CHUNK = 256 * 1024
+
+    def setUp(self):
+        super().setUp()
+        for setting in ('MEDIA_ROOT', 'CHUNKED_UPLOAD_DIR'):
+            directory = tempfile.TemporaryDirectory()
+            self.addCleanup(directory.cleanup)
+            self.enterContext(override_settings(**{setting: directory.name}))
+        self.user = self.make_user('uploader')
+        self.client = self.client_for(self.user)
+        self.data = os.urandom(self.CHUNK * 2 + 100)
+
+    def start(self):
+        response = self.client.post('/posts/uploads/chunked/', {
+            'filename': 'clip.mp4', 'content_type': 'video/mp4',
+            'total_size': len(self.data), 'chunk_size': self.CHUNK,
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        return response.data['id']
+
+    def put_chunk(self, session_id, index, body=None, sha256=None):
+        body = self.data[index * self.CHUNK:(index + 1) * self.CHUNK] if body is None else body
+        return self.client.put(
+            f'/posts/uploads/chunked/{session_id}/chunks/{index}/', body,
+            content_type='application/octet-stream',
+            HTTP_X_CHUNK_SHA256=sha256 or hashlib.sha256(body).hexdigest(),
+        )
+
+    def test_out_of_order_chunks_assemble_in_order(self):
+        session_id = self.start()
+        for index in (2, 0, 1, 0):  # chunk 0 retried
+            self.assertEqual(self.put_chunk(session_id, index).status_code, 200)
+        self.assertEqual(self.client.get(f'/posts/uploads/chunked/{session_id}/').data['received_chunks'], [0, 1, 2])
+
+        response = self.client.post(f'/posts/uploads/chunked/{session_id}/complete/', {'text_content': 'hi'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        post = Post.objects.get(pk=response.data['id'])
+        with post.video.open('rb') as stored:
+            self.assertEqual(stored.read(), self.data)
+        self.assertEqual((post.text_content, post.video_status), ('hi', Post.MEDIA_PENDING))
+        session = UploadSession.objects.get(pk=session_id)
+        self.assertEqual((session.status, session.post_id), (UploadSession.COMPLETE, post.pk))
+        self.assertFalse(os.path.exists(uploads._session_dir(session)))
+
+        again = self.client.post(f'/posts/uploads/chunked/{session_id}/complete/')
+        self.assertEqual(again.status_code, 400)
+        self.assertEqual(self.put_chunk(session_id, 0).status_code, 400)
+
+    def test_bad_chunks_are_rejected(self):
+        session_id = self.start()
+        mismatch = self.put_chunk(session_id, 0, sha256='0' * 64)
+        self.assertEqual((mismatch.status_code, mismatch.data['error']), (400, "Checksum mismatch for chunk 0."))
+        self.assertEqual(self.put_chunk(session_id, 1, body=b'short').status_code, 400)
+        self.assertEqual(self.put_chunk(session_id, 3).status_code, 400)
+        self.assertEqual(self.client.get(f'/posts/uploads/chunked/{session_id}/').data['received_chunks'], [])
+        self.assertEqual(os.listdir(uploads._session_dir(UploadSession.objects.get())), [])
+
+        self.put_chunk(session_id, 0)
+        response = self.client.post(f'/posts/uploads/chunked/{session_id}/complete/')
+        self.assertEqual((response.status_code, response.data['error']), (400, "Missing chunks: [1, 2]"))
+        self.assertFalse(Post.objects.exists())
+
+    def test_losing_a_finalize_race_queues_the_stored_file(self):
+        session_id = self.start()
+        for index in range(3):
+            self.put_chunk(session_id, index)
+        session = UploadSession.objects.get(pk=session_id)
+        # Another request completed it after this one loaded the session
+        UploadSession.objects.filter(pk=session_id).update(status=UploadSession.COMPLETE)
+
+        with self.assertRaises(uploads.UploadError):
+            uploads.finalize_session(session)
+        self.assertFalse(Post.objects.exists())
+        self.assertTrue(StorageTombstone.objects.get().name.startswith('post_videos/clip'))
+
+    def test_expired_sessions_are_purged(self):
+        expired, fresh = self.start(), self.start()
+        self.put_chunk(expired, 0)
+        UploadSession.objects.filter(pk=expired).update(created_at=timezone.now() - timedelta(hours=25))
+        expired_dir = uploads._session_dir(UploadSession.objects.get(pk=expired))
+
+        out = StringIO()
+        call_command('purge_upload_sessions', stdout=out)
+        self.assertIn("Purged 1 expired upload sessions.", out.getvalue())
+        self.assertEqual([str(pk) for pk in UploadSession.objects.values_list('pk', flat=True)], [fresh])
+        self.assertFalse(os.path.exists(expired_dir))
+
+
+class MediaProcessingTests(ShowMeTestCase):
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root.name))
+        self.user = self.make_user('author')
+
+    def video_post(self, **fields):
+        post = Post(user=self.user, **fields)
+        post.video.save('clip.mp4', ContentFile(b'not really a video'), save=False)
+        post.save()  # background job is scheduled on commit, which TestCase never reaches
+        return post
+
+    def fake_render(self, source_path, work_dir, duration):
+        for filename in ('poster.jpg', 'index.m3u8', 'segment_0000.ts', 'segment_0001.ts'):
+            with open(os.path.join(work_dir, filename), 'wb') as fh:
+                fh.write(filename.encode())
+
+    def test_video_assets_are_recorded(self):
+        post = self.video_post()
+        self.assertEqual(post.video_status, Post.MEDIA_PENDING)
+        with mock.patch.object(processing, 'probe_video', return_value={'duration': 7.5, 'width': 640, 'height': 360}), \
+                mock.patch.object(processing, 'render_video_assets', side_effect=self.fake_render):
+            processing.build_video_assets(post.pk)
+
+        post.refresh_from_db()
+        self.assertEqual((post.video_status, post.video_duration, post.video_height), (Post.MEDIA_READY, 7.5, 360))
+        prefix = f'post_videos/hls/{post.pk}/'
+        self.assertEqual(post.video_assets['playlist'], prefix + 'index.m3u8')
+        self.assertEqual(post.video_assets['segments'], [prefix + 'segment_0000.ts', prefix + 'segment_0001.ts'])
+
+    def test_any_processing_error_marks_the_post_failed(self):
+        post = self.video_post()
+
+        class ClientError(Exception):  # stands in for botocore.exceptions.ClientError
+            pass
+
+        with mock.patch.object(processing, 'probe_video', side_effect=ClientError("AccessDenied")), \
+                self.assertLogs('posts.processing', 'ERROR'):
+            processing.build_video_assets(post.pk)
+        post.refresh_from_db()
+        self.assertEqual(post.video_status, Post.MEDIA_FAILED)
+
+    def test_background_errors_are_logged(self):
+        def explode(post_id):
+            raise RuntimeError("worker died")
+
+        with mock.patch.object(processing, '_pools', return_value=(None, mock.Mock(submit=lambda job: job()))), \
+                mock.patch.object(processing, 'connection'), self.assertLogs('posts.processing', 'ERROR') as logs:
+            processing._run_in_background(explode, 42)
+        self.assertIn("Background explode failed for post 42", logs.output[0])
+
+    @override_settings(MEDIA_PROCESS_STALE_AFTER=600)
+    def test_stale_sweep_picks_up_lost_jobs(self):
+        lost, _running, failed = self.video_post(), self.video_post(), self.video_post()
+        image = Post.objects.create(user=self.user, image='post_images/p.jpg')
+        an_hour_ago = timezone.now() - timedelta(hours=1)
+        Post.objects.filter(pk__in=[lost.pk, failed.pk, image.pk]).update(created_at=an_hour_ago)
+        Post.objects.filter(pk=failed.pk).update(video_status=Post.MEDIA_FAILED)
+        self.assertEqual(processing.stale_pending(), ([image.pk], [lost.pk]))
+
+        with mock.patch.object(processing, 'build_video_assets') as videos, \
+                mock.patch.object(processing, 'build_image_derivatives') as images:
+            call_command('process_post_media', '--stale', stdout=StringIO())
+        self.assertEqual([c.args for c in videos.call_args_list], [(lost.pk,)])
+        self.assertEqual([c.args for c in images.call_args_list], [(image.pk,)])
+
+
+@override_settings(POST_IMAGE_DERIVATIVES={'thumb': 320, 'feed': 1080, 'full': 2048})
+class ImageDerivativeTests(ShowMeTestCase):
+    def encode(self, image, format, **params):
+        out = io.BytesIO()
+        image.save(out, format, **params)
+        return out.getvalue()
+
+    def render(self, data):
+        rendered = processing.render_image_derivatives(data, settings.POST_IMAGE_DERIVATIVES, 85)
+        return {name: Image.open(io.BytesIO(body)) for name, body in rendered.items()}
+
+    def test_widths_are_capped_but_never_upscaled(self):
+        variants = self.render(self.encode(Image.new('RGB', (1600, 800), 'red'), 'JPEG'))
+        self.assertEqual(
+            {name: image.size for name, image in variants.items()},
+            {'thumb': (320, 160), 'feed': (1080, 540), 'full': (1600, 800)},
+        )
+        for image in variants.values():
+            self.assertEqual(image.format, 'JPEG')
+            self.assertTrue(image.info.get('progressive') or image.info.get('progression'))
+
+    def test_exif_orientation_is_applied_and_metadata_dropped(self):
+        exif = Image.Exif()
+        exif[0x0112] = 6  # rotated 90 degrees clockwise
+        exif[0x010F] = 'Camera maker'
+        source = self.encode(Image.new('RGB', (400, 200), 'blue'), 'JPEG', exif=exif)
+        thumb = self.render(source)['thumb']
+        self.assertEqual(thumb.size, (200, 400))
+        self.assertNotIn('exif', thumb.info)
+        self.assertEqual(len(thumb.getexif()), 0)
+
+    def test_transparency_becomes_white(self):
+        rgba = Image.new('RGBA', (10, 10), (0, 0, 0, 0))
+        rgba.putpixel((0, 0), (255, 0, 0, 255))
+        palette = Image.new('P', (10, 10), 0)
+        palette.putpalette([0, 0, 0, 255, 0, 0])
+        palette.putpixel((0, 0), 1)
+        for source in (self.encode(rgba, 'PNG'), self.encode(rgba.convert('LA'), 'PNG'),
+                       self.encode(palette, 'GIF', transparency=0)):
+            thumb = self.render(source)['thumb'].convert('RGB')
+            self.assertGreater(min(thumb.getpixel((9, 9))), 240)
+            self.assertNotEqual(thumb.getpixel((0, 0)), thumb.getpixel((9, 9)))
+
+    def test_srcset_falls_back_to_the_original(self):
+        user = self.make_user('author')
+        post = Post.objects.create(user=user, image='post_images/p.jpg')
+        original = post.image.url
+        self.assertEqual(processing.image_srcset(post), dict.fromkeys(settings.POST_IMAGE_DERIVATIVES, original))
+
+        post.image_status = Post.MEDIA_READY
+        post.image_variants = {'thumb': 'post_images/derivatives/1/thumb.jpg'}
+        srcset = processing.image_srcset(post)
+        self.assertEqual(srcset['thumb'], post.image.storage.url('post_images/derivatives/1/thumb.jpg'))
+        self.assertEqual((srcset['feed'], srcset['full']), (original, original))
+        self.assertIsNone(processing.image_srcset(Post(user=user)))
 
-# Create your tests here.
-# userProfile/tests.py
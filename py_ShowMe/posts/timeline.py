@@ -0,0 +1,319 @@
+# posts/timeline.py
+#
+# Fan-out-on-write home timelines.
+#
+# Posts by public authors go once into the shared timeline (owner=NULL).
+# Posts by private authors go into the author's own timeline and the
+# timeline of every accepted follower. A feed read merges the viewer's
+# timeline with the shared one, so it never has to work out visibility.
+#
+# Private authors with more than FEED_CELEBRITY_THRESHOLD followers
+# ("celebrities") are not fanned out. Their posts stay in the author's own
+# timeline and are merged into followers' feeds at read time from a small
+# per-author recent-posts cache.
+#
+# Personal timelines keep the newest TIMELINE_MAX_LENGTH entries. Trimming
+# is left to `manage.py trim_timelines --loop`, not done on write: reads
+# only ever look at the newest rows, so a timeline that has grown past the
+# cap for a while costs storage, not latency. The shared timeline is the
+# only copy of public history and is never trimmed.
+
+import heapq
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
+
+from follows.models import Follow
+from userProfile.models import Profile
+from .models import Post, TimelineEntry
+from .pagination import decode_cursor, encode_cursor
+
+
+TIMELINE_BATCH_SIZE = 2000
+
+
+def _is_public(user_id):
+    privacy = Profile.objects.filter(user_id=user_id).values_list('privacy', flat=True).first()
+    return privacy == Profile.PUBLIC
+
+
+def _owner_filter(owner_id):
+    return Q(owner__isnull=True) if owner_id is None else Q(owner_id=owner_id)
+
+
+def audience_for(author_id):
+    """Timeline owners that should receive a post by author_id."""
+    profile = Profile.objects.filter(user_id=author_id).values('privacy', 'is_celebrity').first()
+    if profile and profile['privacy'] == Profile.PUBLIC:
+        return [None]
+    if profile and profile['is_celebrity']:
+        return [author_id]
+    follower_ids = Follow.objects.filter(following_id=author_id, accepted=True).values_list('follower_id', flat=True)
+    return [author_id, *follower_ids]
+
+
+def _insert(owner_ids, posts):
+    """
+    Add (post_id, created_at) pairs to each of the given timelines, skipping
+    rows already there, TIMELINE_BATCH_SIZE rows per INSERT.
+    """
+    posts = list(posts) if len(owner_ids) > 1 else posts
+    rows = (
+        TimelineEntry(owner_id=owner_id, post_id=post_id, post_created_at=created_at)
+        for owner_id in owner_ids
+        for post_id, created_at in posts
+    )
+    while batch := list(islice(rows, TIMELINE_BATCH_SIZE)):
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def push_post(post, owner_ids=None):
+    """Fan a new post out: one audience query and one batched INSERT."""
+    if owner_ids is None:
+        owner_ids = audience_for(post.user_id)
+    _insert(owner_ids, [(post.id, post.created_at)])
+
+
+def push_author_posts(author_id, owner_ids):
+    """
+    Backfill an author's posts into the given timelines: the newest
+    TIMELINE_MAX_LENGTH into personal ones, all of them into the shared one.
+    """
+    owner_ids = list(owner_ids)
+    posts = Post.objects.filter(user_id=author_id).order_by('-created_at', '-id').values_list('id', 'created_at')
+    personal = [owner_id for owner_id in owner_ids if owner_id is not None]
+    if personal:
+        _insert(personal, list(posts[:settings.TIMELINE_MAX_LENGTH]))
+    if len(personal) < len(owner_ids):
+        _insert([None], posts.iterator(chunk_size=TIMELINE_BATCH_SIZE))
+
+
+def trim_timelines(owner_ids=None):
+    """
+    Drop everything past TIMELINE_MAX_LENGTH in personal timelines, all of
+    them or only owner_ids, with one windowed SELECT and batched DELETEs.
+    Returns the number of entries removed.
+    """
+    entries = TimelineEntry.objects.filter(owner__isnull=False)
+    if owner_ids is not None:
+        entries = entries.filter(owner_id__in=[owner_id for owner_id in owner_ids if owner_id is not None])
+    overflow = list(
+        entries.annotate(
+            position=Window(
+                RowNumber(),
+                partition_by=F('owner_id'),
+                order_by=[F('post_created_at').desc(), F('post_id').desc()],
+            )
+        )
+        .filter(position__gt=settings.TIMELINE_MAX_LENGTH)
+        .values_list('pk', flat=True)
+    )
+    deleted = 0
+    for start in range(0, len(overflow), TIMELINE_BATCH_SIZE):
+        deleted += TimelineEntry.objects.filter(pk__in=overflow[start:start + TIMELINE_BATCH_SIZE]).delete()[0]
+    return deleted
+
+
+def classify_authors(author_ids):
+    """
+    Recompute the celebrity flag for authors and return the ids that are
+    celebrities. When an author drops back below the threshold their recent
+    posts are pushed to every follower, since those followers were pulling
+    them until now.
+    """
+    threshold = settings.FEED_CELEBRITY_THRESHOLD
+    celebrities, promoted, demoted = set(), [], []
+    profiles = Profile.objects.filter(user_id__in=set(author_ids)).values_list(
+        'user_id', 'followers_count', 'is_celebrity', 'privacy'
+    )
+    for author_id, follower_count, was_celebrity, privacy in profiles:
+        if follower_count >= threshold:
+            celebrities.add(author_id)
+            if not was_celebrity:
+                promoted.append(author_id)
+        elif was_celebrity:
+            demoted.append((author_id, privacy))
+
+    if promoted:
+        Profile.objects.filter(user_id__in=promoted).update(is_celebrity=True)
+    if demoted:
+        Profile.objects.filter(user_id__in=[author_id for author_id, _ in demoted]).update(is_celebrity=False)
+        for author_id, privacy in demoted:
+            if privacy != Profile.PUBLIC:
+                follower_ids = Follow.objects.filter(following_id=author_id, accepted=True).values_list('follower_id', flat=True)
+                push_author_posts(author_id, list(follower_ids))
+    return celebrities
+
+
+def classify_author(author_id):
+    return author_id in classify_authors([author_id])
+
+
+def follow_accepted(follower_id, following_id):
+    follows_accepted([(follower_id, following_id)])
+
+
+def follow_removed(follower_id, following_id):
+    follows_removed([(follower_id, following_id)])
+
+
+def _by_author(pairs):
+    followers = {}
+    for follower_id, following_id in pairs:
+        followers.setdefault(following_id, []).append(follower_id)
+    return followers
+
+
+def follows_accepted(pairs):
+    """(follower_id, following_id) follows became accepted: backfill private, non-celebrity authors."""
+    followers = _by_author(pairs)
+    celebrities = classify_authors(followers)
+    public = set(
+        Profile.objects.filter(user_id__in=list(followers), privacy=Profile.PUBLIC).values_list('user_id', flat=True)
+    )
+    for author_id, follower_ids in followers.items():
+        if author_id not in celebrities and author_id not in public:
+            push_author_posts(author_id, follower_ids)
+
+
+def follows_removed(pairs):
+    """(follower_id, following_id) follows are gone: drop those authors' posts from the followers' timelines."""
+    followers = _by_author(pairs)
+    for author_id, follower_ids in followers.items():
+        TimelineEntry.objects.filter(owner_id__in=follower_ids, post__user_id=author_id).delete()
+    classify_authors(followers)
+
+
+def rebuild_author(author_id):
+    """Re-route an author's posts after their privacy changed."""
+    TimelineEntry.objects.filter(post__user_id=author_id).delete()
+    push_author_posts(author_id, audience_for(author_id))
+
+
+def rebuild_timeline(user_id):
+    """Recompute one user's personal timeline from the Follow table."""
+    TimelineEntry.objects.filter(owner_id=user_id).delete()
+
+    private_following = Follow.objects.filter(
+        follower_id=user_id,
+        accepted=True,
+    ).exclude(
+        Q(following__profile__privacy=Profile.PUBLIC) | Q(following__profile__is_celebrity=True)
+    ).values('following_id')
+
+    author_filter = Q(user_id__in=private_following)
+    if not _is_public(user_id):
+        author_filter |= Q(user_id=user_id)
+
+    posts = (
+        Post.objects.filter(author_filter)
+        .order_by('-created_at', '-id')
+        .values_list('id', 'created_at')[:settings.TIMELINE_MAX_LENGTH]
+    )
+    TimelineEntry.objects.bulk_create(
+        [TimelineEntry(owner_id=user_id, post_id=post_id, post_created_at=created_at) for post_id, created_at in posts],
+        ignore_conflicts=True,
+    )
+
+
+def rebuild_public_timeline():
+    TimelineEntry.objects.filter(owner__isnull=True).delete()
+    posts = (
+        Post.objects.filter(user__profile__privacy=Profile.PUBLIC)
+        .order_by('-created_at', '-id')
+        .values_list('id', 'created_at')
+    )
+    _insert([None], posts.iterator(chunk_size=TIMELINE_BATCH_SIZE))
+
+
+def _recent_posts_key(author_id):
+    return f"feed:recent_posts:{author_id}"
+
+
+def recent_posts(author_id):
+    """(created_at, post_id) pairs of an author's newest posts, newest first."""
+    key = _recent_posts_key(author_id)
+    posts = cache.get(key)
+    if posts is None:
+        posts = list(
+            Post.objects.filter(user_id=author_id)
+            .order_by('-created_at', '-id')
+            .values_list('created_at', 'id')[:settings.FEED_CELEBRITY_CACHE_SIZE]
+        )
+        cache.set(key, posts)
+    return posts
+
+
+def invalidate_recent_posts(author_id):
+    cache.delete(_recent_posts_key(author_id))
+
+
+def _author_slice(author_id, cursor_position, limit):
+    cached = recent_posts(author_id)
+    posts = [key for key in cached if key < cursor_position] if cursor_position else cached
+    if len(posts) >= limit or len(cached) < settings.FEED_CELEBRITY_CACHE_SIZE:
+        return posts[:limit]
+
+    # Scrolled past the cached window: fall back to the (user, created_at, id) index.
+    entries = Post.objects.filter(user_id=author_id)
+    if cursor_position:
+        created_at, post_id = cursor_position
+        entries = entries.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=post_id))
+    return list(entries.order_by('-created_at', '-id').values_list('created_at', 'id')[:limit])
+
+
+def followed_celebrities(user_id):
+    return list(
+        Follow.objects.filter(
+            follower_id=user_id,
+            accepted=True,
+            following__profile__is_celebrity=True,
+            following__profile__privacy=Profile.PRIVATE,
+        ).values_list('following_id', flat=True)
+    )
+
+
+def _slice(owner_id, cursor_position, limit):
+    entries = TimelineEntry.objects.filter(_owner_filter(owner_id))
+    if cursor_position:
+        created_at, post_id = cursor_position
+        entries = entries.filter(
+            Q(post_created_at__lt=created_at) | Q(post_created_at=created_at, post_id__lt=post_id)
+        )
+    return list(entries.order_by('-post_created_at', '-post_id').values_list('post_created_at', 'post_id')[:limit])
+
+
+def read_timeline(user, cursor=None, page_size=None):
+    """
+    Merge the viewer's timeline, the shared public one and the recent posts
+    of any celebrities the viewer follows.
+    Returns (posts, next_cursor). page_size=None reads the whole capped timeline.
+    """
+    limit = (page_size or settings.TIMELINE_MAX_LENGTH) + 1
+    position = decode_cursor(cursor) if cursor else None
+
+    sources = [_slice(user.id, position, limit), _slice(None, position, limit)]
+    sources += [_author_slice(author_id, position, limit) for author_id in followed_celebrities(user.id)]
+    merged = heapq.merge(*sources, reverse=True)
+    keys = []
+    seen = set()
+    for created_at, post_id in merged:
+        if post_id not in seen:
+            seen.add(post_id)
+            keys.append((created_at, post_id))
+        if len(keys) == limit:
+            break
+
+    next_cursor = None
+    if page_size and len(keys) > page_size:
+        keys = keys[:page_size]
+        next_cursor = encode_cursor(*keys[-1])
+    else:
+        keys = keys[:limit - 1]
+
+    posts_by_id = Post.objects.in_bulk([post_id for _, post_id in keys])
+    posts = [posts_by_id[post_id] for _, post_id in keys if post_id in posts_by_id]
+    return posts, next_cursor
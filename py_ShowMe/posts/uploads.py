@@ -0,0 +1,261 @@
+# posts/uploads.py
+#
+# Direct-to-storage uploads. The client asks for a presigned POST, sends the
+# bytes straight to S3 (or any S3-compatible endpoint), then creates the Post
+# with the returned key. Web workers never see the file body.
+
+import hashlib
+import mimetypes
+import os
+import shutil
+import tempfile
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+
+from mediafiles.gc import schedule_deletion
+from .models import Post, UploadChunk, UploadSession
+
+
+class UploadError(ValueError):
+    pass
+
+
+UPLOAD_KINDS = {
+    'image': {
+        'prefix': 'post_images/uploads',
+        'content_types': {'image/jpeg', 'image/png', 'image/gif', 'image/webp'},
+        'max_bytes_setting': 'POST_UPLOAD_MAX_IMAGE_BYTES',
+    },
+    'video': {
+        'prefix': 'post_videos/uploads',
+        'content_types': {'video/mp4', 'video/quicktime', 'video/webm'},
+        'max_bytes_setting': 'POST_UPLOAD_MAX_VIDEO_BYTES',
+    },
+}
+
+
+def _s3_client(storage):
+    connection = getattr(storage, 'connection', None)
+    if connection is None or not hasattr(storage, 'bucket_name'):
+        raise UploadError("Direct uploads need S3-compatible storage.")
+    return connection.meta.client
+
+
+def _rules(kind):
+    if kind not in UPLOAD_KINDS:
+        raise UploadError("kind must be 'image' or 'video'.")
+    rules = UPLOAD_KINDS[kind]
+    return rules, getattr(settings, rules['max_bytes_setting'])
+
+
+def _user_prefix(kind, user):
+    return f"{UPLOAD_KINDS[kind]['prefix']}/{user.id}/"
+
+
+def presign_upload(user, kind, filename, content_type):
+    """Presigned POST for one upload, scoped to the user's upload prefix."""
+    rules, max_bytes = _rules(kind)
+    if content_type not in rules['content_types']:
+        raise UploadError(f"Unsupported content type for {kind}: {content_type}.")
+
+    ext = os.path.splitext(filename or '')[1].lower() or mimetypes.guess_extension(content_type) or ''
+    key = f"{_user_prefix(kind, user)}{uuid.uuid4().hex}{ext}"
+
+    storage = default_storage
+    client = _s3_client(storage)
+    presigned = client.generate_presigned_post(
+        Bucket=storage.bucket_name,
+        Key=storage._normalize_name(key),
+        Fields={'Content-Type': content_type},
+        Conditions=[
+            {'Content-Type': content_type},
+            ['content-length-range', 1, max_bytes],
+        ],
+        ExpiresIn=settings.POST_UPLOAD_URL_EXPIRY,
+    )
+    return {
+        'key': key,
+        'url': presigned['url'],
+        'fields': presigned['fields'],
+        'expires_in': settings.POST_UPLOAD_URL_EXPIRY,
+        'max_bytes': max_bytes,
+    }
+
+
+def verify_upload(user, kind, key):
+    """Check an uploaded object exists, belongs to the user and has an allowed size/type."""
+    rules, max_bytes = _rules(kind)
+    if not key or not key.startswith(_user_prefix(kind, user)) or '..' in key:
+        raise UploadError(f"Invalid {kind} key.")
+
+    storage = default_storage
+    client = _s3_client(storage)
+    try:
+        head = client.head_object(Bucket=storage.bucket_name, Key=storage._normalize_name(key))
+    except client.exceptions.ClientError:
+        raise UploadError(f"Uploaded {kind} not found.")
+
+    if not 0 < head['ContentLength'] <= max_bytes:
+        raise UploadError(f"Uploaded {kind} is too large.")
+    if head.get('ContentType') not in rules['content_types']:
+        raise UploadError(f"Unsupported content type for {kind}: {head.get('ContentType')}.")
+    return key
+
+
+def claim_uploaded_media(user, data):
+    """
+    Turn image_key/video_key from a create-post request into field values
+    for Post ({'image': key} etc.). Already-stored objects are referenced, not copied.
+    """
+    media = {}
+    for kind in ('image', 'video'):
+        key = data.get(f'{kind}_key')
+        if key:
+            media[kind] = verify_upload(user, kind, key)
+            if Post.objects.filter(**{kind: key}).exists():
+                raise UploadError(f"That {kind} is already attached to a post.")
+    return media
+
+
+# Resumable chunked uploads
+#
+# A session fixes total_size and chunk_size up front. Chunks can arrive in any
+# order and be retried; each is streamed to CHUNKED_UPLOAD_DIR and checked
+# against the client's SHA-256. Finalizing concatenates the parts into one
+# temp file with a fixed-size buffer and hands that file to storage, so memory
+# use does not grow with the upload.
+
+STREAM_BUFFER = 1024 * 1024
+
+
+def _session_dir(session):
+    return os.path.join(settings.CHUNKED_UPLOAD_DIR, str(session.pk))
+
+
+def _chunk_path(session, index):
+    return os.path.join(_session_dir(session), f"{index:06d}.part")
+
+
+def start_session(user, filename, content_type, total_size, chunk_size=None):
+    rules, max_bytes = _rules('video')
+    if content_type not in rules['content_types']:
+        raise UploadError(f"Unsupported content type for video: {content_type}.")
+    try:
+        total_size = int(total_size)
+        chunk_size = int(chunk_size or settings.CHUNKED_UPLOAD_CHUNK_SIZE)
+    except (TypeError, ValueError):
+        raise UploadError("total_size and chunk_size must be integers.")
+    if not 0 < total_size <= max_bytes:
+        raise UploadError("total_size is out of range.")
+    if not 256 * 1024 <= chunk_size <= settings.CHUNKED_UPLOAD_CHUNK_SIZE * 4:
+        raise UploadError("chunk_size is out of range.")
+
+    session = UploadSession.objects.create(
+        user=user,
+        filename=os.path.basename(filename or 'video'),
+        content_type=content_type,
+        total_size=total_size,
+        chunk_size=chunk_size,
+    )
+    os.makedirs(_session_dir(session), exist_ok=True)
+    return session
+
+
+def store_chunk(session, index, stream, sha256):
+    """Stream one chunk to disk, verifying its size and checksum. Re-sending a chunk replaces it."""
+    if session.status != UploadSession.OPEN:
+        raise UploadError("Upload session is already complete.")
+    if not 0 <= index < session.total_chunks:
+        raise UploadError("Chunk index out of range.")
+    if not sha256:
+        raise UploadError("Missing chunk checksum.")
+
+    expected = session.expected_chunk_size(index)
+    digest = hashlib.sha256()
+    size = 0
+    os.makedirs(_session_dir(session), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=_session_dir(session), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            while True:
+                block = stream.read(min(STREAM_BUFFER, expected - size + 1))
+                if not block:
+                    break
+                size += len(block)
+                if size > expected:
+                    raise UploadError(f"Chunk {index} must be {expected} bytes.")
+                digest.update(block)
+                out.write(block)
+        if size != expected:
+            raise UploadError(f"Chunk {index} must be {expected} bytes.")
+        if digest.hexdigest() != sha256.lower():
+            raise UploadError(f"Checksum mismatch for chunk {index}.")
+        os.replace(tmp_path, _chunk_path(session, index))
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    UploadChunk.objects.update_or_create(
+        session=session, index=index,
+        defaults={'size': size, 'sha256': digest.hexdigest()},
+    )
+
+
+def received_chunks(session):
+    return list(session.chunks.order_by('index').values_list('index', flat=True))
+
+
+def finalize_session(session, **post_fields):
+    """
+    Assemble the chunks in order, store the video and create the Post.
+
+    Assembly and the storage upload happen outside any transaction and hold
+    no lock. The session is then claimed with a conditional UPDATE; if a
+    concurrent finalize (or the expiry purge) got there first, the file just
+    stored is queued for deletion and UploadError is raised.
+    """
+    if session.status != UploadSession.OPEN:
+        raise UploadError("Upload session is already complete.")
+    missing = set(range(session.total_chunks)) - set(received_chunks(session))
+    if missing:
+        raise UploadError(f"Missing chunks: {sorted(missing)[:20]}")
+
+    post = Post(user_id=session.user_id, **post_fields)
+    with tempfile.TemporaryFile(dir=settings.CHUNKED_UPLOAD_DIR) as assembled:
+        for index in range(session.total_chunks):
+            with open(_chunk_path(session, index), 'rb') as part:
+                shutil.copyfileobj(part, assembled, STREAM_BUFFER)
+        assembled.seek(0)
+        post.video.save(session.filename, File(assembled), save=False)
+
+    with transaction.atomic():
+        claimed = UploadSession.objects.filter(pk=session.pk, status=UploadSession.OPEN).update(
+            status=UploadSession.COMPLETE
+        )
+        if claimed:
+            post.save()
+            UploadSession.objects.filter(pk=session.pk).update(post=post)
+        else:
+            schedule_deletion([post.video])
+    if not claimed:
+        raise UploadError("Upload session is already complete.")
+
+    session.status, session.post = UploadSession.COMPLETE, post
+    discard_session_files(session)
+    return post
+
+
+def discard_session_files(session):
+    shutil.rmtree(_session_dir(session), ignore_errors=True)
+
+
+def expired_sessions():
+    cutoff = timezone.now() - timedelta(hours=settings.CHUNKED_UPLOAD_EXPIRY_HOURS)
+    return UploadSession.objects.filter(status=UploadSession.OPEN, created_at__lt=cutoff)
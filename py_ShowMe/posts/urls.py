@@ -2,9 +2,17 @@ from django.urls import path
 
 app_name = 'posts'
 
-from .views import PostListCreateView,PostDetailView
+from .views import (
+    PostListCreateView, PostDetailView, PresignUploadView,
+    ChunkedUploadView, ChunkedUploadDetailView, ChunkedUploadChunkView, ChunkedUploadCompleteView,
+)
 
 urlpatterns = [
     path('posts/', PostListCreateView.as_view(), name='post-list-create'),
     path('posts/<int:pk>/', PostDetailView.as_view(), name='post-detail'),
+    path('uploads/presign/', PresignUploadView.as_view(), name='upload-presign'),
+    path('uploads/chunked/', ChunkedUploadView.as_view(), name='chunked-upload'),
+    path('uploads/chunked/<uuid:session_id>/', ChunkedUploadDetailView.as_view(), name='chunked-upload-detail'),
+    path('uploads/chunked/<uuid:session_id>/chunks/<int:index>/', ChunkedUploadChunkView.as_view(), name='chunked-upload-chunk'),
+    path('uploads/chunked/<uuid:session_id>/complete/', ChunkedUploadCompleteView.as_view(), name='chunked-upload-complete'),
 ]
\ No newline at end of file
@@ -2,47 +2,76 @@ from rest_framework import generics, permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Q
-from .models import Post
+from .models import Post, UploadSession
 from .serializers import PostSerializer
-from userProfile.models import Profile
+from .pagination import InvalidCursor, get_page_size, wants_pagination
+from .timeline import read_timeline
+from .processing import derivative_names
+from .uploads import UploadError, claim_uploaded_media, presign_upload
+from . import uploads
+from django.shortcuts import get_object_or_404
 from rest_framework import status
-
-from follows.models import Follow  
+from django.db import transaction
+from mediafiles.gc import schedule_deletion
 
 class PostListCreateView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        user = request.user
-
-        # Get all public users
-        public_users = Profile.objects.filter(privacy=Profile.PUBLIC).values_list('user', flat=True)
-
-        # Get private users that the current user follows AND the follow is accepted
-        private_following = Follow.objects.filter(
-            follower=user,
-            accepted=True,
-            following__profile__privacy=Profile.PRIVATE
-        ).values_list('following', flat=True)
-
-        # Combine both sets
-        visible_user_ids = set(public_users) | set(private_following) | {user.id}
-
-        # Fetch posts
-        posts = Post.objects.filter(user__in=visible_user_ids).order_by('-created_at')
-
+        # Feed is read from the materialized timelines (see posts/timeline.py)
+        # instead of resolving visibility per request.
+        # Cursor-paginated feed mode: ?page_size=20&cursor=<next>
+        if wants_pagination(request):
+            try:
+                posts, next_cursor = read_timeline(
+                    request.user,
+                    cursor=request.query_params.get('cursor'),
+                    page_size=get_page_size(request),
+                )
+            except InvalidCursor as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            serializer = PostSerializer(posts, many=True)
+            return Response({"results": serializer.data, "next": next_cursor})
+
+        posts, _ = read_timeline(request.user)
         serializer = PostSerializer(posts, many=True)
         return Response(serializer.data)
 
     def post(self, request):
+        # Media uploaded directly to storage is referenced by key (see PresignUploadView)
+        try:
+            uploaded_media = claim_uploaded_media(request.user, request.data)
+        except UploadError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
         serializer = PostSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
-            serializer.save(user=request.user)
+            with transaction.atomic():
+                serializer.save(user=request.user, **uploaded_media)
             return Response(serializer.data, status=201)
         return Response(serializer.errors, status=400)
 
 
+class PresignUploadView(APIView):
+    """
+    Step one of a direct upload: returns a presigned POST the client sends the
+    file to, and the key to pass as image_key/video_key when creating the post.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        try:
+            upload = presign_upload(
+                request.user,
+                kind=request.data.get('kind'),
+                filename=request.data.get('filename', ''),
+                content_type=request.data.get('content_type'),
+            )
+        except UploadError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(upload, status=status.HTTP_201_CREATED)
+
+
 class PostDetailView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -55,13 +84,75 @@ class PostDetailView(APIView):
         if post.user != request.user:
             return Response({"error": "You do not have permission to delete this post."}, status=status.HTTP_403_FORBIDDEN)
 
-        # Delete the image file from S3 if it exists
-        if post.image:
-            post.image.delete(save=False)
-        if post.video:
-            post.video.delete(save=False)
+        # Queue the media for the storage GC worker and delete the row in one transaction
+        with transaction.atomic():
+            schedule_deletion([post.image, post.video, *derivative_names(post)])
+            post.delete()
+
+        return Response({"message": "Post deleted successfully."}, status=status.HTTP_204_NO_CONTENT)
+
+
+def _session_state(session):
+    return {
+        "id": str(session.pk),
+        "status": session.status,
+        "filename": session.filename,
+        "total_size": session.total_size,
+        "chunk_size": session.chunk_size,
+        "total_chunks": session.total_chunks,
+        "received_chunks": uploads.received_chunks(session),
+        "post_id": session.post_id,
+    }
 
-        # Now delete the post from the database
-        post.delete()
 
-        return Response({"message": "Post deleted successfully."}, status=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
+class ChunkedUploadView(APIView):
+    """Start a resumable upload: {filename, content_type, total_size, chunk_size?}."""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        try:
+            session = uploads.start_session(
+                request.user,
+                filename=request.data.get('filename'),
+                content_type=request.data.get('content_type'),
+                total_size=request.data.get('total_size'),
+                chunk_size=request.data.get('chunk_size'),
+            )
+        except UploadError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(_session_state(session), status=status.HTTP_201_CREATED)
+
+
+class ChunkedUploadDetailView(APIView):
+    """Session status, including which chunks have arrived (for resuming)."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, session_id):
+        session = get_object_or_404(UploadSession, pk=session_id, user=request.user)
+        return Response(_session_state(session))
+
+
+class ChunkedUploadChunkView(APIView):
+    """PUT the raw bytes of one chunk, with its SHA-256 hex digest in X-Chunk-SHA256."""
+    permission_classes = [IsAuthenticated]
+
+    def put(self, request, session_id, index):
+        session = get_object_or_404(UploadSession, pk=session_id, user=request.user)
+        try:
+            uploads.store_chunk(session, index, request.stream, request.headers.get('X-Chunk-SHA256'))
+        except UploadError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"index": index, "received": True})
+
+
+class ChunkedUploadCompleteView(APIView):
+    """Assemble the chunks and create the video post: {text_content?}."""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, session_id):
+        session = get_object_or_404(UploadSession, pk=session_id, user=request.user)
+        try:
+            post = uploads.finalize_session(session, text_content=request.data.get('text_content'))
+        except UploadError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(PostSerializer(post).data, status=status.HTTP_201_CREATED)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ProfileviewConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'profileview'
+
+    def ready(self):
+        import profileview.signals
@@ -0,0 +1,88 @@
+# profileview/cache.py
+#
+# Two-layer cache for the profile page (UserDetailWithPostsView).
+#
+#   page          viewer-independent: profile header, counters, first page of
+#                 posts. Keyed by the target's page version and page size.
+#   relationship  per (viewer, target): follow state and mutual-follow count.
+#                 Keyed by both users' graph versions.
+#
+# Versions are integers in the cache. Writes bump them (see
+# profileview/signals.py) after the transaction commits, so old entries are
+# simply never read again and expire by PROFILE_CACHE_TTL; nothing scans or
+# deletes keys. A missing version starts at the current time in ms, so a
+# version lost to eviction cannot line up with an entry left over from before.
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+def _page_version_key(user_id):
+    return f"profile:v:page:{user_id}"
+
+
+def _graph_version_key(user_id):
+    return f"profile:v:graph:{user_id}"
+
+
+def _fresh_version():
+    return time.time_ns() // 1_000_000
+
+
+def _versions(keys):
+    found = cache.get_many(keys)
+    missing = {key: _fresh_version() for key in keys if key not in found}
+    if missing:
+        for key, version in missing.items():
+            cache.add(key, version, None)
+        found.update(cache.get_many(list(missing)))
+    return [found.get(key, missing.get(key)) for key in keys]
+
+
+def _bump(keys):
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _fresh_version(), None)
+
+
+def profile_changed(*user_ids):
+    """Header, counters or posts of these users changed."""
+    keys = [_page_version_key(user_id) for user_id in user_ids if user_id]
+    transaction.on_commit(lambda: _bump(keys))
+
+
+def graph_changed(*user_ids):
+    """Follow rows involving these users changed."""
+    keys = [_graph_version_key(user_id) for user_id in user_ids if user_id]
+    transaction.on_commit(lambda: _bump(keys))
+
+
+def cached_profile(viewer_id, target_id, page_size, build_page, build_relationship):
+    """
+    (page, relationship) for the profile page, building and storing whichever
+    part is missing. Two cache round trips on a hit.
+    """
+    page_version, viewer_graph, target_graph = _versions([
+        _page_version_key(target_id),
+        _graph_version_key(viewer_id),
+        _graph_version_key(target_id),
+    ])
+    page_key = f"profile:page:{target_id}:{page_version}:{page_size}"
+    relationship_key = f"profile:rel:{viewer_id}:{target_id}:{viewer_graph}:{target_graph}"
+
+    entries = cache.get_many([page_key, relationship_key])
+    misses = {}
+    page = entries.get(page_key)
+    if page is None:
+        page = misses[page_key] = build_page()
+    relationship = entries.get(relationship_key)
+    if relationship is None:
+        relationship = misses[relationship_key] = build_relationship()
+    if misses:
+        cache.set_many(misses, settings.PROFILE_CACHE_TTL)
+    return page, relationship
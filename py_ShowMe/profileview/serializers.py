@@ -2,10 +2,13 @@
 
 from rest_framework import serializers
 from posts.models import Post
+from posts.processing import image_srcset, video_meta
 from userProfile.models import Profile
 from django.contrib.auth.models import User
 from userProfile.models import Profile
 import os
+from mediafiles.gc import schedule_deletion
+from mediafiles.resolver import media_url
 
 class ProfileSerializer(serializers.ModelSerializer):
     username = serializers.CharField(source='user.username')
@@ -19,76 +22,62 @@ class ProfileSerializer(serializers.ModelSerializer):
         fields = ['username', 'email', 'first_name', 'last_name', 'bio', 'dob', 'profile_pic', 'privacy']
 
     def get_profile_pic(self, obj):
-        if obj.profile_pic:
-            url = obj.profile_pic.url
-            # Fix malformed URL (common if colon is missed)
-            if url.startswith("https//"):
-                url = url.replace("https//", "https://")
-            elif url.startswith("http//"):
-                url = url.replace("http//", "http://")
-            return url
-        return None
+        return media_url(obj.profile_pic)
 
     def update(self, instance, validated_data):
         # Update User model fields
         user_data = validated_data.pop('user', {})
         for attr, value in user_data.items():
             setattr(instance.user, attr, value)
-        instance.user.save()
+        if user_data:
+            instance.user.save(update_fields=list(user_data))
 
         # Handle profile picture replacement
-        new_picture = validated_data.get("profile_pic", None)
+        new_picture = validated_data.pop("profile_pic", None)
+        changed = []
         if new_picture:
             if instance.profile_pic:
-                instance.profile_pic.delete(save=False)
+                schedule_deletion([instance.profile_pic])
             instance.profile_pic = new_picture
+            changed.append('profile_pic')
 
         # Update other Profile model fields
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
-        instance.save()
+            changed.append(attr)
+        # Only the edited columns: the counters on Profile belong to userProfile/counters.py
+        if changed:
+            instance.save(update_fields=changed)
 
         return instance
 
 
 
 class PostSerializer(serializers.ModelSerializer):
-    user = serializers.ReadOnlyField(source='user.username')
-    user_id = serializers.ReadOnlyField(source='user.id')
+    user = serializers.ReadOnlyField(source='author_username')
+    user_id = serializers.ReadOnlyField()
     profile_pic = serializers.SerializerMethodField()
     image = serializers.SerializerMethodField()
+    image_srcset = serializers.SerializerMethodField()
+    video_meta = serializers.SerializerMethodField()
     video = serializers.SerializerMethodField()
 
     class Meta:
         model = Post
-        fields = ['id', 'user', 'user_id', 'text_content', 'image', 'video', 'created_at', 'profile_pic']
+        fields = ['id', 'user', 'user_id', 'text_content', 'image', 'image_srcset', 'video', 'video_meta', 'created_at', 'profile_pic']
 
     def get_profile_pic(self, obj):
-        if hasattr(obj.user, 'profile') and obj.user.profile.profile_pic:
-            url = obj.user.profile.profile_pic.url
-            if url.startswith("https//"):
-                url = url.replace("https//", "https://")
-            elif url.startswith("http//"):
-                url = url.replace("http//", "http://")
-            return url
-        return None
+        return obj.author_profile_pic_url()
 
     def get_image(self, obj):
-        if obj.image:
-            url = obj.image.url
-            if url.startswith("https//"):
-                url = url.replace("https//", "https://")
-            elif url.startswith("http//"):
-                url = url.replace("http//", "http://")
-            return url
-        return None
+        srcset = image_srcset(obj)
+        return srcset['feed'] if srcset else None
+
+    def get_image_srcset(self, obj):
+        return image_srcset(obj)
+
+    def get_video_meta(self, obj):
+        return video_meta(obj)
 
     def get_video(self, obj):
-        if obj.video:
-            url = obj.video.url
-            if url.startswith("https//"):
-                url = url.replace("https//", "https://")
-            elif url.startswith("http//"):
-                url = url.replace("http//", "http://")
-            return url
-        return None
+        return media_url(obj.video)
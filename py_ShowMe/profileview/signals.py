@@ -0,0 +1,41 @@
+# profileview/signals.py
+#
+# Version bumps for the profile page cache (profileview/cache.py).
+
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from follows import bulk
+from follows.models import Follow
+from posts.models import Post
+from userProfile.models import Profile
+from . import cache as profile_cache
+
+
+@receiver([post_save, post_delete], sender=Post)
+def post_changed(sender, instance, **kwargs):
+    profile_cache.profile_changed(instance.user_id)
+
+
+@receiver(post_save, sender=Profile)
+def profile_saved(sender, instance, **kwargs):
+    profile_cache.profile_changed(instance.user_id)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, update_fields=None, **kwargs):
+    # Logins save last_login only; skip those.
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    profile_cache.profile_changed(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Follow)
+def follow_changed(sender, instance, **kwargs):
+    # Rows deleted by follows.bulk are covered by follows_changed().
+    if bulk.in_batch():
+        return
+    # Counters of both users and the relationship between them
+    profile_cache.profile_changed(instance.follower_id, instance.following_id)
+    profile_cache.graph_changed(instance.follower_id, instance.following_id)
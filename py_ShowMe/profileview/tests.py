@@ -1,3 +1,145 @@
-from django.test import TestCase
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext
+
+from ShowMe.testing import ShowMeTestCase
+from follows.models import Follow
+from posts.models import Post
+from userProfile.models import Profile
+from userProfile.serializers import ProfileUpdateSerializer
+
+
+class UserDetailWithPostsViewTests(ShowMeTestCase):
+    # User id, then on a cache miss: profile+user (with counters), posts,
+    # relationship, mutual follow count.
+    QUERY_BUDGET = 5
+    CACHED_QUERY_BUDGET = 1
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def get_profile(self, viewer, username, query=''):
+        return self.client_for(viewer).get(f'/profileview/user/{username}/{query}')
+
+    def test_query_count_is_constant(self):
+        viewer = self.make_user('viewer')
+        target = self.make_user('target')
+        others = [self.make_user(f'user{i}') for i in range(10)]
+        for other in others:
+            Follow.objects.create(follower=other, following=target, accepted=True)
+        for other in others[:5]:
+            Follow.objects.create(follower=viewer, following=other, accepted=True)
+        for other in others[3:]:
+            Follow.objects.create(follower=target, following=other, accepted=True)
+        for i in range(15):
+            Post.objects.create(user=target, text_content=f"post {i}")
+
+        with self.assertNumQueries(self.QUERY_BUDGET):
+            response = self.get_profile(viewer, 'target', '?page_size=5')
+        with self.assertNumQueries(self.CACHED_QUERY_BUDGET):
+            self.assertEqual(self.get_profile(viewer, 'target', '?page_size=5').data, response.data)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['followers_count'], 10)
+        self.assertEqual(response.data['following_count'], 7)
+        self.assertEqual(response.data['mutual_follow_count'], 2)
+        self.assertEqual(response.data['posts_count'], 15)
+        self.assertEqual(len(response.data['posts']), 5)
+        self.assertIsNotNone(response.data['posts_next'])
+
+    def test_profile_posts_pages(self):
+        viewer = self.make_user('viewer')
+        target = self.make_user('target')
+        created = [Post.objects.create(user=target, text_content=f"post {i}").id for i in range(7)]
+
+        first = self.get_profile(viewer, 'target', '?page_size=3').data
+        seen = [post['id'] for post in first['posts']]
+        cursor = first['posts_next']
+        while cursor:
+            page = self.get_profile(viewer, 'target', f'posts/?page_size=3&cursor={cursor}').data
+            seen += [post['id'] for post in page['results']]
+            cursor = page['next']
+        self.assertEqual(seen, created[::-1])
+        self.assertEqual(self.get_profile(viewer, 'target', 'posts/?cursor=bogus').status_code, 400)
+
+    def test_follow_status(self):
+        viewer = self.make_user('viewer')
+        target = self.make_user('target', privacy=Profile.PRIVATE)
+
+        self.assertEqual(self.get_profile(viewer, 'viewer').data['follow_status'], 'self')
+        self.assertEqual(self.get_profile(viewer, 'target').data['follow_status'], 'not_following')
+
+        # Cache versions are bumped on commit
+        with self.captureOnCommitCallbacks(execute=True):
+            received = Follow.objects.create(follower=target, following=viewer, accepted=False)
+        self.assertEqual(self.get_profile(viewer, 'target').data['follow_status'], 'request_received')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            sent = Follow.objects.create(follower=viewer, following=target, accepted=False)
+        self.assertEqual(self.get_profile(viewer, 'target').data['follow_status'], 'requested')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            for follow in (received, sent):
+                follow.accepted = True
+                follow.save()
+        response = self.get_profile(viewer, 'target')
+        self.assertEqual(response.data['follow_status'], 'mutual')
+        self.assertEqual(response.data['posts_count'], 0)
+
+    def test_counters_follow_writes(self):
+        viewer = self.make_user('viewer')
+        target = self.make_user('target', privacy=Profile.PRIVATE)
+        Post.objects.create(user=target, text_content="hidden")
+
+        def counts():
+            data = self.get_profile(viewer, 'target').data
+            return data['followers_count'], data['posts_count']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            follow = Follow.objects.create(follower=viewer, following=target, accepted=False)
+        self.assertEqual(counts(), (0, 0))
+        with self.captureOnCommitCallbacks(execute=True):
+            follow.accepted = True
+            follow.save()
+        self.assertEqual(counts(), (1, 1))
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.create(user=target, text_content="second")
+        self.assertEqual(counts(), (1, 2))
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.filter(user=target).first().delete()
+            follow.delete()
+        self.assertEqual(counts(), (0, 0))
+        self.assertEqual(Profile.objects.get(user=target).posts_count, 1)
+
+        Profile.objects.update(followers_count=99, posts_count=0)
+        call_command('repair_profile_counters', stdout=StringIO())
+        target_profile = Profile.objects.get(user=target)
+        self.assertEqual((target_profile.followers_count, target_profile.posts_count), (0, 1))
+
+
+class ProfileEditTests(ShowMeTestCase):
+    def test_edit_writes_only_the_edited_columns(self):
+        user = self.make_user('me')
+
+        def follower_arrives(attrs):
+            # A counter bump from another request, after the view loaded the profile
+            Profile.objects.filter(user=user).update(followers_count=F('followers_count') + 1)
+            return attrs
+
+        with mock.patch.object(ProfileUpdateSerializer, 'validate', side_effect=follower_arrives), \
+                CaptureQueriesContext(connection) as queries:
+            response = self.client_for(user).put('/profile/edit/', {'bio': 'hello', 'first_name': 'Me'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        profile = Profile.objects.get(user=user)
+        self.assertEqual((profile.bio, profile.user.first_name, profile.followers_count), ('hello', 'Me', 1))
+        edit = [q['sql'] for q in queries if q['sql'].startswith('UPDATE "userProfile_profile" SET "bio"')]
+        self.assertEqual(len(edit), 1)
+        for column in ('followers_count', 'following_count', 'posts_count', 'is_celebrity'):
+            self.assertNotIn(column, edit[0])
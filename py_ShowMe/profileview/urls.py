@@ -1,8 +1,9 @@
 # profileview/urls.py
 
 from django.urls import path
-from .views import UserDetailWithPostsView
+from .views import UserDetailWithPostsView, ProfilePostsView
 
 urlpatterns = [
     path('user/<str:username>/', UserDetailWithPostsView.as_view(), name='user-detail-with-posts'),
+    path('user/<str:username>/posts/', ProfilePostsView.as_view(), name='user-posts'),
 ]
@@ -1,67 +1,85 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from rest_framework import status
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 from django.contrib.auth.models import User
 from userProfile.models import Profile
 from posts.models import Post
-from follows.models import Follow  # ✅ Updated
+from posts.pagination import InvalidCursor, get_page_size, paginate_by_cursor
+from follows.relationships import mutual_follow_count, relationship_between
 from .serializers import ProfileSerializer, PostSerializer
+from . import cache as profile_cache
 
 class UserDetailWithPostsView(APIView):
+    """Profile header plus the first page of posts; the rest come from ProfilePostsView."""
     permission_classes = [IsAuthenticated]
 
     def get(self, request, username):
-        target_user = get_object_or_404(User, username=username)
-        target_profile = get_object_or_404(Profile, user=target_user)
+        target_id = User.objects.filter(username=username).values_list('id', flat=True).first()
+        if target_id is None:
+            raise Http404
         requesting_user = request.user
+        page_size = get_page_size(request)
 
-        # Initialize
-        follow_status = "not_following"
-        can_view_posts = False
-
-        if requesting_user == target_user:
-            follow_status = "self"
-            can_view_posts = True
+        def build_page():
+            target_profile = get_object_or_404(Profile.objects.select_related('user'), user_id=target_id)
+            # Every post of the target; whether this viewer sees them is decided below
+            posts, posts_next = paginate_by_cursor(Post.objects.filter(user_id=target_id), page_size=page_size)
+            return {
+                "privacy": target_profile.privacy,
+                "profile": ProfileSerializer(target_profile).data,
+                "followers_count": target_profile.followers_count,
+                "following_count": target_profile.following_count,
+                "posts_count": target_profile.posts_count,
+                "posts": PostSerializer(posts, many=True).data,
+                "posts_next": posts_next,
+            }
 
-        else:
-            is_following = Follow.objects.filter(follower=requesting_user, following=target_user, accepted=True).exists()
-            is_followed_back = Follow.objects.filter(follower=target_user, following=requesting_user, accepted=True).exists()
-            has_sent_request = Follow.objects.filter(follower=requesting_user, following=target_user, accepted=False).exists()
-            has_received_request = Follow.objects.filter(follower=target_user, following=requesting_user, accepted=False).exists()
+        def build_relationship():
+            return {
+                "relationship": relationship_between(requesting_user, target_id),
+                "mutual_follow_count": mutual_follow_count(requesting_user, target_id),
+            }
 
-            if is_following and is_followed_back:
-                follow_status = "mutual"
-                can_view_posts = True
-            elif has_sent_request:
-                follow_status = "requested"
-            elif has_received_request:
-                follow_status = "request_received"
-            elif target_profile.privacy == 'public':
-                follow_status = "not_following"
-                can_view_posts = True
-            else:
-                follow_status = "not_following"
+        # Shared header/posts part and per-viewer part are cached separately (profileview/cache.py)
+        page, viewer_state = profile_cache.cached_profile(
+            requesting_user.id, target_id, page_size, build_page, build_relationship
+        )
+        relationship = viewer_state["relationship"]
 
-        posts_qs = Post.objects.filter(user=target_user) if can_view_posts else Post.objects.none()
-        post_data = PostSerializer(posts_qs, many=True).data
+        # Same visibility rule as the home feed (Post.objects.visible_to)
+        can_view_posts = (
+            page["privacy"] == Profile.PUBLIC or relationship.is_self or relationship.following
+        )
 
-        followers_count = Follow.objects.filter(following=target_user, accepted=True).count()
-        following_count = Follow.objects.filter(follower=target_user, accepted=True).count()
-        posts_count = posts_qs.count()
+        return Response({
+            "profile": page["profile"],
+            "follow_status": relationship.follow_status,
+            "followers_count": page["followers_count"],
+            "following_count": page["following_count"],
+            "mutual_follow_count": viewer_state["mutual_follow_count"],
+            # posts_count stays 0 for viewers who can't see the posts, as before.
+            "posts_count": page["posts_count"] if can_view_posts else 0,
+            "posts": page["posts"] if can_view_posts else [],
+            "posts_next": page["posts_next"] if can_view_posts else None,
+        })
 
-        my_following_ids = Follow.objects.filter(follower=requesting_user, accepted=True).values_list('following_id', flat=True)
-        target_following_ids = Follow.objects.filter(follower=target_user, accepted=True).values_list('following_id', flat=True)
-        mutual_follow_count = len(set(my_following_ids) & set(target_following_ids))
 
-        profile_data = ProfileSerializer(target_profile).data
+class ProfilePostsView(APIView):
+    """Further pages of a user's posts: ?cursor=<posts_next>&page_size=N."""
+    permission_classes = [IsAuthenticated]
 
-        return Response({
-            "profile": profile_data,
-            "follow_status": follow_status,
-            "followers_count": followers_count,
-            "following_count": following_count,
-            "mutual_follow_count": mutual_follow_count,
-            "posts_count": posts_count,
-            "posts": post_data
-        })
+    def get(self, request, username):
+        target_user = get_object_or_404(User, username=username)
+        posts_qs = Post.objects.visible_to(request.user).filter(user=target_user)
+        try:
+            posts, next_cursor = paginate_by_cursor(
+                posts_qs,
+                cursor=request.query_params.get('cursor'),
+                page_size=get_page_size(request),
+            )
+        except InvalidCursor as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"results": PostSerializer(posts, many=True).data, "next": next_cursor})
@@ -3,4 +3,7 @@ from django.apps import AppConfig
 
 class UserprofileConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'userProfile'
\ No newline at end of file
+    name = 'userProfile'
+
+    def ready(self):
+        import userProfile.signals
@@ -0,0 +1,91 @@
+# userProfile/counters.py
+#
+# Follower, following and post counts are stored on Profile and adjusted
+# with F() expressions from the Follow and Post signals (posts/signals.py),
+# so they commit or roll back with the write that changed them. Batch writes
+# that bypass signals (follows/bulk.py) apply the same change with
+# follows_changed(); anything else (raw SQL, ad-hoc queryset updates) must
+# call recount() or run manage.py repair_profile_counters afterwards.
+
+from collections import Counter
+
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from follows.models import Follow
+from posts.models import Post
+from .models import Profile
+
+
+def _adjust(profiles, field, delta):
+    if delta < 0:
+        # Never go below zero if a counter has drifted
+        profiles = profiles.filter(**{f'{field}__gte': -delta})
+    profiles.update(**{field: F(field) + delta})
+
+
+def adjust(user_id, field, delta):
+    _adjust(Profile.objects.filter(user_id=user_id), field, delta)
+
+
+def adjust_many(field, deltas):
+    """Apply {user_id: delta} to field with one UPDATE per distinct delta."""
+    by_delta = {}
+    for user_id, delta in deltas.items():
+        if delta:
+            by_delta.setdefault(delta, []).append(user_id)
+    for delta, user_ids in by_delta.items():
+        _adjust(Profile.objects.filter(user_id__in=user_ids), field, delta)
+
+
+def follow_accepted(follower_id, following_id):
+    adjust(following_id, 'followers_count', 1)
+    adjust(follower_id, 'following_count', 1)
+
+
+def follow_removed(follower_id, following_id):
+    adjust(following_id, 'followers_count', -1)
+    adjust(follower_id, 'following_count', -1)
+
+
+def follows_changed(pairs, delta):
+    """follow_accepted (delta=1) or follow_removed (delta=-1) for many (follower_id, following_id) pairs."""
+    followers, following = Counter(), Counter()
+    for follower_id, following_id in pairs:
+        followers[following_id] += delta
+        following[follower_id] += delta
+    adjust_many('followers_count', followers)
+    adjust_many('following_count', following)
+
+
+def counts_for(user_id):
+    """{'followers_count', 'following_count', 'posts_count'} for a user; zeros if they have no profile."""
+    fields = ('followers_count', 'following_count', 'posts_count')
+    return Profile.objects.filter(user_id=user_id).values(*fields).first() or dict.fromkeys(fields, 0)
+
+
+def _count(queryset, group_field):
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{group_field: OuterRef('user_id')})
+            .order_by()
+            .values(group_field)
+            .annotate(n=Count('pk'))
+            .values('n'),
+            output_field=IntegerField(),
+        ),
+        Value(0),
+    )
+
+
+def recount(user_ids=None):
+    """Recompute the counters from the Follow and Post tables in one UPDATE. Returns rows updated."""
+    profiles = Profile.objects.all()
+    if user_ids is not None:
+        profiles = profiles.filter(user_id__in=user_ids)
+    accepted = Follow.objects.filter(accepted=True)
+    return profiles.update(
+        followers_count=_count(accepted, 'following_id'),
+        following_count=_count(accepted, 'follower_id'),
+        posts_count=_count(Post.objects.all(), 'user_id'),
+    )
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from userProfile import counters
+
+
+class Command(BaseCommand):
+    help = "Recompute Profile follower/following/post counters from the Follow and Post tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user-id', type=int, action='append', dest='user_ids', help="Only repair this user (repeatable).")
+
+    def handle(self, *args, user_ids=None, **options):
+        updated = counters.recount(user_ids)
+        self.stdout.write(self.style.SUCCESS(f"Recounted {updated} profiles."))
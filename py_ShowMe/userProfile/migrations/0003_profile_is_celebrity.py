@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 18:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('userProfile', '0002_profile_bio_profile_dob_profile_profile_pic'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='is_celebrity',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.1.7 on 2026-10-18 18:40
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Profile = apps.get_model('userProfile', 'Profile')
+    Follow = apps.get_model('follows', 'Follow')
+    Post = apps.get_model('posts', 'Post')
+
+    def count(queryset, field):
+        return Coalesce(
+            models.Subquery(
+                queryset.filter(**{field: models.OuterRef('user_id')}).order_by()
+                .values(field).annotate(n=models.Count('pk')).values('n'),
+                output_field=models.IntegerField(),
+            ),
+            models.Value(0),
+        )
+
+    accepted = Follow.objects.filter(accepted=True)
+    Profile.objects.update(
+        followers_count=count(accepted, 'following_id'),
+        following_count=count(accepted, 'follower_id'),
+        posts_count=count(Post.objects.all(), 'user_id'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('userProfile', '0003_profile_is_celebrity'),
+        ('follows', '0001_initial'),
+        ('posts', '0007_upload_sessions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='following_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='posts_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,7 @@
 # Create your models here.
 from django.contrib.auth.models import User
 from django.db import models
+from mediafiles.resolver import media_url
 
 class Profile(models.Model):
     PUBLIC = 'public'
@@ -15,17 +16,15 @@ class Profile(models.Model):
     dob = models.DateField(null=True, blank=True)
     profile_pic = models.ImageField(upload_to='profile_pics/', null=True, blank=True)
     privacy = models.CharField(max_length=10, choices=PRIVACY_CHOICES, default='public')
+    # Authors past FEED_CELEBRITY_THRESHOLD followers are pulled into feeds at read time
+    is_celebrity = models.BooleanField(default=False)
+    # Denormalized counts kept in step by userProfile/counters.py
+    followers_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+    posts_count = models.PositiveIntegerField(default=0)
 
     def get_profile_pic_url(self):
-        if self.profile_pic and hasattr(self.profile_pic, 'url'):
-            url = self.profile_pic.url
-            # Fix common typo if present
-            if url.startswith("https//"):
-                url = url.replace("https//", "https://")
-            elif url.startswith("http//"):
-                url = url.replace("http//", "http://")
-            return url
-        return None
+        return media_url(self.profile_pic)
 
     def __str__(self):
         return f"{self.user.username} - {self.privacy}"
@@ -3,6 +3,9 @@ from django.contrib.auth.models import User
 from .models import Profile
 import os
 from django.conf import settings
+from mediafiles.fields import MediaImageField
+from mediafiles.gc import schedule_deletion
+from mediafiles.resolver import media_url
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
@@ -29,6 +32,7 @@ class ProfileUpdateSerializer(serializers.ModelSerializer):
     email = serializers.EmailField(source='user.email')
     first_name = serializers.CharField(source='user.first_name')
     last_name = serializers.CharField(source='user.last_name')
+    profile_pic = MediaImageField(required=False, allow_null=True)
 
     class Meta:
         model = Profile
@@ -39,35 +43,31 @@ class ProfileUpdateSerializer(serializers.ModelSerializer):
         user_data = validated_data.pop('user', {})
         for attr, value in user_data.items():
             setattr(instance.user, attr, value)
-        instance.user.save()
+        if user_data:
+            instance.user.save(update_fields=list(user_data))
 
         # 2. Handle profile_pic update (S3 and local storage)
+        changed = []
         if 'profile_pic' in validated_data:
             new_picture = validated_data.pop("profile_pic")
 
             if new_picture:  # Only if a new picture is provided
                 # Delete old picture
                 if instance.profile_pic:
-                    instance.profile_pic.delete(save=False)
+                    schedule_deletion([instance.profile_pic])
 
                 instance.profile_pic = new_picture  # Assign the new picture
+                changed.append('profile_pic')
 
         # 3. Update other Profile fields
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
+            changed.append(attr)
 
-        instance.save()
+        # Only the edited columns: the counters on Profile belong to userProfile/counters.py
+        if changed:
+            instance.save(update_fields=changed)
         return instance
-    def to_representation(self, instance):
-        rep = super().to_representation(instance)
-        if instance.profile_pic:
-            url = instance.profile_pic.url
-            if url.startswith("https//"):
-                url = url.replace("https//", "https://")
-            elif url.startswith("http//"):
-                url = url.replace("http//", "http://")
-            rep['profile_pic'] = url
-        return rep
 
 
 
@@ -81,14 +81,8 @@ class CurrentUserSerializer(serializers.ModelSerializer):
         fields = ['id', 'username', 'email', 'first_name', 'last_name', 'profile_pic']
 
     def get_profile_pic(self, obj):
-        if hasattr(obj, 'profile') and obj.profile and obj.profile.profile_pic:
-            url = obj.profile.profile_pic.url
-            # Fix common typo if present
-            if url.startswith("https//"):
-                url = url.replace("https//", "https://")
-            elif url.startswith("http//"):
-                url = url.replace("http//", "http://")
-            return url
+        if hasattr(obj, 'profile') and obj.profile:
+            return media_url(obj.profile.profile_pic)
         return None
 
 
@@ -0,0 +1,30 @@
+# userProfile/signals.py
+#
+# privacy_changed is sent after a Profile save that switched its privacy, with
+# the saved instance and the previous value. Apps that react to a privacy flip
+# (timelines, pending follow requests) connect to it instead of comparing
+# the stored value themselves.
+
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import Signal, receiver
+
+from .models import Profile
+
+privacy_changed = Signal()  # sender=Profile, instance, previous
+
+
+@receiver(pre_save, sender=Profile)
+def remember_privacy(sender, instance, update_fields=None, **kwargs):
+    if instance.pk is None or (update_fields is not None and 'privacy' not in update_fields):
+        instance._privacy_before_save = None
+    else:
+        instance._privacy_before_save = (
+            Profile.objects.filter(pk=instance.pk).values_list('privacy', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Profile)
+def send_privacy_changed(sender, instance, created, **kwargs):
+    previous = instance.__dict__.pop('_privacy_before_save', None)
+    if not created and previous is not None and previous != instance.privacy:
+        privacy_changed.send(sender=Profile, instance=instance, previous=previous)
@@ -4,8 +4,39 @@ from django.test import TestCase
 # userProfile/tests.py
 from django.test import TestCase
 from django.apps import apps
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from ShowMe.testing import ShowMeTestCase
+from .models import Profile
+from .signals import privacy_changed
 
 class PrintDBTablesTest(TestCase):
     def test_print_tables(self):
         for model in apps.get_models():
             print(model._meta.db_table)
+
+
+class PrivacyChangedTests(ShowMeTestCase):
+    def reads_privacy(self, profile, **kwargs):
+        with CaptureQueriesContext(connection) as queries:
+            profile.save(**kwargs)
+        return any(q['sql'].startswith('SELECT "userProfile_profile"."privacy"') for q in queries)
+
+    def test_sent_only_when_privacy_switches(self):
+        received = []
+
+        def record(sender, instance, previous, **kwargs):
+            received.append((previous, instance.privacy))
+
+        privacy_changed.connect(record)
+        self.addCleanup(privacy_changed.disconnect, record)
+        profile = self.make_user('me').profile
+        profile.bio = "hi"
+        profile.save()
+        self.assertFalse(self.reads_privacy(profile, update_fields=['bio']))
+        profile.privacy = Profile.PRIVATE
+        self.assertTrue(self.reads_privacy(profile))
+        profile.privacy = Profile.PUBLIC
+        profile.save(update_fields=['privacy'])
+        self.assertEqual(received, [(Profile.PUBLIC, Profile.PRIVATE), (Profile.PRIVATE, Profile.PUBLIC)])